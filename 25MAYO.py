@@ -1,6 +1,8 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
 
 # ================== Configuración por defecto (modo script) ==================
 RUTA_ENTRADA = "CICLO 49_PDIRECCION.xlsx"
@@ -150,6 +152,11 @@ BARRIOS_SOPORTADOS = [
     "PLACER",
 ]
 
+# El filtro de procesar() es exactamente la lista de barrios soportados
+# (el enrutador del orquestador usa este vocabulario)
+VOCABULARIO_FILTRO = BARRIOS_SOPORTADOS
+FILTRO = "|".join(BARRIOS_SOPORTADOS)
+
 def normalizar_direccion(direccion: str):
     """
     Intenta normalizar la dirección usando las reglas de:
@@ -188,37 +195,12 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
 
     Filtra SOLO las filas cuyos barrios pertenecen a BARRIOS_SOPORTADOS.
     """
-    if "DIRECCION" not in df_in.columns:
-        raise ValueError("El DataFrame de entrada debe contener la columna 'DIRECCION'.")
-
-    df = df_in.copy()
-
-    # Asegurar columna de identificador NIU
-    if "NIU" in df.columns:
-        id_col = "NIU"
-    elif "CLIENTE_ID" in df.columns:
-        id_col = "CLIENTE_ID"
-    else:
-        raise ValueError("No se encontró columna 'NIU' ni 'CLIENTE_ID' en el DataFrame de entrada.")
-
-    df = df[[id_col, "DIRECCION"]].copy()
-    df.rename(columns={id_col: "NIU"}, inplace=True)
-
-    # Aplicar normalizador
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_direccion(x))
-    )
-
-    # Filtrar por barrios soportados
-    patron = "|".join(BARRIOS_SOPORTADOS)
-    mask = df["DIRECCION"].astype(str).str.contains(patron, case=False, na=False)
-    df_filtrado = df[mask].copy()
-
-    return df_filtrado[["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 # ================== MODO SCRIPT (reproduce comportamiento original) ==================
 
-if __name__ == "__main__":
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Leer Excel de entrada
     df_in = pd.read_excel(RUTA_ENTRADA, dtype=str)
 
@@ -229,13 +211,15 @@ if __name__ == "__main__":
     normalizadas = (df_out["VALIDACION"] == "1").sum()
     efectividad = (normalizadas / total * 100) if total > 0 else 0
 
+    print(f"🔍 Total direcciones filtradas: {total}")
+    print(f"📊 Direcciones normalizadas: {normalizadas}")
+    print(f"📈 Efectividad: {round(efectividad, 2)}%")
+    return {HOJA_SALIDA: df_out}
+
+
+if __name__ == "__main__":
     # Guardar en el archivo consolidado
-    modo = "a" if os.path.exists(RUTA_SALIDA) else "w"
-    with pd.ExcelWriter(RUTA_SALIDA, engine="openpyxl", mode=modo) as writer:
-        df_out.to_excel(writer, sheet_name=HOJA_SALIDA, index=False)
+    guardar_hojas(RUTA_SALIDA, hojas_script())
 
     print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
     print(f"📄 Hoja: {HOJA_SALIDA}")
-    print(f"🔍 Total direcciones filtradas: {total}")
-    print(f"📊 Direcciones normalizadas: {normalizadas}")
-    print(f"📈 Efectividad: {round(efectividad, 2)}%")
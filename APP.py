@@ -1,47 +1,65 @@
 import os
 import io
-import importlib.util
+import queue
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 import pandas as pd
 import streamlit as st
 
+from CACHE_NORMALIZACION import version_modulo
+from COMUN import leer_excel
+from ENRUTADOR import construir_enrutador
+from ESCRITURA import FORMATOS_SALIDA, escribir_dataframe
+from MANIFIESTO import hash_fuentes
+from PROCESO_APP import (
+    cargar_modulo_desde_archivo, inicializar_worker, procesar_df_con_modulos, tarea_archivo,
+)
+
 # ================== CONFIGURACIÓN ==================
 
 # Lista de scripts de normalización que quieres usar
 # (nombre_amigable, archivo_py)
 SCRIPTS = [
-    ("MERCAR_ARMENIA", "main.py"),        # aquí está la lógica de MERCAR + NUEVO ARMENIA
-    ("25MAYO",         "25mayo.py"),
-    ("CECILIA",        "CecMain.py"),
-    ("ARCOIRIS",       "Arcoiris.py"),
-    ("CDORADA",        "CDorada.py"),
-    ("CENTROCLL",      "centro29cll.py"),
-    ("CHAMBRANA",      "chambranas.py"),
-    ("CIBELES",        "cibeles.py"),
-    ("COLINAS",        "colinas.py"),
-    ("ISABELLA",       "Isabella.py"),
-    ("MIRANDA",        "miranda.py"),
-    ("QMARINA",        "Qmarina.py"),
-    ("RECREO",         "recreo.py"),
-    ("RPINILLA",       "Rpinilla.py"),
+    ("MERCAR_ARMENIA", "MAIN.py"),        # aquí está la lógica de MERCAR + NUEVO ARMENIA
+    ("25MAYO",         "25MAYO.py"),
+    ("CECILIA",        "CECMAIN.py"),
+    ("ARCOIRIS",       "ARCOIRIS.py"),
+    ("CDORADA",        "CDORADA.py"),
+    ("CENTROCLL",      "CENTROCLL.py"),
+    ("CHAMBRANA",      "CHAMBRANA.py"),
+    ("CIBELES",        "CIBELES.py"),
+    ("COLINAS",        "COLINAS.py"),
+    ("ISABELLA",       "ISABELLA.py"),
+    ("MIRANDA",        "MIRANDA.py"),
+    ("QMARINA",        "QMARINA.py"),
+    ("RECREO",         "RECREO.py"),
+    ("RPINILLA",       "RPINILLA.py"),
 ]
 
 COLUMNAS_SALIDA = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
 
+# Procesos que leen y normalizan los archivos subidos en paralelo (uno por
+# archivo); con un solo archivo se procesa en el mismo proceso
+MAX_WORKERS = 5
 
-# ================== HELPERS PARA CARGAR MÓDULOS ==================
+# Memoria máxima (MB) de la caché de resultados por contenido; al pasarse se
+# descartan los resultados usados hace más tiempo
+MAX_MB_CACHE_RESULTADOS = 512
 
-def cargar_modulo_desde_archivo(ruta_py: str, nombre_modulo: str):
-    """
-    Carga dinámicamente un archivo .py (aunque empiece con número, ej. 25mayo.py)
-    y devuelve el módulo importado.
-    """
-    spec = importlib.util.spec_from_file_location(nombre_modulo, ruta_py)
-    modulo = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(modulo)  # type: ignore[attr-defined]
-    return modulo
+# Tipo MIME de cada formato de descarga (ver ESCRITURA.py)
+MIME_SALIDA = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
 
 
+# ================== HELPERS PARA CARGAR MÓDULOS ==================
+
 @st.cache_resource
 def cargar_scripts_normalizacion():
     """
@@ -89,65 +107,162 @@ def cargar_scripts_normalizacion():
     return modulos
 
 
+# ================== CACHÉ DE RESULTADOS ==================
+# Los resultados se guardan en memoria del servidor (compartida entre
+# sesiones) con clave = hash de los bytes subidos + versión del código de los
+# módulos: volver a procesar, o subir el mismo libro en otra sesión, no relee
+# ni normaliza nada, y la descarga ya escrita también se reutiliza. Es una
+# LRU acotada por MAX_MB_CACHE_RESULTADOS.
 
-def procesar_df_con_modulos(df_in: pd.DataFrame, modulos):
-    """
-    Aplica TODOS los módulos de normalización a un DataFrame de entrada.
-    Devuelve un DataFrame con columnas estándar:
-    NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
-    """
-    resultados = []
-
-    for nombre, modulo in modulos:
-        try:
-            df_out = modulo.procesar(df_in)
-        except Exception as e:
-            st.warning(f"Error en `procesar()` de **{nombre}**: {e}")
-            continue
-
-        if df_out is None or df_out.empty:
-            # st.info(f"{nombre}: 0 filas devueltas.")
-            continue
-
-        # Verificar columnas
-        if not set(COLUMNAS_SALIDA).issubset(df_out.columns):
-            st.warning(
-                f"El módulo **{nombre}** no devuelve todas las columnas estándar "
-                f"{COLUMNAS_SALIDA}. Se omitirá su resultado."
-            )
-            continue
-
-        resultados.append(df_out[COLUMNAS_SALIDA])
-
-    if resultados:
-        return pd.concat(resultados, ignore_index=True)
-    else:
-        return pd.DataFrame(columns=COLUMNAS_SALIDA)
+@st.cache_resource
+def cache_resultados() -> dict:
+    return {"entradas": OrderedDict(), "bytes": 0, "lock": threading.Lock()}
 
 
-def procesar_archivos_subidos(archivos, modulos):
+def version_modulos(modulos) -> str:
+    """Hash del código de los módulos cargados y del código compartido."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    compartidas = [os.path.join(base_dir, f) for f in ("COMUN.py", "ENRUTADOR.py", "PROCESO_APP.py")]
+    sha = hashlib.sha256(hash_fuentes(compartidas).encode())
+    for nombre, modulo in modulos:
+        sha.update(f"|{nombre}:{version_modulo(modulo)}".encode())
+    return sha.hexdigest()[:16]
+
+
+def clave_contenido(datos: bytes, version: str) -> str:
+    return f"{hashlib.sha256(datos).hexdigest()[:24]}-{version}"
+
+
+def buscar_resultado(clave):
+    cache = cache_resultados()
+    with cache["lock"]:
+        entrada = cache["entradas"].get(clave)
+        if entrada is None:
+            return None
+        cache["entradas"].move_to_end(clave)
+        return entrada[0]
+
+
+def guardar_resultado(clave, valor, tamano: int) -> None:
+    cache = cache_resultados()
+    limite = MAX_MB_CACHE_RESULTADOS * 1024 * 1024
+    if tamano > limite:
+        return
+    with cache["lock"]:
+        anterior = cache["entradas"].pop(clave, None)
+        if anterior is not None:
+            cache["bytes"] -= anterior[1]
+        cache["entradas"][clave] = (valor, tamano)
+        cache["bytes"] += tamano
+        while cache["bytes"] > limite:
+            _, (_, liberado) = cache["entradas"].popitem(last=False)
+            cache["bytes"] -= liberado
+
+
+# ================== PROCESAMIENTO EN PARALELO ==================
+# Cada archivo subido se lee y se normaliza en su propio proceso (openpyxl y
+# las reglas son Python puro: con hilos no se gana nada por el GIL), así que
+# varios archivos tardan más o menos lo que el más lento. Los workers avisan
+# por una cola el archivo y el módulo en que van, para la barra de progreso,
+# y devuelven sus avisos para mostrarlos desde la sesión de Streamlit. Las
+# funciones de los workers están en PROCESO_APP.py (ver ahí por qué).
+
+
+def procesar_archivos_subidos(archivos, modulos, version=None):
     """
-    Recorre la lista de archivos subidos en Streamlit, lee cada uno
-    como Excel y aplica los módulos de normalización.
-    Devuelve un DataFrame unificado.
+    Lee los archivos subidos en Streamlit como Excel (solo las columnas
+    NIU/CLIENTE_ID y DIRECCION) y les aplica los módulos de normalización,
+    un proceso por archivo, con una barra de progreso por archivo y módulo.
+    Con version (ver version_modulos), los archivos ya procesados salen de
+    la caché de resultados. Devuelve un DataFrame unificado, en el orden en
+    que se subieron.
     """
-    todos = []
-
-    for f in archivos:
-        st.write(f"📂 Procesando archivo: **{f.name}**")
-        try:
-            df_in = pd.read_excel(f, dtype=str)
-        except Exception as e:
-            st.warning(f"No se pudo leer `{f.name}` como Excel: {e}")
-            continue
-
-        df_proc = procesar_df_con_modulos(df_in, modulos)
+    progreso = st.progress(0.0, text=f"📥 Leyendo {len(archivos)} archivo(s)...")
+    pasos = len(archivos) * (len(modulos) + 1)
+    hechos = 0
+
+    def avanzar(i, nombre):
+        nonlocal hechos
+        hechos += 1
+        if nombre is None:
+            texto = f"📥 {archivos[i].name}: leído"
+        else:
+            texto = f"⚙️ {archivos[i].name}: {nombre}"
+        progreso.progress(min(hechos / pasos, 1.0), text=texto)
+
+    por_archivo = {}
+    claves = {}
+    if version is not None:
+        claves = {i: clave_contenido(f.getvalue(), version) for i, f in enumerate(archivos)}
+
+    def terminar(i, df_proc, avisos, de_cache=False):
+        f = archivos[i]
+        if i in claves and not de_cache:
+            guardar_resultado(claves[i], (df_proc, avisos), int(df_proc.memory_usage(deep=True).sum()))
+        origen = " (caché)" if de_cache else ""
+        st.write(f"📂 Procesado{origen}: **{f.name}** ({len(df_proc)} filas)")
+        for aviso in avisos:
+            st.warning(f"{f.name}: {aviso}")
         if not df_proc.empty:
             # opcional: agregar de qué archivo viene
             df_proc = df_proc.copy()
             df_proc["ARCHIVO_ORIGEN"] = f.name
-            todos.append(df_proc)
+            por_archivo[i] = df_proc
 
+    por_procesar = []
+    for i in range(len(archivos)):
+        guardado = buscar_resultado(claves[i]) if i in claves else None
+        if guardado is None:
+            por_procesar.append(i)
+            continue
+        hechos += len(modulos) + 1
+        terminar(i, *guardado, de_cache=True)
+
+    workers = min(MAX_WORKERS, len(por_procesar))
+    if workers == 1:
+        enrutador = construir_enrutador(modulos)
+        for i in por_procesar:
+            f = archivos[i]
+            try:
+                df_in = leer_excel(f.getvalue())
+            except Exception as e:
+                st.warning(f"No se pudo leer `{f.name}` como Excel: {e}")
+                continue
+            avanzar(i, None)
+            avisos = []
+            df_proc = procesar_df_con_modulos(
+                df_in, modulos, enrutador, lambda nombre: avanzar(i, nombre), avisos.append
+            )
+            terminar(i, df_proc, avisos)
+    elif workers > 1:
+        cola = multiprocessing.Queue()
+        scripts = [(nombre, modulo.__file__) for nombre, modulo in modulos]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=inicializar_worker, initargs=(scripts, cola)
+        ) as pool:
+            pendientes = {pool.submit(tarea_archivo, i, archivos[i].getvalue()): i for i in por_procesar}
+            while pendientes:
+                listos, _ = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+                # La barra se actualiza desde aquí: los workers no tienen sesión de Streamlit
+                while True:
+                    try:
+                        avanzar(*cola.get_nowait())
+                    except queue.Empty:
+                        break
+                for futuro in listos:
+                    i = pendientes.pop(futuro)
+                    try:
+                        df_proc, avisos, error_lectura = futuro.result()
+                    except Exception as e:
+                        st.error(f"Error procesando `{archivos[i].name}`: {e}")
+                        continue
+                    if error_lectura is not None:
+                        st.warning(f"No se pudo leer `{archivos[i].name}` como Excel: {error_lectura}")
+                        continue
+                    terminar(i, df_proc, avisos)
+
+    progreso.progress(1.0, text="✅ Archivos procesados")
+    todos = [por_archivo[i] for i in sorted(por_archivo)]
     if todos:
         return pd.concat(todos, ignore_index=True)
     else:
@@ -187,6 +302,8 @@ def main():
         st.info(f"Has subido {len(archivos)} archivo(s). "
                 f"Tu flujo habitual usa 5, pero el sistema funciona con cualquier número ≥ 1.")
 
+    formato = st.selectbox("Formato de descarga", FORMATOS_SALIDA, index=0)
+
     if st.button("🚀 Procesar archivos", type="primary"):
         if not archivos:
             st.warning("Primero debes subir al menos un archivo de Excel.")
@@ -195,10 +312,14 @@ def main():
         with st.spinner("Cargando scripts y procesando direcciones..."):
             modulos = cargar_scripts_normalizacion()
             if not modulos:
-                st.error("No se pudo cargar ningún script de normalización. Revisa los archivos .py en el repositorio.")
+                st.error(
+                    "No se pudo cargar ningún script de normalización. "
+                    "Revisa los archivos .py en el repositorio."
+                )
                 return
 
-            df_final = procesar_archivos_subidos(archivos, modulos)
+            version = version_modulos(modulos)
+            df_final = procesar_archivos_subidos(archivos, modulos, version)
 
         if df_final.empty:
             st.warning("No se generó ninguna dirección normalizada. "
@@ -220,17 +341,26 @@ def main():
         st.subheader("Vista previa de resultados")
         st.dataframe(df_final.head(200))
 
-        # ---- Generar Excel para descarga ----
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            df_final.to_excel(writer, sheet_name="NORMALIZADAS", index=False)
-        buffer.seek(0)
+        # ---- Generar archivo para descarga (escritura por lotes) ----
+        # La misma combinación de archivos y formato reutiliza el archivo ya escrito
+        partes = [f"{clave_contenido(f.getvalue(), version)}:{f.name}" for f in archivos]
+        clave_descarga = hashlib.sha256("|".join(partes + [formato]).encode()).hexdigest()
+        datos = buscar_resultado(clave_descarga)
+        if datos is None:
+            buffer = io.BytesIO()
+            try:
+                escribir_dataframe(buffer, df_final, formato, "NORMALIZADAS")
+            except ValueError as e:
+                st.error(str(e))
+                return
+            datos = buffer.getvalue()
+            guardar_resultado(clave_descarga, datos, len(datos))
 
         st.download_button(
-            label="⬇️ Descargar Excel unificado",
-            data=buffer,
-            file_name="CICLOS_PROCESADOS.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            label=f"⬇️ Descargar {formato.upper()} unificado",
+            data=datos,
+            file_name=f"CICLOS_PROCESADOS.{formato}",
+            mime=MIME_SALIDA[formato],
         )
 
 
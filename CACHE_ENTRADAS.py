@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:   # pyarrow es opcional: sin él se usa pickle
+    feather = None
+
+# ================== CACHÉ COLUMNAR DE LOS EXCEL DE ENTRADA ==================
+# Leer los .xlsx con openpyxl es lo más lento de cada corrida, y al ajustar
+# reglas se corre el mismo ciclo muchas veces. La primera lectura de cada
+# libro guarda el DataFrame ya proyectado (NIU/DIRECCION) en formato columnar
+# (Feather con pyarrow, memory-mapped al leer; si no, pickle de pandas):
+#   - <hash de la ruta>.json: tamaño, mtime y hash del contenido del libro.
+#   - <hash del contenido>.feather / .pkl: los datos.
+# Si tamaño y mtime coinciden no se vuelve a leer el libro; si cambiaron se
+# recalcula el hash del contenido, y solo si cambió se vuelve a parsear.
+# El hash incluye el código de FUENTES_DE_LECTURA: si cambia la lectura o la
+# proyección, los libros se vuelven a parsear.
+
+CARPETA_CACHE_ENTRADAS = "CACHE_ENTRADAS"
+
+# Subir si cambia lo que se guarda (p.ej. las columnas que se proyectan)
+VERSION_CACHE_ENTRADAS = "1"
+
+# Código que lee y proyecta los libros (leer_excel, es_columna_entrada, ...)
+FUENTES_DE_LECTURA = ["COMUN.py", "CACHE_ENTRADAS.py"]
+
+EXTENSION_DATOS = ".feather" if feather is not None else ".pkl"
+
+
+def version_lectura() -> str:
+    """Hash de VERSION_CACHE_ENTRADAS y del código fuente de FUENTES_DE_LECTURA."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    sha = hashlib.sha256(VERSION_CACHE_ENTRADAS.encode())
+    for ruta in [os.path.join(base_dir, f) for f in FUENTES_DE_LECTURA]:
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as fh:
+                sha.update(fh.read())
+    return sha.hexdigest()[:16]
+
+
+VERSION_LECTURA = version_lectura()
+
+
+def hash_contenido(path: str) -> str:
+    sha = hashlib.sha256(VERSION_LECTURA.encode())
+    with open(path, "rb") as fh:
+        for bloque in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(bloque)
+    return sha.hexdigest()[:24]
+
+
+def _escribir_atomico(destino: str, escribir) -> None:
+    # Los workers en paralelo pueden escribir la misma entrada: se escribe a un
+    # temporal y se reemplaza de una vez
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    try:
+        escribir(temporal)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _guardar_datos(df: pd.DataFrame, destino: str) -> None:
+    if feather is not None:
+        datos = df.reset_index(drop=True)
+        _escribir_atomico(destino, lambda t: datos.to_feather(t, compression="uncompressed"))
+    else:
+        _escribir_atomico(destino, df.to_pickle)
+
+
+def _cargar_datos(origen: str) -> pd.DataFrame:
+    if feather is not None:
+        return feather.read_table(origen, memory_map=True).to_pandas()
+    return pd.read_pickle(origen)
+
+
+def _leer_meta(ruta_meta: str):
+    if not os.path.exists(ruta_meta):
+        return None
+    with open(ruta_meta, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _guardar_meta(ruta_meta: str, meta: dict) -> None:
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False)
+    _escribir_atomico(ruta_meta, escribir)
+
+
+def leer_con_cache(path: str, leer, carpeta: str = CARPETA_CACHE_ENTRADAS) -> pd.DataFrame:
+    """
+    Devuelve leer(path) usando la caché de la carpeta indicada. Si la caché
+    no se puede usar (permisos, archivo dañado, ...) se lee el original.
+    """
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        estado = os.stat(path)
+        ruta_abs = os.path.abspath(path)
+        ruta_meta = os.path.join(carpeta, hashlib.sha256(ruta_abs.encode()).hexdigest()[:24] + ".json")
+        meta = _leer_meta(ruta_meta)
+
+        if (
+            meta
+            and meta["tamano"] == estado.st_size
+            and meta["mtime_ns"] == estado.st_mtime_ns
+            and meta.get("version") == VERSION_LECTURA
+        ):
+            contenido = meta["contenido"]
+        else:
+            contenido = hash_contenido(path)
+            meta = {
+                "ruta": ruta_abs,
+                "tamano": estado.st_size,
+                "mtime_ns": estado.st_mtime_ns,
+                "contenido": contenido,
+                "version": VERSION_LECTURA,
+            }
+            _guardar_meta(ruta_meta, meta)
+
+        ruta_datos = os.path.join(carpeta, contenido + EXTENSION_DATOS)
+    except Exception as e:
+        print(f"   ⚠️ Caché de entradas no disponible para {os.path.basename(path)}: {e}")
+        return leer(path)
+
+    if os.path.exists(ruta_datos):
+        try:
+            return _cargar_datos(ruta_datos)
+        except Exception as e:
+            # Archivo de caché dañado: se vuelve a generar desde el libro
+            print(f"   ⚠️ Caché de entradas dañada para {os.path.basename(path)} ({e}); se regenera")
+
+    df = leer(path)
+    try:
+        _guardar_datos(df, ruta_datos)
+    except Exception as e:
+        print(f"   ⚠️ No se pudo guardar {os.path.basename(path)} en la caché de entradas: {e}")
+    return df
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+
+# ================== CACHÉ PERSISTENTE DE NORMALIZACIÓN ==================
+# Los clientes se repiten ciclo tras ciclo (25, 29, 47, 49, 53) y sus
+# direcciones casi no cambian. Cada normalización se guarda en SQLite con
+# la clave (módulo, hash del .py del módulo, DIRECCION cruda) y el valor
+# (DIRECCION_NORMALIZADA, VALIDACION). Si el .py cambia, cambia el hash: las
+# entradas viejas dejan de coincidir y se purgan al abrir el módulo.
+
+ARCHIVO_CACHE = "CACHE_NORMALIZACION.sqlite"
+
+# Máximo de parámetros por consulta IN (...) (límite de SQLite)
+LOTE_CONSULTA = 900
+
+# Código compartido del que depende la salida de los módulos (contrato,
+# cascadas y limpiezas de COMUN, enrutamiento, patrones comunes): entra en la
+# versión de cada módulo, así un cambio en él también invalida sus entradas
+FUENTES_DE_MODULOS = ["COMUN.py", "ENRUTADOR.py", "PATRONES.py"]
+
+
+def abrir_cache(ruta: str) -> sqlite3.Connection:
+    conexion = sqlite3.connect(ruta, timeout=60)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.execute(
+        """
+        CREATE TABLE IF NOT EXISTS normalizaciones (
+            modulo TEXT NOT NULL,
+            version TEXT NOT NULL,
+            direccion TEXT NOT NULL,
+            direccion_normalizada TEXT,
+            validacion TEXT,
+            PRIMARY KEY (modulo, version, direccion)
+        ) WITHOUT ROWID
+        """
+    )
+    conexion.commit()
+    return conexion
+
+
+def version_modulo(modulo) -> str:
+    """Hash del código fuente del módulo (su archivo .py) y de FUENTES_DE_MODULOS."""
+    base_dir = os.path.dirname(os.path.abspath(modulo.__file__))
+    sha = hashlib.sha256()
+    for ruta in [modulo.__file__] + [os.path.join(base_dir, f) for f in FUENTES_DE_MODULOS]:
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as fh:
+                sha.update(fh.read())
+    return sha.hexdigest()[:16]
+
+
+def cache_de_modulo(conexion: sqlite3.Connection, nombre: str, modulo, purgar: bool = True) -> dict:
+    """
+    Prepara la caché de un módulo cargado y purga las entradas de versiones
+    anteriores de su código (los workers en paralelo no purgan: ya lo hizo
+    el proceso principal).
+    """
+    version = version_modulo(modulo)
+    if purgar:
+        conexion.execute(
+            "DELETE FROM normalizaciones "
+            "WHERE (modulo = ? OR substr(modulo, 1, ?) = ?) AND version != ?",
+            (nombre, len(nombre) + 1, nombre + "/", version),
+        )
+        conexion.commit()
+    return {"conexion": conexion, "modulo": nombre, "version": version, "aciertos": 0, "nuevas": 0}
+
+
+def _clave_modulo(cache: dict, bloque_nombre) -> str:
+    # MAIN tiene dos normalizadores (MERCAR / NUEVO ARMENIA): uno por bloque
+    if bloque_nombre:
+        return f"{cache['modulo']}/{bloque_nombre}"
+    return cache["modulo"]
+
+
+def buscar_en_cache(cache: dict, bloque_nombre, direcciones) -> dict:
+    """Devuelve {direccion: (DIRECCION_NORMALIZADA, VALIDACION)} de las que ya estaban."""
+    modulo = _clave_modulo(cache, bloque_nombre)
+    conexion = cache["conexion"]
+    encontradas = {}
+    for i in range(0, len(direcciones), LOTE_CONSULTA):
+        lote = direcciones[i:i + LOTE_CONSULTA]
+        marcas = ",".join("?" * len(lote))
+        filas = conexion.execute(
+            "SELECT direccion, direccion_normalizada, validacion FROM normalizaciones "
+            f"WHERE modulo = ? AND version = ? AND direccion IN ({marcas})",
+            (modulo, cache["version"], *lote),
+        )
+        for direccion, normalizada, validacion in filas:
+            encontradas[direccion] = (normalizada, validacion)
+    cache["aciertos"] += len(encontradas)
+    return encontradas
+
+
+def guardar_en_cache(cache: dict, bloque_nombre, resultados: dict) -> None:
+    """Guarda {direccion: (DIRECCION_NORMALIZADA, VALIDACION)} (solo valores de texto)."""
+    modulo = _clave_modulo(cache, bloque_nombre)
+    filas = [
+        (modulo, cache["version"], direccion, normalizada, validacion)
+        for direccion, (normalizada, validacion) in resultados.items()
+        if isinstance(normalizada, str) and isinstance(validacion, str)
+    ]
+    if not filas:
+        return
+    conexion = cache["conexion"]
+    conexion.executemany(
+        "INSERT OR REPLACE INTO normalizaciones "
+        "(modulo, version, direccion, direccion_normalizada, validacion) VALUES (?, ?, ?, ?, ?)",
+        filas,
+    )
+    conexion.commit()
+    cache["nuevas"] += len(filas)
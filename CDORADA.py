@@ -1,6 +1,8 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
 
 # ============================================================
 #  Utilidades comunes
@@ -132,6 +134,16 @@ def aplicar_normalizacion(direccion: str):
 #  Función estándar para el script maestro
 # ============================================================
 
+# Vocabulario del filtro DORADA / COOP (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["DORADA", "COOP", "COOPERAT"]
+
+# Filas que reclama este módulo: el mismo vocabulario (regex sobre DIRECCION, sin distinguir mayúsculas)
+FILTRO = "|".join(VOCABULARIO_FILTRO)
+
+# Normalizador puro por dirección -> (DIRECCION_NORMALIZADA, VALIDACION)
+normalizar_direccion = aplicar_normalizacion
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -145,76 +157,39 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     con columnas:
       NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
     """
-    df = df_in.copy()
-
-    # Normalizar nombres de columnas
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar columna NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar columna DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar normalización
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(aplicar_normalizacion(x))
-    )
-
-    # Filtro de interés: DORADA / COOP / COOPERATIVO
-    filtro = df["DIRECCION"].str.contains(
-        r"DORADA|COOP|COOPERAT",
-        case=False,
-        na=False,
-    )
-    df_filtrado = df[filtro].copy()
-
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
-
-    return df_filtrado[columnas_salida]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 
 # ============================================================
 #  Ejecución individual opcional
 # ============================================================
 
-if __name__ == "__main__":
-    # Igual que en tu script original: trabaja sobre CICLO 49_PDIRECCION.xlsx
-    ruta_entrada = "CICLO 49_PDIRECCION.xlsx"
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
+# Igual que en tu script original: trabaja sobre CICLO 49_PDIRECCION.xlsx
+RUTA_ENTRADA = "CICLO 49_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+# Una sola hoja de salida (puedes cambiarle el nombre si prefieres)
+HOJA_SALIDA = "CDORADA_COOP"
 
+
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Leer archivo de entrada
-    df_local = pd.read_excel(ruta_entrada, usecols=["CLIENTE_ID", "DIRECCION"])
+    df_local = pd.read_excel(RUTA_ENTRADA, usecols=["CLIENTE_ID", "DIRECCION"])
 
     # Procesar
     df_resultado = procesar(df_local)
 
-    # Guardar en una sola hoja de salida (puedes cambiarle el nombre si prefieres)
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado.to_excel(writer, sheet_name="CDORADA_COOP", index=False)
-
     # Estadísticas globales
     total = df_resultado.shape[0]
     normalizadas = df_resultado[df_resultado["VALIDACION"] == "1"].shape[0]
     efectividad_global = (normalizadas * 100) / total if total else 0
 
-    print(f"✅ Archivo procesado y guardado como {ruta_salida}")
     print(f"📦 Total direcciones intentadas: {total}")
     print(f"✔️ Direcciones normalizadas correctamente: {normalizadas}")
     print(f"📈 Efectividad global: {round(efectividad_global, 2)}%")
+    return {HOJA_SALIDA: df_resultado}
+
+
+if __name__ == "__main__":
+    guardar_hojas(RUTA_SALIDA, hojas_script())
+    print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
@@ -1,6 +1,9 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
+from PATRONES import ROMANOS
 
 # ================== Configuración por defecto (modo script) ==================
 RUTA_ENTRADA = "CICLO 49_PDIRECCION.xlsx"
@@ -11,11 +14,9 @@ COL_DIR      = "DIRECCION"
 # Palabras clave para filtrar las direcciones de interés
 PALABRAS_CLAVE = ["cecilia", "ceciclia", "ecilia", "villa yolanda", "koa"]
 
-# ================== Diccionario romanos ==================
-romanos_a_numeros = {
-    "I": "1", "II": "2", "III": "3", "IV": "4", "V": "5",
-    "VI": "6", "VII": "7", "VIII": "8", "IX": "9", "X": "10"
-}
+# Vocabulario para el enrutador del orquestador (mismo filtro)
+VOCABULARIO_FILTRO = PALABRAS_CLAVE
+FILTRO = "|".join(PALABRAS_CLAVE)
 
 # ================== Patrones principales ==================
 
@@ -107,7 +108,7 @@ def normalizar_direccion_cecilia(direccion: str) -> str:
         piso    = match.group(6) or ""
 
         # Convertir romanos
-        etapa = romanos_a_numeros.get(etapa, etapa)
+        etapa = ROMANOS.get(etapa, etapa)
 
         # Determinar barrio
         if ("BOSQUES" in sector) or ("BQ" in sector) or ("BQUES" in sector) or ("UES" in sector):
@@ -138,6 +139,15 @@ def cumple_estandar(direccion: str) -> int:
 
 # ================== Función pública para el pipeline ==================
 
+def normalizar_direccion(direccion: str):
+    """
+    Normalizador puro del contrato: devuelve
+    (DIRECCION_NORMALIZADA, VALIDACION) para una dirección.
+    """
+    normalizada = normalizar_direccion_cecilia(direccion)
+    return normalizada, "1" if cumple_estandar(normalizada) == 1 else "0"
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Espera un DataFrame con al menos:
@@ -150,40 +160,12 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     Solo se devuelven filas cuyas DIRECCION contienen
     alguna palabra en PALABRAS_CLAVE (cecilia, villa yolanda, koa, etc.)
     """
-    if COL_DIR not in df_in.columns:
-        raise ValueError("El DataFrame de entrada debe contener la columna 'DIRECCION'.")
-
-    df = df_in.copy()
-
-    # Asegurar columna de identificador NIU
-    if "NIU" in df.columns:
-        id_col = "NIU"
-    elif "CLIENTE_ID" in df.columns:
-        id_col = "CLIENTE_ID"
-    else:
-        raise ValueError("No se encontró columna 'NIU' ni 'CLIENTE_ID' en el DataFrame de entrada.")
-
-    df = df[[id_col, COL_DIR]].copy()
-    df.rename(columns={id_col: "NIU", COL_DIR: "DIRECCION"}, inplace=True)
-
-    # Normalización
-    df["DIRECCION_NORMALIZADA"] = df["DIRECCION"].apply(normalizar_direccion_cecilia)
-
-    # Validación usando el regex_estandar
-    df["VALIDACION"] = df["DIRECCION_NORMALIZADA"].apply(
-        lambda x: "1" if cumple_estandar(x) == 1 else "0"
-    )
-
-    # Filtro por palabras clave (como en el script original)
-    patron = "|".join(PALABRAS_CLAVE)
-    mask = df["DIRECCION"].astype(str).str.contains(patron, case=False, na=False)
-    df_filtrado = df[mask].copy()
-
-    return df_filtrado[["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 # ================== Modo script standalone ==================
 
-if __name__ == "__main__":
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Carga
     df_in = pd.read_excel(RUTA_ENTRADA, dtype=str)
 
@@ -195,13 +177,15 @@ if __name__ == "__main__":
     normalizadas = (df_out["VALIDACION"] == "1").sum()
     efectividad = (normalizadas * 100 / total) if total > 0 else 0
 
+    print(f"🔍 Total de direcciones filtradas: {total}")
+    print(f"📊 Direcciones que cumplen el estándar: {normalizadas}")
+    print(f"📈 La efectividad es: {round(efectividad, 2)}%")
+    return {HOJA_SALIDA: df_out}
+
+
+if __name__ == "__main__":
     # Guardado (adjunta si ya existe)
-    modo = "a" if os.path.exists(RUTA_SALIDA) else "w"
-    with pd.ExcelWriter(RUTA_SALIDA, engine="openpyxl", mode=modo) as writer:
-        df_out.to_excel(writer, sheet_name=HOJA_SALIDA, index=False)
+    guardar_hojas(RUTA_SALIDA, hojas_script())
 
     print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
-    print(f"📄 Hoja: {HOJA_SALIDA}")
-    print(f"🔍 Total de direcciones filtradas: {total}")
-    print(f"📊 Direcciones que cumplen el estándar: {normalizadas}")
-    print(f"📈 La efectividad es: {round(efectividad, 2)}%")
\ No newline at end of file
+    print(f"📄 Hoja: {HOJA_SALIDA}")
\ No newline at end of file
@@ -1,6 +1,8 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
 
 # ---------------------- CIBELES ----------------------
 regex_cibeles = re.compile(
@@ -161,6 +163,16 @@ def aplicar_normalizacion(direccion):
 
 # ---------------------- Función estándar para el maestro ----------------------
 
+# Vocabulario del filtro CIBELES / LILIANA (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["CIBELES", "CRA 40 CL 51 -41", "LILIANA", "BOSQUES"]
+
+# Filas que reclama este módulo: el mismo vocabulario (regex sobre DIRECCION, sin distinguir mayúsculas)
+FILTRO = "|".join(VOCABULARIO_FILTRO)
+
+# Normalizador puro por dirección -> (DIRECCION_NORMALIZADA, VALIDACION)
+normalizar_direccion = aplicar_normalizacion
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -175,62 +187,22 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     con columnas:
       NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
     """
-    df = df_in.copy()
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar columna NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar columna DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar normalización
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(aplicar_normalizacion(x))
-    )
-
-    # Mismo filtro que el script original
-    filtro = df["DIRECCION"].str.contains(
-        "CIBELES|CRA 40 CL 51 -41|LILIANA|BOSQUES",
-        case=False,
-        na=False,
-    )
-    df_filtrado = df[filtro].copy()
-
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
-
-    return df_filtrado[columnas_salida]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 
 # ---------------------- Ejecución individual opcional ----------------------
 
-if __name__ == "__main__":
-    ruta_entrada = "CICLO 47_PDIRECCION.xlsx"
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
+RUTA_ENTRADA = "CICLO 47_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+HOJA_SALIDA = "CIBELES_LILIANA"
 
+
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Igual que antes: CLIENTE_ID → NIU
-    df_local = pd.read_excel(ruta_entrada, usecols=["CLIENTE_ID", "DIRECCION"])
+    df_local = pd.read_excel(RUTA_ENTRADA, usecols=["CLIENTE_ID", "DIRECCION"])
     df_resultado = procesar(df_local)
 
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado.to_excel(writer, sheet_name="CIBELES_LILIANA", index=False)
-
     total = df_resultado.shape[0]
     normalizadas = df_resultado[df_resultado["VALIDACION"] == "1"].shape[0]
     efectividad = (normalizadas / total * 100) if total > 0 else 0
@@ -238,3 +210,8 @@ if __name__ == "__main__":
     print(f"Total direcciones procesadas: {total}")
     print(f"Direcciones normalizadas correctamente: {normalizadas}")
     print(f"Efectividad: {efectividad:.2f}%")
+    return {HOJA_SALIDA: df_resultado}
+
+
+if __name__ == "__main__":
+    guardar_hojas(RUTA_SALIDA, hojas_script())
@@ -1,17 +1,14 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
+from PATRONES import ROMANOS
 
 # ============================================================
 #    Utilidades comunes
 # ============================================================
 
-romanos = {
-    "I": 1, "II": 2, "III": 3, "IV": 4, "V": 5, "VI": 6,
-    "VII": 7, "VIII": 8, "IX": 9, "X": 10
-}
-
-
 def etapa_a_numero(etapa):
     if etapa is None:
         return None
@@ -24,7 +21,7 @@ def etapa_a_numero(etapa):
         .strip()
         .upper()
     )
-    return str(romanos.get(etapa, etapa))
+    return str(ROMANOS.get(etapa, etapa))
 
 
 # ============================================================
@@ -281,6 +278,16 @@ def aplicar_normalizacion(direccion):
 #    FUNCIÓN ESTÁNDAR PARA EL SCRIPT MAESTRO
 # ============================================================
 
+# Vocabulario del filtro de barrios (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["COLINAS", "ADIELA", "ESMERALDA", "7 DE AGOSTO", "UNION", "GRECIA"]
+
+# Filas que reclama este módulo: el mismo vocabulario (regex sobre DIRECCION, sin distinguir mayúsculas)
+FILTRO = "|".join(VOCABULARIO_FILTRO)
+
+# Normalizador puro por dirección -> (DIRECCION_NORMALIZADA, VALIDACION)
+normalizar_direccion = aplicar_normalizacion
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -298,62 +305,22 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     con columnas:
       NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
     """
-    df = df_in.copy()
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar normalización
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(aplicar_normalizacion(x))
-    )
-
-    # Filtrar solo estos barrios
-    filtro = df["DIRECCION"].str.contains(
-        "COLINAS|ADIELA|ESMERALDA|7 DE AGOSTO|UNION|GRECIA",
-        case=False,
-        na=False,
-    )
-    df_filtrado = df[filtro].copy()
-
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
-
-    return df_filtrado[columnas_salida]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 
 # ============================================================
 #    EJECUCIÓN INDIVIDUAL OPCIONAL
 # ============================================================
 
-if __name__ == "__main__":
-    ruta_entrada = "CICLO 47_PDIRECCION.xlsx"
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
+RUTA_ENTRADA = "CICLO 47_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+HOJA_SALIDA = "NORMALIZADAS"
 
-    df_local = pd.read_excel(ruta_entrada, usecols=["CLIENTE_ID", "DIRECCION"], engine="openpyxl")
-    df_resultado = procesar(df_local)
 
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado.to_excel(writer, sheet_name="NORMALIZADAS", index=False)
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
+    df_local = pd.read_excel(RUTA_ENTRADA, usecols=["CLIENTE_ID", "DIRECCION"], engine="openpyxl")
+    df_resultado = procesar(df_local)
 
     total_direcciones = df_resultado.shape[0]
     normalizadas = df_resultado[df_resultado["VALIDACION"] == "1"].shape[0]
@@ -362,3 +329,8 @@ if __name__ == "__main__":
     print(f"Total direcciones procesadas: {total_direcciones}")
     print(f"Direcciones normalizadas correctamente: {normalizadas}")
     print(f"Efectividad: {efec:.2f}%")
+    return {HOJA_SALIDA: df_resultado}
+
+
+if __name__ == "__main__":
+    guardar_hojas(RUTA_SALIDA, hojas_script())
@@ -0,0 +1,690 @@
+import codecs
+import csv
+import io
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from CACHE_NORMALIZACION import buscar_en_cache, guardar_en_cache
+
+try:
+    TEXTO_ARROW = pd.StringDtype("pyarrow")
+except ImportError:   # pyarrow es opcional: sin él el texto queda como está
+    TEXTO_ARROW = None
+
+# ================== CONTRATO DE LOS MÓDULOS DE NORMALIZACIÓN ==================
+# Cada módulo de barrio exporta:
+#   - FILTRO: regex (sin distinguir mayúsculas) sobre DIRECCION con las filas
+#     que el módulo reclama.
+#   - normalizar_direccion(direccion) -> (DIRECCION_NORMALIZADA, VALIDACION):
+#     función pura de la cadena; no depende de las demás filas.
+#   - FILTRO_SALIDA (opcional): regex que debe cumplir DIRECCION_NORMALIZADA
+#     para conservar la fila (p.ej. ISABELLA).
+#   - finalizar(df) (opcional): reglas que necesitan ver TODAS las filas
+#     reclamadas del archivo (p.ej. anti-duplicados de CENTROCLL/CHAMBRANA).
+#   - retener(df) (opcional, con finalizar): máscara de las filas que
+#     finalizar() podría cambiar. Al leer por bloques (streaming) solo esas
+#     se guardan hasta el final del archivo; sin retener se guardan todas.
+#   - procesar(df): envoltorio de compatibilidad, que usa procesar_por_contrato.
+#
+# Los módulos con varios filtros independientes (MAIN: MERCAR + NUEVO ARMENIA)
+# exportan en su lugar BLOQUES, una lista de bloque(...).
+#
+# Con esto el orquestador puede filtrar, agrupar, cachear o paralelizar las
+# filas en nombre de cualquier módulo sin ejecutar su procesar().
+#
+# Como los normalizadores son puros, se trabaja sobre las DIRECCIONES ÚNICAS:
+# la columna DIRECCION se factoriza una vez (codigos por fila + únicas), el
+# filtro y el normalizador corren una vez por cadena y el resultado se
+# reparte de vuelta a las filas por código.
+
+COLUMNAS_SALIDA = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
+
+# Encabezados aceptados (en mayúsculas; en DIRECCION se ignoran los espacios)
+NOMBRES_NIU = ("NIU", "CLIENTE_ID")
+NOMBRES_DIRECCION = ("DIRECCION", "DIRECCIÓN", "DIR")
+
+# Lectura de CSV: bytes del inicio que se miran para detectar separador y decimal
+MUESTRA_CSV = 64 * 1024
+SEPARADORES_CSV = (";", ",", "\t", "|")
+
+
+def bloque(filtro, normalizar, filtro_salida=None, finalizar=None, nombre=None, retener=None) -> dict:
+    return {
+        "nombre": nombre,
+        "filtro": filtro,
+        "normalizar": normalizar,
+        "filtro_salida": filtro_salida,
+        "finalizar": finalizar,
+        "retener": retener,
+    }
+
+
+def bloques_de(modulo):
+    """
+    Devuelve la lista de bloques que declara un módulo cargado, o None si
+    el módulo solo ofrece procesar(df) (módulos antiguos).
+    """
+    bloques = getattr(modulo, "BLOQUES", None)
+    if bloques:
+        return list(bloques)
+    filtro = getattr(modulo, "FILTRO", None)
+    normalizar = getattr(modulo, "normalizar_direccion", None)
+    if filtro is None or normalizar is None:
+        return None
+    return [
+        bloque(
+            filtro,
+            normalizar,
+            filtro_salida=getattr(modulo, "FILTRO_SALIDA", None),
+            finalizar=getattr(modulo, "finalizar", None),
+            retener=getattr(modulo, "retener", None),
+        )
+    ]
+
+
+def es_columna_entrada(columna) -> bool:
+    """
+    usecols de los lectores de archivos: deja solo las columnas candidatas a
+    NIU/CLIENTE_ID y DIRECCION (sin importar mayúsculas/espacios), para no
+    convertir a texto las otras columnas de los ciclos (ZONA, BARRIO, ...).
+    """
+    up = str(columna).upper().strip()
+    return up in NOMBRES_NIU or up.replace(" ", "") in NOMBRES_DIRECCION
+
+
+def columnas_entrada(columnas):
+    """Devuelve los nombres reales (col_niu, col_dir); None si falta alguna."""
+    columnas = list(columnas)
+    cols_upper = {c: str(c).upper().strip() for c in columnas}
+
+    if "NIU" in columnas:
+        col_niu = "NIU"
+    else:
+        col_niu = next((c for c, up in cols_upper.items() if up in NOMBRES_NIU), None)
+
+    if "DIRECCION" in columnas:
+        col_dir = "DIRECCION"
+    else:
+        col_dir = next(
+            (c for c, up in cols_upper.items() if up.replace(" ", "") in NOMBRES_DIRECCION),
+            None,
+        )
+    return col_niu, col_dir
+
+
+def codificacion_csv(bloques) -> str:
+    """
+    Codificación (utf-8-sig / utf-8 / latin-1) de un CSV recorrido como una
+    secuencia de bloques de bytes, sin tenerlo completo en memoria.
+    """
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    encoding = "utf-8"
+    try:
+        for k, datos in enumerate(bloques):
+            if k == 0 and datos.startswith(codecs.BOM_UTF8):
+                encoding = "utf-8-sig"
+            decodificador.decode(datos)
+        decodificador.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return encoding
+
+
+def detectar_dialecto_csv(datos: bytes, encoding=None) -> dict:
+    """
+    Detecta codificación (utf-8 / latin-1), separador, coma decimal
+    (p.ej. 6,3001E+29) y encabezado de un CSV ya cargado en memoria. El
+    separador y la coma decimal salen solo de los primeros MUESTRA_CSV bytes;
+    la codificación se valida sobre todo el contenido (los ciclos suelen
+    tener el primer acento muy lejos del encabezado), salvo que ya se conozca.
+    """
+    if encoding is None:
+        encoding = codificacion_csv([datos])
+
+    lineas = datos[:MUESTRA_CSV].decode(encoding, errors="ignore").splitlines()
+    encabezado = lineas[0] if lineas else ""
+    # En empate gana el primero (';', el de los ciclos)
+    sep = max(SEPARADORES_CSV, key=encabezado.count)
+    columnas = next(csv.reader([encabezado], delimiter=sep), [])
+    decimal = "," if sep != "," and re.search(r"\d,\d", "\n".join(lineas[1:])) else "."
+    return {"encoding": encoding, "sep": sep, "decimal": decimal, "columnas": columnas}
+
+
+def leer_excel(origen) -> pd.DataFrame:
+    """
+    Lee un Excel (ruta, archivo abierto o bytes ya en memoria, p.ej. de un
+    .zip o de una carga en la APP) con solo las columnas de es_columna_entrada,
+    como texto.
+    """
+    if isinstance(origen, bytes):
+        origen = io.BytesIO(origen)
+    return pd.read_excel(origen, dtype=str, usecols=es_columna_entrada)
+
+
+def leer_csv(origen, usecols=es_columna_entrada) -> pd.DataFrame:
+    """
+    Lee un CSV (ruta, o bytes ya en memoria p.ej. de un .zip) una sola vez
+    del disco y lo parsea una sola vez con el motor C, con el dialecto de
+    detectar_dialecto_csv() y dtypes explícitos (texto) para las columnas
+    que deja usecols.
+    """
+    if isinstance(origen, bytes):
+        datos = origen
+    else:
+        with open(origen, "rb") as fh:
+            datos = fh.read()
+    dialecto = detectar_dialecto_csv(datos)
+    columnas = [c for c in dialecto["columnas"] if usecols is None or usecols(c)]
+    return pd.read_csv(
+        io.BytesIO(datos),
+        encoding=dialecto["encoding"],
+        sep=dialecto["sep"],
+        decimal=dialecto["decimal"],
+        engine="c",
+        usecols=columnas,
+        dtype=dict.fromkeys(columnas, str),
+    )
+
+
+def leer_csv_por_bloques(abrir, filas: int, usecols=es_columna_entrada):
+    """
+    Versión en streaming de leer_csv(): abrir() devuelve cada vez un archivo
+    binario nuevo (ruta en disco o miembro de un .zip). Se recorre una vez
+    por bloques para validar la codificación y luego se entrega un DataFrame
+    de hasta `filas` filas a la vez, así que la memoria depende del tamaño
+    del bloque y no del archivo.
+    """
+    with abrir() as fh:
+        encoding = codificacion_csv(iter(lambda: fh.read(1 << 20), b""))
+    with abrir() as fh:
+        dialecto = detectar_dialecto_csv(fh.read(MUESTRA_CSV), encoding)
+    columnas = [c for c in dialecto["columnas"] if usecols is None or usecols(c)]
+    with abrir() as fh, pd.read_csv(
+        fh,
+        encoding=encoding,
+        sep=dialecto["sep"],
+        decimal=dialecto["decimal"],
+        engine="c",
+        usecols=columnas,
+        dtype=dict.fromkeys(columnas, str),
+        chunksize=filas,
+    ) as lector:
+        yield from lector
+
+
+def preparar_entrada(df_in: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resuelve las columnas NIU (o CLIENTE_ID) y DIRECCION sin importar
+    mayúsculas/espacios y devuelve un DataFrame con solo esas dos columnas.
+    """
+    col_niu, col_dir = columnas_entrada(df_in.columns)
+    if col_niu is None:
+        raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
+    if col_dir is None:
+        raise ValueError("El DataFrame no tiene columna DIRECCION.")
+
+    df = df_in[[col_niu, col_dir]].copy()
+    df.columns = ["NIU", "DIRECCION"]
+    return df
+
+
+def factorizar_direcciones(df: pd.DataFrame):
+    """
+    Devuelve (codigos, unicas): el código de cada fila (-1 para vacíos/NaN)
+    y la Serie de direcciones únicas en orden de aparición.
+    """
+    codigos, unicas = pd.factorize(df["DIRECCION"])
+    return codigos, pd.Series(unicas, dtype=object)
+
+
+# ================== ALMACENAMIENTO COMPACTO (opcional) ==================
+# Con dtype=str cada celda de texto es un objeto de Python. compactar() pasa
+# NIU/DIRECCION/DIRECCION_NORMALIZADA a arrays de Arrow (un buffer contiguo
+# por columna, concatenación barata) y VALIDACION a categórica "0"/"1"
+# (códigos de 1 byte). Los valores no cambian, así que la salida escrita es
+# la misma; solo baja la memoria de los resultados que se van acumulando.
+
+COLUMNAS_TEXTO = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA"]
+TIPO_VALIDACION = pd.CategoricalDtype(["0", "1"])
+
+
+def compactar(df: pd.DataFrame) -> pd.DataFrame:
+    cambios = {}
+    if TEXTO_ARROW is not None:
+        for col in COLUMNAS_TEXTO:
+            if col in df.columns:
+                cambios[col] = df[col].astype(TEXTO_ARROW)
+    if "VALIDACION" in df.columns and df["VALIDACION"].isin(TIPO_VALIDACION.categories).all():
+        cambios["VALIDACION"] = df["VALIDACION"].astype(TIPO_VALIDACION)
+    return df.assign(**cambios)
+
+
+def a_filas(mascara_unicas, codigos) -> np.ndarray:
+    """Reparte una máscara sobre direcciones únicas a las filas (código -1 -> False)."""
+    return np.append(np.asarray(mascara_unicas, dtype=bool), False)[codigos]
+
+
+def mascara_filtro(unicas: pd.Series, bq: dict) -> np.ndarray:
+    if unicas.empty:
+        return np.zeros(0, dtype=bool)
+    return unicas.str.contains(bq["filtro"], case=False, na=False).to_numpy(dtype=bool)
+
+
+def columnas_resultado(valores, normalizar):
+    """
+    Reemplazo compartido de .apply(lambda x: pd.Series(normalizar(x))):
+    llama normalizar(valor) -> (DIRECCION_NORMALIZADA, VALIDACION) sobre una
+    lista, desempaca las tuplas una sola vez y devuelve dos arreglos object.
+    """
+    resultados = [normalizar(v) for v in valores]
+    normalizadas = np.empty(len(resultados), dtype=object)
+    validaciones = np.empty(len(resultados), dtype=object)
+    normalizadas[:] = [r[0] for r in resultados]
+    validaciones[:] = [r[1] for r in resultados]
+    return normalizadas, validaciones
+
+
+def normalizar_unicas(unicas: pd.Series, indices, bq: dict, cache=None):
+    """
+    Normaliza las direcciones únicas indicadas por sus posiciones y devuelve
+    dos arreglos (DIRECCION_NORMALIZADA, VALIDACION) del largo de unicas.
+    Con cache (ver CACHE_NORMALIZACION) solo se calculan las que no estaban.
+    """
+    indices = np.asarray(indices, dtype=np.intp)
+    valores = unicas.iloc[indices].tolist()
+    normalizadas = np.empty(len(unicas), dtype=object)
+    validaciones = np.empty(len(unicas), dtype=object)
+
+    faltan = range(len(valores))
+    if cache is not None:
+        conocidas = buscar_en_cache(cache, bq["nombre"], [d for d in valores if isinstance(d, str)])
+        faltan = []
+        for k, direccion in enumerate(valores):
+            resultado = conocidas.get(direccion) if isinstance(direccion, str) else None
+            if resultado is None:
+                faltan.append(k)
+            else:
+                normalizadas[indices[k]], validaciones[indices[k]] = resultado
+
+    faltan = np.asarray(faltan, dtype=np.intp)
+    por_calcular = [valores[k] for k in faltan]
+    nuevas_norm, nuevas_val = columnas_resultado(por_calcular, bq["normalizar"])
+    normalizadas[indices[faltan]] = nuevas_norm
+    validaciones[indices[faltan]] = nuevas_val
+
+    if cache is not None:
+        nuevas = {
+            d: (n, v)
+            for d, n, v in zip(por_calcular, nuevas_norm, nuevas_val)
+            if isinstance(d, str)
+        }
+        if nuevas:
+            guardar_en_cache(cache, bq["nombre"], nuevas)
+    return normalizadas, validaciones
+
+
+def normalizar_bloque(unicas: pd.Series, bq: dict, candidatas=None, cache=None):
+    """
+    Fase por dirección de un bloque: FILTRO y normalizador sobre las
+    direcciones únicas (candidatas, opcional, restringe las que se evalúan,
+    p.ej. las del enrutador). No depende de otras direcciones, así que puede
+    correr por fragmentos contiguos de unicas y concatenarse en orden.
+    Devuelve (reclamadas, normalizadas, validaciones), todos del largo de unicas.
+    """
+    if candidatas is None:
+        reclamadas = mascara_filtro(unicas, bq)
+    else:
+        reclamadas = np.zeros(len(unicas), dtype=bool)
+        posiciones = np.flatnonzero(candidatas)
+        if len(posiciones):
+            reclamadas[posiciones] = mascara_filtro(unicas.iloc[posiciones], bq)
+    normalizadas, validaciones = normalizar_unicas(unicas, np.flatnonzero(reclamadas), bq, cache)
+    return reclamadas, normalizadas, validaciones
+
+
+def armar_bloque(
+    df: pd.DataFrame, bq: dict, codigos, reclamadas, normalizadas, validaciones, finalizar=True
+) -> pd.DataFrame:
+    """
+    Fase de archivo completo de un bloque: reparte el resultado de las únicas
+    a las filas y aplica FILTRO_SALIDA y finalizar() si el bloque los declara
+    (finalizar=False lo deja pendiente, p.ej. al leer por bloques).
+    """
+    filas = a_filas(reclamadas, codigos)
+    if not filas.any():
+        return pd.DataFrame(columns=COLUMNAS_SALIDA)
+
+    df_filtrado = df[filas].copy()
+    codigos_filtrado = codigos[filas]
+    df_filtrado["DIRECCION_NORMALIZADA"] = normalizadas[codigos_filtrado]
+    df_filtrado["VALIDACION"] = validaciones[codigos_filtrado]
+    return completar_bloque(df_filtrado, bq, finalizar)
+
+
+def aplicar_bloque(df: pd.DataFrame, bq: dict, codigos, unicas, candidatas=None, cache=None) -> pd.DataFrame:
+    """Filtra, normaliza (una vez por dirección única) y arma un bloque."""
+    return armar_bloque(df, bq, codigos, *normalizar_bloque(unicas, bq, candidatas, cache))
+
+
+def completar_bloque(df_filtrado: pd.DataFrame, bq: dict, finalizar=True) -> pd.DataFrame:
+    """Pasos posteriores a la normalización: FILTRO_SALIDA y finalizar()."""
+    if bq["filtro_salida"] is not None:
+        mask = df_filtrado["DIRECCION_NORMALIZADA"].astype(str).str.match(
+            bq["filtro_salida"], case=False, na=False
+        )
+        df_filtrado = df_filtrado[mask].copy()
+    if finalizar and bq["finalizar"] is not None and not df_filtrado.empty:
+        df_filtrado = bq["finalizar"](df_filtrado)
+    return df_filtrado[COLUMNAS_SALIDA]
+
+
+def procesar_unicas(df: pd.DataFrame, codigos, unicas, bloques, candidatas=None, cache=None) -> pd.DataFrame:
+    """
+    Aplica cada bloque sobre un DataFrame ya preparado y factorizado y
+    concatena en orden. Con un solo bloque se conserva el índice original.
+    """
+    partes = [aplicar_bloque(df, bq, codigos, unicas, candidatas, cache) for bq in bloques]
+    return unir_bloques(partes, len(bloques))
+
+
+def unir_bloques(partes, n_bloques: int) -> pd.DataFrame:
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_SALIDA)
+    return pd.concat(partes, ignore_index=n_bloques > 1)
+
+
+def procesar_bloques(df_in: pd.DataFrame, bloques) -> pd.DataFrame:
+    """procesar(df) genérico para los módulos del contrato."""
+    df = preparar_entrada(df_in)
+    codigos, unicas = factorizar_direcciones(df)
+    return procesar_unicas(df, codigos, unicas, bloques)
+
+
+def procesar_por_contrato(
+    df_in: pd.DataFrame,
+    filtro,
+    normalizar,
+    filtro_salida=None,
+    finalizar=None,
+) -> pd.DataFrame:
+    """Atajo de procesar_bloques() para los módulos de un solo bloque."""
+    return procesar_bloques(
+        df_in,
+        [bloque(filtro, normalizar, filtro_salida=filtro_salida, finalizar=finalizar)],
+    )
+
+
+# ================== LISTAS DE PALABRAS (ALTERNATIVA EN TRIE) ==================
+# Los limpiadores por lista de palabras (rótulos finales, palabras clave de
+# bodega, ...) hacían un re.sub/re.search por palabra y por dirección. Con
+# alternativa_trie() la lista entera se compila en un solo regex cuyas
+# alternativas comparten prefijos ("BOD", "BODE", "BODEG", "BODEGA" ->
+# BOD(?:E(?:G(?:A)?)?)?), así que cada dirección se recorre una sola vez y
+# agregar palabras casi no cambia el costo por fila. El enrutador arma su
+# autómata de vocabularios con la misma función.
+
+def alternativa_trie(palabras, escapar: bool = True, grupos=None) -> str:
+    """
+    Regex que calza lo mismo que "|".join(palabras), con las palabras
+    factorizadas como trie. Con escapar=False las palabras ya son regex (solo
+    se admiten caracteres sueltos como ".", sin clases, grupos ni
+    cuantificadores). Sin grupos no deja grupos de captura. Con grupos (una
+    lista, la usa el enrutador) cada palabra completa deja un grupo vacío
+    "()" y su posición en palabras se agrega a grupos en el orden de los
+    grupos; como las ramas más largas se prueban primero, m.lastindex
+    identifica la palabra más larga que calza en esa posición.
+    """
+    trie = {}
+    for i, palabra in enumerate(palabras):
+        nodo = trie
+        for c in palabra:
+            nodo = nodo.setdefault(c, {})
+        nodo[""] = i
+
+    def armar(nodo) -> str:
+        ramas = [
+            (re.escape(c) if escapar else c) + armar(hijo)
+            for c, hijo in sorted((c, h) for c, h in nodo.items() if c)
+        ]
+        opcional = "" in nodo
+        if opcional and grupos is not None:
+            grupos.append(nodo[""])
+            ramas.append("()")
+            opcional = False
+        if not ramas:
+            return ""
+        if len(ramas) == 1 and not opcional:
+            return ramas[0]
+        return "(?:" + "|".join(ramas) + ")" + ("?" if opcional else "")
+
+    return armar(trie)
+
+
+def patron_rotulos_finales(rotulos) -> dict:
+    """
+    Regex de los rótulos que limpiar_rotulos_finales() quita del final, en
+    una sola pasada, y el de cada rótulo en el orden de la lista (el bucle).
+    """
+    return {
+        "rotulos": list(rotulos),
+        "regex": re.compile(rf"\s+(?:{alternativa_trie(rotulos)})\s*[\.\-]*\s*$", re.IGNORECASE),
+        "por_rotulo": [re.compile(rf"\s+{re.escape(r)}\s*[\.\-]*\s*$", re.IGNORECASE) for r in rotulos],
+    }
+
+
+def quitar_rotulos_finales(texto: str, patron: dict) -> str:
+    """
+    Quita los rótulos del final como el bucle original (un re.sub por rótulo,
+    en el orden de la lista). Casi ninguna dirección termina en rótulo: para
+    esas basta la búsqueda combinada; para el resto se aplica el bucle, que
+    es el que fija el resultado cuando hay varios rótulos seguidos.
+    """
+    if not patron["regex"].search(texto):
+        return texto
+    t = texto
+    for regex in patron["por_rotulo"]:
+        t = regex.sub("", t)
+    return t
+
+
+# ================== DESPACHO DE CASCADAS DE REGEX ==================
+# Las cascadas de los módulos (CLL/CR, CRA/CL, ...) prueban sus patrones en
+# orden con .search(), aunque la mayoría no pueda calzar: sin "CRA" en la
+# dirección ningún regex_cra_cl_* calza. Cada paso de la cascada es
+# (nombre, regex, armar, requisitos); requisitos son alternativas de
+# subcadenas que deben estar TODAS en la dirección (mayúsculas) para que el
+# patrón pueda calzar (None = siempre). La presencia de esas marcas forma la
+# clave de un dict con la sublista (en orden) de pasos posibles. Como los
+# requisitos son condiciones necesarias, el primer paso que calza es el
+# mismo que con la cascada completa; una dirección sin ruta se descarta sin
+# probar ningún regex.
+#
+# ORDEN APRENDIDO: con MEDICION_CASCADAS["activa"] (lo enciende el
+# orquestador con --aprender-orden), aplicar_cascada() cuenta por paso
+# intentos, aciertos y tiempo, solo en las cascadas con grupos conmutables
+# (las demás no se pueden reordenar y no pagan la medición). El orden de una
+# cascada solo cambia dentro de los grupos conmutables(): cadenas de pasos
+# mutuamente excluyentes (p.ej. patrones anclados a ^CLL y a ^CRA), cuyo
+# orden no cambia el resultado. Esas cadenas se ordenan por aciertos por
+# unidad de tiempo con las estadísticas acumuladas en ORDEN_CASCADAS.json,
+# que se cargan al construir la cascada; el resto de pasos (patrones con
+# .search() que se pueden solapar) queda en el orden escrito. El orden no
+# cambia durante una corrida: lo aprendido se guarda al final
+# (guardar_orden_cascadas) y aplica desde la siguiente. Al guardar, lo
+# acumulado se multiplica por DECAIMIENTO_ORDEN_CASCADAS: las corridas viejas
+# pesan cada vez menos y el orden sigue a los datos recientes.
+
+ARCHIVO_ORDEN_CASCADAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ORDEN_CASCADAS.json")
+
+# Peso de lo acumulado frente a la corrida nueva (0 = solo la última corrida)
+DECAIMIENTO_ORDEN_CASCADAS = 0.5
+
+# Cascadas construidas en este proceso, por nombre
+_CASCADAS = {}
+# Contenido de ORDEN_CASCADAS.json (se lee una sola vez por proceso)
+_ORDEN_GUARDADO = {}
+# Medición de aciertos/tiempo por paso (apagada: el camino rápido no mide)
+MEDICION_CASCADAS = {"activa": False}
+
+
+def conmutables(**cadenas) -> dict:
+    """
+    Grupo de cadenas de pasos {nombre_cadena: [pasos]} que no pueden calzar
+    en la misma dirección; dentro de cada cadena el orden es fijo.
+    """
+    return {"conmutables": cadenas}
+
+
+def _leer_orden_cascadas() -> dict:
+    if "cascadas" not in _ORDEN_GUARDADO:
+        try:
+            with open(ARCHIVO_ORDEN_CASCADAS, encoding="utf-8") as fh:
+                _ORDEN_GUARDADO["cascadas"] = json.load(fh).get("cascadas", {})
+        except (OSError, ValueError):
+            _ORDEN_GUARDADO["cascadas"] = {}
+    return _ORDEN_GUARDADO["cascadas"]
+
+
+def orden_cadenas(cadenas: dict, estadisticas: dict) -> list:
+    """
+    Nombres de las cadenas de un grupo conmutable, de más a menos aciertos
+    por nanosegundo; sin estadísticas de todas, el orden escrito.
+    """
+    puntajes = {}
+    for nombre, pasos in cadenas.items():
+        aciertos = sum(estadisticas.get(p[0], (0, 0, 0))[1] for p in pasos)
+        tiempo = sum(estadisticas.get(p[0], (0, 0, 0))[2] for p in pasos)
+        if not tiempo:
+            return list(cadenas)
+        puntajes[nombre] = aciertos / tiempo
+    return sorted(cadenas, key=lambda nombre: -puntajes[nombre])
+
+
+def despacho_cascada(pasos, nombre: str) -> dict:
+    """
+    pasos: lista ordenada de pasos (nombre, regex, armar, requisitos) y de
+    grupos conmutables(). nombre identifica la cascada en ORDEN_CASCADAS.json.
+    """
+    guardado = _leer_orden_cascadas().get(nombre, {}).get("pasos", {})
+    grupos, planos = [], []
+    for elemento in pasos:
+        if isinstance(elemento, dict):
+            cadenas = elemento["conmutables"]
+            grupos.append(cadenas)
+            for cadena in orden_cadenas(cadenas, guardado):
+                planos.extend(cadenas[cadena])
+        else:
+            planos.append(elemento)
+    marcas = sorted({
+        marca for _, _, _, requisitos in planos if requisitos is not None
+        for req in requisitos for marca in req
+    })
+    despacho = {
+        "nombre": nombre,
+        "pasos": planos,
+        "grupos": grupos,
+        "marcas": marcas,
+        "rutas": {},
+        "medir": bool(grupos),
+        "estadisticas": {p[0]: [0, 0, 0] for p in planos},
+    }
+    _CASCADAS[nombre] = despacho
+    return despacho
+
+
+def ruta_cascada(despacho: dict, d: str) -> list:
+    """Pasos (nombre, regex, armar) de la cascada que pueden calzar en d, en orden."""
+    clave = tuple(marca in d for marca in despacho["marcas"])
+    ruta = despacho["rutas"].get(clave)
+    if ruta is None:
+        presentes = {marca for marca, esta in zip(despacho["marcas"], clave) if esta}
+        ruta = [
+            (nombre, regex, armar) for nombre, regex, armar, requisitos in despacho["pasos"]
+            if requisitos is None or any(presentes.issuperset(req) for req in requisitos)
+        ]
+        despacho["rutas"][clave] = ruta
+    return ruta
+
+
+def aplicar_cascada(despacho: dict, ruta, d: str, *extras):
+    """
+    armar(m, d, *extras) del primer paso de la ruta que calza en d (None si
+    ninguno). Si la cascada se mide, cuenta intentos, aciertos y
+    nanosegundos por paso.
+    """
+    if not (despacho["medir"] and MEDICION_CASCADAS["activa"]):
+        for _, regex, armar in ruta:
+            m = regex.search(d)
+            if m:
+                return armar(m, d, *extras)
+        return None
+
+    estadisticas = despacho["estadisticas"]
+    for nombre, regex, armar in ruta:
+        inicio = time.perf_counter_ns()
+        m = regex.search(d)
+        contador = estadisticas[nombre]
+        contador[0] += 1
+        contador[2] += time.perf_counter_ns() - inicio
+        if m:
+            contador[1] += 1
+            return armar(m, d, *extras)
+    return None
+
+
+def tomar_estadisticas_cascadas() -> dict:
+    """{cascada: {paso: [intentos, aciertos, ns]}} desde la última toma (y las pone en cero)."""
+    tomadas = {}
+    for nombre, despacho in _CASCADAS.items():
+        pasos = {paso: list(c) for paso, c in despacho["estadisticas"].items() if c[0]}
+        if pasos:
+            tomadas[nombre] = pasos
+        for contador in despacho["estadisticas"].values():
+            contador[:] = [0, 0, 0]
+    return tomadas
+
+
+def sumar_estadisticas_cascadas(estadisticas: dict) -> None:
+    """Suma a este proceso las estadísticas tomadas en otro (p.ej. un worker)."""
+    for nombre, pasos in estadisticas.items():
+        despacho = _CASCADAS.get(nombre)
+        if despacho is None:
+            continue
+        for paso, (intentos, aciertos, ns) in pasos.items():
+            contador = despacho["estadisticas"].setdefault(paso, [0, 0, 0])
+            contador[0] += intentos
+            contador[1] += aciertos
+            contador[2] += ns
+
+
+def guardar_orden_cascadas(ruta: str = ARCHIVO_ORDEN_CASCADAS) -> None:
+    """
+    Suma a ORDEN_CASCADAS.json las estadísticas de esta corrida, con lo ya
+    guardado multiplicado por DECAIMIENTO_ORDEN_CASCADAS; el orden de cada
+    grupo conmutable sale de ellas al construir la cascada en la próxima
+    (orden_cadenas).
+    """
+    try:
+        with open(ruta, encoding="utf-8") as fh:
+            cascadas = json.load(fh).get("cascadas", {})
+    except (OSError, ValueError):
+        cascadas = {}
+
+    for nombre, pasos in tomar_estadisticas_cascadas().items():
+        guardada = cascadas.setdefault(nombre, {})
+        acumuladas = guardada.setdefault("pasos", {})
+        for paso, contador in pasos.items():
+            previo = acumuladas.get(paso, [0, 0, 0])
+            acumuladas[paso] = [round(a * DECAIMIENTO_ORDEN_CASCADAS) + b for a, b in zip(previo, contador)]
+        guardada.pop("orden", None)
+
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as fh:
+        json.dump({"cascadas": cascadas}, fh, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
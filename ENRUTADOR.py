@@ -0,0 +1,99 @@
+import re
+
+import pandas as pd
+
+from COMUN import alternativa_trie
+
+# ================== ENRUTADOR POR PALABRAS CLAVE ==================
+# Cada módulo de normalización declara en VOCABULARIO_FILTRO las palabras que
+# su filtro necesita ver en la DIRECCION para quedarse con una fila.
+# Con el vocabulario de todos los módulos se arma UN solo autómata (un trie
+# compilado como regex, ver COMUN.alternativa_trie) que recorre cada
+# dirección una vez y dice qué módulos podrían reclamarla. Así cada módulo
+# normaliza solo sus filas candidatas; su propio filtro sigue decidiendo
+# cuáles conserva.
+
+COL_DIR = "DIRECCION"
+
+
+def construir_enrutador(modulos):
+    """
+    Recibe la lista [(nombre, modulo), ...] ya cargada y arma el autómata con
+    el VOCABULARIO_FILTRO de cada módulo.
+
+    Los módulos sin VOCABULARIO_FILTRO no se enrutan: siguen recibiendo el
+    DataFrame completo.
+    """
+    duenos = {}
+    for nombre, modulo in modulos:
+        vocabulario = getattr(modulo, "VOCABULARIO_FILTRO", None)
+        if not vocabulario:
+            continue
+        for palabra in vocabulario:
+            duenos.setdefault(palabra.upper(), set()).add(nombre)
+
+    if not duenos:
+        return None
+
+    palabras = sorted(duenos)
+    grupos = []
+    patron = re.compile(
+        "(?=" + alternativa_trie(palabras, grupos=grupos) + ")",
+        re.IGNORECASE,
+    )
+
+    # Si aparece una palabra, aparecen también todas sus prefijas
+    # (p.ej. "COOPERAT" implica "COOP"): se precalcula la unión de dueños.
+    cierre = {}
+    for num_grupo, i in enumerate(grupos, start=1):
+        palabra = palabras[i]
+        cierre[num_grupo] = frozenset().union(
+            *(duenos[p] for p in palabras if palabra.startswith(p))
+        )
+
+    return {
+        "patron": patron,
+        "cierre": cierre,
+        "modulos": sorted({n for ns in duenos.values() for n in ns}),
+    }
+
+
+def columna_direccion(df: pd.DataFrame):
+    """Nombre real de la columna de dirección en df (o None si no hay)."""
+    if COL_DIR in df.columns:
+        return COL_DIR
+    for c in df.columns:
+        if str(c).upper().strip().replace(" ", "") == COL_DIR:
+            return c
+    return None
+
+
+def enrutar(df: pd.DataFrame, enrutador) -> dict:
+    """
+    Recorre la columna DIRECCION una sola vez y devuelve, por cada módulo
+    enrutado, una máscara booleana (alineada con df.index) de sus filas
+    candidatas. Los módulos que no aparecen en el dict deben recibir df
+    completo.
+    """
+    if enrutador is None:
+        return {}
+    col = columna_direccion(df)
+    if col is None:
+        return {}
+
+    patron = enrutador["patron"]
+    cierre = enrutador["cierre"]
+    marcas = {nombre: [False] * len(df) for nombre in enrutador["modulos"]}
+
+    for i, direccion in enumerate(df[col].tolist()):
+        if not isinstance(direccion, str):
+            continue
+        vistos = {m.lastindex for m in patron.finditer(direccion)}
+        for g in vistos:
+            for nombre in cierre[g]:
+                marcas[nombre][i] = True
+
+    return {
+        nombre: pd.Series(filas, index=df.index, dtype=bool)
+        for nombre, filas in marcas.items()
+    }
@@ -0,0 +1,164 @@
+import io
+import os
+
+import pandas as pd
+from openpyxl import Workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:   # pyarrow es opcional: solo hace falta para salida Parquet
+    pa = pq = None
+
+# ================== ESCRITURA DE RESULTADOS POR LOTES ==================
+# En lugar de concatenar todo en un DataFrame y escribirlo con
+# pd.ExcelWriter (openpyxl arma el libro completo en memoria), los resultados
+# se escriben por lotes a medida que salen de cada archivo o bloque:
+#   - xlsx: openpyxl en modo write-only (las filas van a disco al agregarlas).
+#   - csv: separado por ';' y utf-8 con BOM, como lo abre Excel en español.
+#   - parquet: pyarrow.parquet.ParquetWriter, un row group por lote.
+# Si destino es una ruta, se escribe a un temporal que reemplaza al archivo
+# final solo al cerrar; destino también puede ser un BytesIO (APP).
+
+FORMATOS_SALIDA = ("xlsx", "csv", "parquet")
+
+# Filas por lote al escribir un DataFrame ya armado (escribir_dataframe)
+FILAS_POR_LOTE = 50_000
+
+
+def abrir_escritor(destino, formato: str = "xlsx", hoja: str = "NORMALIZADAS") -> dict:
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato de salida no soportado: {formato}")
+    if formato == "parquet" and pq is None:
+        raise ValueError("La salida Parquet requiere pyarrow (pip install pyarrow).")
+    es_ruta = isinstance(destino, (str, os.PathLike))
+    return {
+        "destino": destino,
+        "archivo": f"{destino}.tmp" if es_ruta else destino,
+        "es_ruta": es_ruta,
+        "formato": formato,
+        "hoja": hoja,
+        "salida": None,
+        "columnas": None,
+        "filas": 0,
+        "normalizadas": 0,
+    }
+
+
+def _iniciar(escritor: dict, columnas) -> None:
+    escritor["columnas"] = list(columnas)
+    formato = escritor["formato"]
+    if formato == "xlsx":
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet(escritor["hoja"])
+        hoja.append(escritor["columnas"])
+        escritor["salida"] = (libro, hoja)
+    elif formato == "csv":
+        if escritor["es_ruta"]:
+            texto = open(escritor["archivo"], "w", encoding="utf-8-sig", newline="")
+        else:
+            texto = io.TextIOWrapper(escritor["archivo"], encoding="utf-8-sig", newline="")
+        texto.write(";".join(escritor["columnas"]) + "\n")
+        escritor["salida"] = texto
+    else:
+        esquema = pa.schema([(c, pa.string()) for c in escritor["columnas"]])
+        escritor["salida"] = pq.ParquetWriter(escritor["archivo"], esquema)
+
+
+def escribir_lote(escritor: dict, df: pd.DataFrame) -> None:
+    """Agrega las filas de df (mismas columnas en todos los lotes)."""
+    if df.empty:
+        return
+    if escritor["salida"] is None:
+        _iniciar(escritor, df.columns)
+    df = df[escritor["columnas"]]
+
+    formato = escritor["formato"]
+    if formato == "xlsx":
+        hoja = escritor["salida"][1]
+        valores = df.astype(object).where(df.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            hoja.append(fila)
+    elif formato == "csv":
+        df.to_csv(escritor["salida"], sep=";", header=False, index=False)
+    else:
+        valores = df.astype(object).where(df.notna(), None)
+        tabla = pa.Table.from_pandas(valores, schema=escritor["salida"].schema, preserve_index=False)
+        escritor["salida"].write_table(tabla)
+
+    escritor["filas"] += len(df)
+    if "VALIDACION" in df.columns:
+        escritor["normalizadas"] += int((df["VALIDACION"] == "1").sum())
+
+
+def cerrar_escritor(escritor: dict, descartar: bool = False) -> None:
+    """
+    Cierra la salida. Con descartar=True (o sin filas escritas) no se deja
+    ningún archivo en el destino.
+    """
+    salida = escritor["salida"]
+    formato = escritor["formato"]
+    if salida is not None:
+        if formato == "xlsx":
+            if not descartar:
+                salida[0].save(escritor["archivo"])
+        elif formato == "csv":
+            if escritor["es_ruta"]:
+                salida.close()
+            else:
+                salida.flush()
+                salida.detach()   # el BytesIO queda abierto para descargarlo
+        else:
+            salida.close()
+
+    if not escritor["es_ruta"]:
+        return
+    temporal = escritor["archivo"]
+    if descartar or salida is None:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return
+    os.replace(temporal, escritor["destino"])
+
+
+def escribir_dataframe(destino, df: pd.DataFrame, formato: str = "xlsx", hoja: str = "NORMALIZADAS") -> dict:
+    """Escribe un DataFrame completo por lotes de FILAS_POR_LOTE filas."""
+    escritor = abrir_escritor(destino, formato, hoja)
+    try:
+        for inicio in range(0, len(df), FILAS_POR_LOTE):
+            escribir_lote(escritor, df.iloc[inicio:inicio + FILAS_POR_LOTE])
+    except Exception:
+        cerrar_escritor(escritor, descartar=True)
+        raise
+    cerrar_escritor(escritor)
+    return escritor
+
+
+def leer_salida(ruta: str, hoja: str = "NORMALIZADAS") -> pd.DataFrame:
+    """
+    Lee una salida escrita por abrir_escritor (formato según la extensión),
+    con todas las columnas como texto.
+    """
+    formato = os.path.splitext(ruta)[1].lower().lstrip(".")
+    if formato == "xlsx":
+        return pd.read_excel(ruta, sheet_name=hoja, dtype=str)
+    if formato == "csv":
+        return pd.read_csv(ruta, sep=";", dtype=str, encoding="utf-8-sig")
+    if formato == "parquet":
+        if pq is None:
+            raise ValueError("Leer una salida Parquet requiere pyarrow (pip install pyarrow).")
+        return pq.read_table(ruta).to_pandas()
+    raise ValueError(f"Formato de salida no soportado: {formato}")
+
+
+def guardar_hojas(ruta: str, hojas: dict) -> None:
+    """
+    Escribe {hoja: DataFrame} en el libro ruta en una sola sesión de
+    escritura: si el libro ya existe se abre una vez y se agregan (o
+    reemplazan) esas hojas, conservando las demás.
+    """
+    modo = "a" if os.path.exists(ruta) else "w"
+    opciones = {"if_sheet_exists": "replace"} if modo == "a" else {}
+    with pd.ExcelWriter(ruta, engine="openpyxl", mode=modo, **opciones) as writer:
+        for hoja, df in hojas.items():
+            df.to_excel(writer, sheet_name=hoja, index=False)
@@ -3,6 +3,12 @@ import os
 import re
 import pandas as pd
 
+from COMUN import (
+    aplicar_cascada, conmutables, despacho_cascada, es_columna_entrada, leer_csv, procesar_por_contrato,
+    ruta_cascada,
+)
+from ESCRITURA import guardar_hojas
+
 # ================== Configuración fija ==================
 RUTA_ENTRADA = "CICLO 53_PDIRECCION.csv"   # Cambia si tu archivo se llama distinto
 RUTA_SALIDA  = "CICLOS_PROCESADOS.xlsx"
@@ -13,6 +19,7 @@ COL_DIR      = "DIRECCION"
 def leer_entrada_flexible(path, col_dir=COL_DIR) -> pd.DataFrame:
     """
     Lee CSV (coma o punto y coma) o Excel y garantiza que exista la columna de dirección.
+    Solo se leen las columnas NIU/CLIENTE_ID y de dirección.
     """
     if not os.path.exists(path):
         raise ValueError(f"No se encuentra el archivo: {path}")
@@ -20,12 +27,10 @@ def leer_entrada_flexible(path, col_dir=COL_DIR) -> pd.DataFrame:
     ext = os.path.splitext(path)[1].lower()
 
     if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(path, dtype=str)
+        df = pd.read_excel(path, dtype=str, usecols=es_columna_entrada)
     elif ext in [".csv", ".txt"]:
-        # Primero intentamos con ';', si queda una sola columna probamos con ','
-        df = pd.read_csv(path, dtype=str, sep=";")
-        if df.shape[1] == 1:
-            df = pd.read_csv(path, dtype=str, sep=",")
+        # Separador, codificación y coma decimal se detectan una sola vez
+        df = leer_csv(path)
     else:
         raise ValueError(f"Extensión de archivo no soportada: {ext}")
 
@@ -159,56 +164,69 @@ def normalizar_direccion_interseccion(direccion: str):
     u = re.sub(r"[‐‒–—―-]", "-", u)                                 # distintos guiones -> '-'
     u = re.sub(r"\s+", " ", u).strip()
 
-    # 1) CLL <cll> CR <cr> - <guion> tail
-    m = P_CLL_CR.match(u)
-    if m:
-        out = f"CLL {m.group('cll').replace(' ', '')} CR {m.group('cr').replace(' ', '')} - {m.group('guion')}"
-        tail = norm_tail(m.group("tail"))
-        return (out + tail).strip(), "1"
-
-    # 2) CRA <cra> CL <cl> - <guion> tail
-    m = P_CRA_CL.match(u)
-    if m and m.group("guion"):
-        out = f"CRA {m.group('cra').replace(' ', '')} CL {m.group('cl').replace(' ', '')} - {m.group('guion')}"
-        tail = norm_tail(m.group("tail"))
-        return (out + tail).strip(), "1"
-
-    # 3.a) CRA <cra> CL <cl> con CS en la cola
-    m = P_CRA_CL_CS.match(u)
-    if m:
-        cra = m.group("cra").replace(" ", "")
-        cl  = m.group("cl").replace(" ", "")
-        tail = norm_tail(m.group("tail"))
-        # Si no encontramos número, dejamos sin '-'
-        out = f"CRA {cra} CL {cl}"
-        return (out + tail).strip(), "1"
-
-    # 3.b) CRA <cra> CL <cl> <num> (sin signo)
-    m = P_CRA_CL_SIMPLE.match(u)
-    if m:
-        out = f"CRA {m.group('cra').replace(' ', '')} CL {m.group('cl').replace(' ', '')} - {m.group('guion')}"
-        tail = norm_tail(m.group("tail"))
-        return (out + tail).strip(), "1"
-
-    # 4.a) CLL <cll> <cr> - <guion>
-    m = P_CLL_NUMNUM.match(u)
-    if m:
-        out = f"CLL {m.group('cll').replace(' ', '')} CR {m.group('cr').replace(' ', '')} - {m.group('guion')}"
-        tail = norm_tail(m.group("tail"))
-        return (out + tail).strip(), "1"
-
-    # 4.b) CRA <cra> <cl> <guion>
-    m = P_CRA_NUMNUM.match(u)
-    if m:
-        out = f"CRA {m.group('cra').replace(' ', '')} CL {m.group('cl').replace(' ', '')} - {m.group('guion')}"
-        tail = norm_tail(m.group("tail"))
-        return (out + tail).strip(), "1"
+    resultado = aplicar_cascada(CASCADA, ruta_cascada(CASCADA, u), u)
+    if resultado is not None:
+        return resultado
 
     # No cumple intersección -> no normaliza
     return u, "0"
 
+# ============= Armado de la salida por patrón =============
+
+def armar_cll_cr(m, u):
+    """1) y 4.a): CLL <cll> CR <cr> - <guion> + cola."""
+    out = f"CLL {m.group('cll').replace(' ', '')} CR {m.group('cr').replace(' ', '')} - {m.group('guion')}"
+    tail = norm_tail(m.group("tail"))
+    return (out + tail).strip(), "1"
+
+def armar_cra_cl(m, u):
+    """2), 3.b) y 4.b): CRA <cra> CL <cl> - <guion> + cola."""
+    out = f"CRA {m.group('cra').replace(' ', '')} CL {m.group('cl').replace(' ', '')} - {m.group('guion')}"
+    tail = norm_tail(m.group("tail"))
+    return (out + tail).strip(), "1"
+
+def armar_cra_cl_cs(m, u):
+    """3.a): CRA <cra> CL <cl> + cola con CS (sin número, queda sin '-')."""
+    cra = m.group("cra").replace(" ", "")
+    cl  = m.group("cl").replace(" ", "")
+    tail = norm_tail(m.group("tail"))
+    out = f"CRA {cra} CL {cl}"
+    return (out + tail).strip(), "1"
+
+# Todos los patrones están anclados al inicio (^), así que .search() equivale
+# al .match() original. Las cadenas CLL (^CLL) y CRA (^CR/CRA/KR/KRA/K) nunca
+# calzan en la misma dirección: su orden se aprende (COMUN.conmutables);
+# dentro de cada cadena se respeta el orden escrito.
+CASCADA = despacho_cascada([
+    conmutables(
+        CLL=[
+            ("cll_cr", P_CLL_CR, armar_cll_cr, [("CLL",)]),
+            ("cll_numnum", P_CLL_NUMNUM, armar_cll_cr, [("CLL",)]),
+        ],
+        CRA=[
+            ("cra_cl", P_CRA_CL, armar_cra_cl, [("CL",)]),
+            ("cra_cl_cs", P_CRA_CL_CS, armar_cra_cl_cs, [("CL", "CS")]),
+            ("cra_cl_simple", P_CRA_CL_SIMPLE, armar_cra_cl, [("CL",)]),
+            ("cra_numnum", P_CRA_NUMNUM, armar_cra_cl, None),
+        ],
+    ),
+], nombre="ISABELLA")
+
 # ================== Función estándar para el pipeline ==================
 
+# procesar() filtra por la SALIDA (debe empezar por CLL/CRA), y eso solo ocurre
+# si la entrada empieza por CLL o por CR/CRA/KR/KRA/K. Vocabulario para el
+# enrutador del orquestador ("CR" cubre "CRA" y "K" cubre "KR"/"KRA").
+VOCABULARIO_FILTRO = ["CLL", "CR", "K"]
+
+# Prefiltro sobre la entrada: las mismas iniciales, admitiendo los espacios
+# raros que el normalizador limpia antes de reconocer la intersección
+FILTRO = r"^[\s\u200B]*(?:CLL|CR|K)"
+# Filtro definitivo sobre la salida (debe empezar por CLL/CRA)
+FILTRO_SALIDA = r"^\s*(CLL|CRA)\b"
+
+normalizar_direccion = normalizar_direccion_interseccion
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -220,47 +238,14 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
 
     Solo incluye direcciones que aparentan ser intersecciones CLL/CR o CRA/CL.
     """
-    # Copia para no mutar el original
-    df = df_in.copy()
-
-    # --- Asegurar NIU ---
-    cols_map = {c: c.upper().strip() for c in df.columns}
-    if "NIU" not in df.columns:
-        for c, up in cols_map.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-    if "NIU" not in df.columns:
-        raise ValueError("El DataFrame de entrada debe contener columna 'NIU' o 'CLIENTE_ID'.")
-
-    # --- Asegurar DIRECCION ---
-    if COL_DIR not in df.columns:
-        for c, up in cols_map.items():
-            if up.replace(" ", "") in ("DIRECCION", "DIRECCIÓN", "DIR"):
-                df.rename(columns={c: COL_DIR}, inplace=True)
-                break
-    if COL_DIR not in df.columns:
-        raise ValueError("El DataFrame de entrada debe contener columna de dirección.")
-
-    # Nos quedamos solo con NIU + DIRECCION
-    df = df[["NIU", COL_DIR]].copy()
-    df.rename(columns={COL_DIR: "DIRECCION"}, inplace=True)
-
-    # Aplicar normalizador de intersección
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_direccion_interseccion(x))
+    return procesar_por_contrato(
+        df_in, FILTRO, normalizar_direccion, filtro_salida=FILTRO_SALIDA
     )
 
-    # Filtrar solo las que parecen intersección (por la salida)
-    patron_inter = re.compile(r"^\s*(CLL|CRA)\b", re.IGNORECASE)
-    mask = df["DIRECCION_NORMALIZADA"].astype(str).str.match(patron_inter, na=False)
-    df_filtrado = df[mask].copy()
-
-    return df_filtrado[["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]]
-
 # ================== Flujo principal standalone ==================
 
-def main():
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Leer entrada flexible (CSV / Excel)
     df = leer_entrada_flexible(RUTA_ENTRADA, col_dir=COL_DIR)
 
@@ -281,16 +266,17 @@ def main():
     normalizadas = (df_out["VALIDACION"] == "1").sum()
     efectividad = (normalizadas / total * 100) if total > 0 else 0
 
+    print(f"🔍 Total direcciones filtradas (intersección): {total}")
+    print(f"📊 Direcciones normalizadas: {normalizadas}")
+    print(f"📈 Efectividad: {round(efectividad, 2)}%")
+    return {HOJA_SALIDA: df_out}
+
+def main():
     # Guardar en Excel (adjuntando si existe)
-    modo = "a" if os.path.exists(RUTA_SALIDA) else "w"
-    with pd.ExcelWriter(RUTA_SALIDA, engine="openpyxl", mode=modo) as writer:
-        df_out.to_excel(writer, sheet_name=HOJA_SALIDA, index=False)
+    guardar_hojas(RUTA_SALIDA, hojas_script())
 
     print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
     print(f"📄 Hoja: {HOJA_SALIDA}")
-    print(f"🔍 Total direcciones filtradas (intersección): {total}")
-    print(f"📊 Direcciones normalizadas: {normalizadas}")
-    print(f"📈 Efectividad: {round(efectividad, 2)}%")
 
 if __name__ == "__main__":
     main()
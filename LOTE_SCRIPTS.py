@@ -0,0 +1,70 @@
+import os
+import argparse
+
+from ESCRITURA import guardar_hojas
+from ORQUESTADOR import SCRIPTS, cargar_modulo
+
+# ================== CORRIDA EN LOTE DE LOS MODOS SCRIPT ==================
+# Cada módulo se puede correr solo (python RPINILLA.py, ...) y su __main__
+# abre CICLOS_PROCESADOS.xlsx en modo "a": carga y reescribe el libro
+# completo, así que correr todos los módulos uno tras otro es cuadrático en
+# el tamaño del libro. Aquí se llama hojas_script() de los módulos pedidos y
+# cada libro de salida (RUTA_SALIDA de cada módulo) se escribe una sola vez
+# con todas sus hojas: mismos libros y mismos nombres de hoja que los
+# scripts individuales (C47_ROJAS_PINILLA, 25MAYO, Direcciones_Cecilia, ...).
+# Como en los scripts, las rutas de entrada/salida son relativas a la
+# carpeta desde donde se ejecuta.
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Corre el modo script de varios módulos y escribe cada libro de salida una sola vez."
+    )
+    parser.add_argument(
+        "modulos", nargs="*",
+        help="Alias de SCRIPTS a correr (p.ej. RPINILLA 25MAYO CECILIA). Por defecto, todos.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    pedidos = {m.upper() for m in args.modulos}
+    desconocidos = pedidos - {nombre.upper() for nombre, _ in SCRIPTS}
+    if desconocidos:
+        print(f"❌ Módulos desconocidos: {', '.join(sorted(desconocidos))}")
+        print(f"   Disponibles: {', '.join(nombre for nombre, _ in SCRIPTS)}")
+        return
+
+    por_libro = {}   # RUTA_SALIDA -> {hoja: DataFrame}
+    for nombre, archivo in SCRIPTS:
+        if pedidos and nombre.upper() not in pedidos:
+            continue
+        print(f"\n▶️ {nombre} ({archivo})")
+        try:
+            modulo = cargar_modulo(os.path.join(base_dir, archivo), nombre)
+            hojas = modulo.hojas_script()
+        except Exception as e:
+            print(f"   ⚠️ Error en {archivo}: {e}")
+            continue
+
+        libro = por_libro.setdefault(modulo.RUTA_SALIDA, {})
+        for hoja in hojas:
+            if hoja in libro:
+                print(f"   ⚠️ La hoja {hoja} ya la escribió otro módulo; se reemplaza.")
+        libro.update(hojas)
+
+    if not por_libro:
+        print("❌ No se generó ninguna hoja.")
+        return
+
+    print()
+    for ruta_salida, hojas in por_libro.items():
+        guardar_hojas(ruta_salida, hojas)
+        print(f"✅ {ruta_salida}: {len(hojas)} hojas ({', '.join(hojas)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import pandas as pd
 import re
-import os
 import unidecode
 
+from COMUN import alternativa_trie, bloque, procesar_bloques
+from ESCRITURA import guardar_hojas
+
 # ============= CONFIGURACIÓN MODO SCRIPT =============
 RUTA_ENTRADA = "CICLO 49_PDIRECCION.xlsx"
 RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
@@ -18,15 +20,16 @@ palabras_clave_bodega = [
     "B.VERDE", "AZUL", "AMARILLAS",
     "BQ", "BG", "B.", "BODE", "BODEG", "BLOQUE"
 ]
+# Las palabras clave van tal cual al regex ("B." acepta cualquier carácter tras la B)
+_RE_BODEGA = re.compile(
+    rf"\b(?:{alternativa_trie(palabras_clave_bodega, escapar=False)})\b", re.IGNORECASE
+)
 
 def categorizar_bodega(direccion: str) -> str:
     if pd.isna(direccion):
         return ""
     direccion = str(direccion).upper()
-    return "BODEGA" if any(
-        re.search(rf'\b{p}\b', direccion, re.IGNORECASE)
-        for p in palabras_clave_bodega
-    ) else ""
+    return "BODEGA" if _RE_BODEGA.search(direccion) else ""
 
 def extraer_bodega(direccion: str) -> str:
     if pd.isna(direccion):
@@ -185,8 +188,66 @@ def normalizar_armenia(direccion: str) -> tuple[str, int]:
 
     return direccion, 0
 
+# ============= NORMALIZADORES POR FILA =============
+
+INDICADORES_A_REEMPLAZAR = {"KMT", "CLL", "SAS", "URB", "VIA", "GAL"}
+
+def normalizar_mercar(direccion: str) -> tuple[str, str]:
+    """
+    Bloque MERCAR para una sola dirección: arma
+    LOC MERCAR <CATEGORIA> <BODEGA> <INDICADOR> <PUESTO> y valida con regex_merc.
+    """
+    if pd.isna(direccion):
+        return direccion, "0"
+
+    tokens = direccion.split() if isinstance(direccion, str) else []
+    indicador = tokens[0] if tokens else None
+    categoria = categorizar_bodega(direccion)
+    bodega = extraer_bodega(direccion)
+    puesto = extraer_puesto(direccion)
+
+    if bodega.strip() and puesto.strip() and indicador in INDICADORES_A_REEMPLAZAR:
+        indicador = "PTO"
+    if indicador == "LOC":
+        indicador = "PTO"
+    if re.search("ARMENIA PLAZA", str(direccion), re.IGNORECASE):
+        indicador = "ARMENIA PLAZA"
+    if bodega.strip():
+        categoria = "BODEGA"
+
+    if any(v is None or str(v).strip() == "" for v in [categoria, bodega, indicador, puesto]):
+        normalizada = direccion
+    else:
+        normalizada = f"LOC MERCAR {categoria} {bodega} {indicador} {puesto}"
+
+    cumple = isinstance(normalizada, str) and regex_merc.match(normalizada.strip())
+    return normalizada, "1" if cumple else "0"
+
+def normalizar_nuevo_armenia(direccion: str) -> tuple[str, str]:
+    normalizada, cumple = normalizar_armenia(direccion)
+    return normalizada, str(int(cumple))
+
 # ============= FUNCIÓN PÚBLICA =============
 
+# Palabras de los filtros MERCAR y NUEVO ARMENIA de procesar()
+VOCABULARIO_MERCAR = [
+    "ARMENIA PLAZA", "MERCAR", "PABELLON", "MAYORISTA", "BODEGA",
+    "VERDURAS", "VERDUR", "AZUL", "VERDE", "AMAR", "PLASTICO",
+]
+VOCABULARIO_NUEVO_ARMENIA = ["NUEVO ARMENIA"]
+
+# Vocabulario de ambos filtros (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = VOCABULARIO_MERCAR + VOCABULARIO_NUEVO_ARMENIA
+
+# Filtro de líneas MERCAR y de URB NUEVO ARMENIA (una fila puede estar en ambos)
+FILTRO_MERCAR = "|".join(VOCABULARIO_MERCAR)
+FILTRO_NUEVO_ARMENIA = "|".join(VOCABULARIO_NUEVO_ARMENIA)
+
+BLOQUES = [
+    bloque(FILTRO_MERCAR, normalizar_mercar, nombre="MERCAR"),
+    bloque(FILTRO_NUEVO_ARMENIA, normalizar_nuevo_armenia, nombre="NUEVO ARMENIA"),
+]
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Espera un DataFrame con al menos:
@@ -200,97 +261,12 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
       - MERCAR / ARMENIA PLAZA
       - URB NUEVO ARMENIA
     """
-    if COL_DIR not in df_in.columns:
-        raise ValueError("El DataFrame de entrada debe tener columna 'DIRECCION'.")
-
-    df = df_in.copy()
-
-    # Identificador estándar
-    if "NIU" in df.columns:
-        id_col = "NIU"
-    elif "CLIENTE_ID" in df.columns:
-        id_col = "CLIENTE_ID"
-    else:
-        raise ValueError("No se encontró columna 'NIU' ni 'CLIENTE_ID'.")
-
-    df = df[[id_col, COL_DIR]].copy()
-    df.rename(columns={id_col: "NIU", COL_DIR: "DIRECCION"}, inplace=True)
-
-    # --- BLOQUE MERCAR ---
-    df_merc = df.copy()
-    df_merc["INDICADOR"] = df_merc["DIRECCION"].str.split(expand=True)[0]
-    df_merc["PREFIJO_LOC"] = "LOC"
-    df_merc["LOCALIDAD"] = "MERCAR"
-
-    df_merc["CATEGORIA"] = df_merc["DIRECCION"].apply(categorizar_bodega)
-    df_merc["# BODEGA"] = df_merc["DIRECCION"].apply(extraer_bodega)
-    df_merc["PUESTO #"] = df_merc["DIRECCION"].apply(extraer_puesto)
-
-    indicadores_a_reemplazar = {"KMT", "CLL", "SAS", "URB", "VIA", "GAL"}
-    mask_reemplazo = (
-        df_merc["# BODEGA"].str.strip().ne("") &
-        df_merc["PUESTO #"].str.strip().ne("") &
-        df_merc["INDICADOR"].isin(indicadores_a_reemplazar)
-    )
-    df_merc.loc[mask_reemplazo, "INDICADOR"] = "PTO"
-
-    df_merc["INDICADOR"] = df_merc["INDICADOR"].replace("LOC", "PTO")
-    df_merc.loc[
-        df_merc["DIRECCION"].str.contains("ARMENIA PLAZA", case=False, na=False),
-        "INDICADOR"
-    ] = "ARMENIA PLAZA"
-    df_merc.loc[df_merc["# BODEGA"].str.strip().ne(""), "CATEGORIA"] = "BODEGA"
-
-    df_merc["DIRECCION_NORMALIZADA"] = df_merc.apply(
-        lambda row: row["DIRECCION"]
-        if any(pd.isna(row[col]) or str(row[col]).strip() == ""
-               for col in ["CATEGORIA", "# BODEGA", "INDICADOR", "PUESTO #"])
-        else f'{row["PREFIJO_LOC"]} {row["LOCALIDAD"]} {row["CATEGORIA"]} '
-             f'{row["# BODEGA"]} {row["INDICADOR"]} {row["PUESTO #"]}',
-        axis=1
-    )
-
-    df_merc["CUMPLE_ESTANDAR"] = df_merc["DIRECCION_NORMALIZADA"].apply(
-        lambda d: 1 if isinstance(d, str) and regex_merc.match(d.strip()) else 0
-    )
-
-    # Filtro de líneas MERCAR
-    filtro_merc = df_merc["DIRECCION"].str.contains(
-        r"armenia plaza|mercar|pabellon|mayorista|bodega|verduras|verdur|azul|verde|amar|plastico",
-        case=False, na=False
-    )
-
-    df_filtrado_merc = df_merc[filtro_merc].copy()
-
-    # --- BLOQUE NUEVO ARMENIA ---
-    df_arm = df.copy()
-    df_arm[["DIRECCION_NORMALIZADA", "CUMPLE_ESTANDAR"]] = df_arm["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_armenia(x))
-    )
-    filtro_arm = df_arm["DIRECCION"].str.contains("nuevo armenia", case=False, na=False)
-    df_filtrado_arm = df_arm[filtro_arm].copy()
-
-    # --- CONSOLIDADO ---
-    cols_base = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "CUMPLE_ESTANDAR"]
-    partes = []
-    if not df_filtrado_merc.empty:
-        partes.append(df_filtrado_merc[cols_base])
-    if not df_filtrado_arm.empty:
-        partes.append(df_filtrado_arm[cols_base])
-
-    if not partes:
-        return pd.DataFrame(columns=["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"])
-
-    df_final = pd.concat(partes, ignore_index=True)
-
-    df_final["VALIDACION"] = df_final["CUMPLE_ESTANDAR"].astype(int).astype(str)
-    df_final = df_final[["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]]
-
-    return df_final
+    return procesar_bloques(df_in, BLOQUES)
 
 # ============= MODO SCRIPT STANDALONE =============
 
-if __name__ == "__main__":
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     df_in = pd.read_excel(RUTA_ENTRADA, dtype=str)
     df_out = procesar(df_in)
 
@@ -298,12 +274,14 @@ if __name__ == "__main__":
     normalizadas = (df_out["VALIDACION"] == "1").sum()
     efectividad = (normalizadas * 100 / total) if total > 0 else 0
 
-    modo = "a" if os.path.exists(RUTA_SALIDA) else "w"
-    with pd.ExcelWriter(RUTA_SALIDA, engine="openpyxl", mode=modo) as writer:
-        df_out.to_excel(writer, sheet_name=HOJA_SALIDA, index=False)
-
-    print(f"✅ Archivo procesado: {RUTA_SALIDA}")
-    print(f"📄 Hoja: {HOJA_SALIDA}")
     print(f"📦 Total direcciones procesadas: {total}")
     print(f"✔️ Direcciones normalizadas correctamente: {normalizadas}")
     print(f"📈 Efectividad global: {round(efectividad, 2)}%")
+    return {HOJA_SALIDA: df_out}
+
+
+if __name__ == "__main__":
+    guardar_hojas(RUTA_SALIDA, hojas_script())
+
+    print(f"✅ Archivo procesado: {RUTA_SALIDA}")
+    print(f"📄 Hoja: {HOJA_SALIDA}")
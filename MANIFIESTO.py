@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from CACHE_NORMALIZACION import version_modulo
+
+# ================== CORRIDAS INCREMENTALES ==================
+# El manifiesto (CACHE_RESULTADOS/manifiesto.json) guarda por archivo de
+# entrada su tamaño, mtime y hash de contenido, y por módulo la clave con la
+# que se calculó su resultado y el .pkl donde quedó guardado. La clave de un
+# módulo combina:
+#   - el hash del código compartido (COMUN, ENRUTADOR, ORQUESTADOR),
+#   - el hash de su .py,
+#   - con arbitraje de propiedad, el orden de prioridad y los .py de los
+#     módulos de mayor prioridad (deciden qué direcciones le llegan).
+# Si el archivo y la clave no cambiaron se reutiliza el resultado guardado;
+# al editar un módulo solo se recalculan ese módulo y los de menor prioridad.
+
+CARPETA_RESULTADOS = "CACHE_RESULTADOS"
+ARCHIVO_MANIFIESTO = "manifiesto.json"
+
+
+def hash_fuentes(rutas) -> str:
+    sha = hashlib.sha256()
+    for ruta in rutas:
+        with open(ruta, "rb") as fh:
+            sha.update(fh.read())
+    return sha.hexdigest()[:16]
+
+
+def claves_modulos(modulos, orden, prioridad, firma_compartida: str) -> dict:
+    """
+    Clave de cada módulo. orden es la lista (nombre, modulo) en el orden en
+    que se evalúan (ordenar_por_prioridad); sin arbitraje cada clave depende
+    solo del propio módulo.
+    """
+    versiones = {nombre: version_modulo(modulo) for nombre, modulo in modulos}
+    claves = {}
+    previas = []
+    for nombre, _ in orden:
+        if prioridad is None:
+            partes = [firma_compartida, "sin-arbitraje", nombre, versiones[nombre]]
+        else:
+            previas.append(f"{nombre}:{versiones[nombre]}")
+            partes = [firma_compartida, "arbitraje", ",".join(prioridad), *previas]
+        claves[nombre] = hashlib.sha256("|".join(partes).encode()).hexdigest()[:16]
+    return claves
+
+
+def cargar_manifiesto(carpeta: str) -> dict:
+    ruta = os.path.join(carpeta, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {"archivos": {}}
+    try:
+        with open(ruta, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"archivos": {}}
+
+
+def guardar_manifiesto(carpeta: str, manifiesto: dict) -> None:
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, ARCHIVO_MANIFIESTO)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as fh:
+        json.dump(manifiesto, fh, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+
+
+def firma_archivo(ruta_disco: str, abrir, previa=None) -> dict:
+    """
+    Tamaño, mtime (de ruta_disco: el archivo o el .zip que lo contiene) y
+    hash del contenido que devuelve abrir(). Si tamaño y mtime coinciden con
+    la firma previa no se vuelve a leer el contenido.
+    """
+    estado = os.stat(ruta_disco)
+    if previa and previa.get("tamano") == estado.st_size and previa.get("mtime_ns") == estado.st_mtime_ns:
+        contenido = previa["contenido"]
+    else:
+        sha = hashlib.sha256()
+        with abrir() as fh:
+            for bloque in iter(lambda: fh.read(1 << 20), b""):
+                sha.update(bloque)
+        contenido = sha.hexdigest()[:24]
+    return {"tamano": estado.st_size, "mtime_ns": estado.st_mtime_ns, "contenido": contenido}
+
+
+def entrada_manifiesto(manifiesto: dict, ruta: str, firma: dict) -> dict:
+    """
+    Entrada del archivo en el manifiesto, con la firma actual. Si el
+    contenido cambió, se olvidan sus resultados guardados.
+    """
+    archivos = manifiesto.setdefault("archivos", {})
+    entrada = archivos.get(ruta)
+    if entrada is None or entrada.get("contenido") != firma["contenido"]:
+        entrada = {"modulos": {}}
+    entrada.update(firma)
+    archivos[ruta] = entrada
+    return entrada
+
+
+def resultados_guardados(carpeta: str, entrada: dict, claves: dict) -> dict:
+    """{nombre: df_out o None} de los módulos cuya clave no cambió."""
+    reutilizar = {}
+    for nombre, clave in claves.items():
+        guardado = entrada["modulos"].get(nombre)
+        if not guardado or guardado.get("clave") != clave:
+            continue
+        if guardado["resultado"] is None:
+            reutilizar[nombre] = None
+            continue
+        try:
+            reutilizar[nombre] = pd.read_pickle(os.path.join(carpeta, guardado["resultado"]))
+        except Exception:
+            continue   # falta o está dañado: se recalcula
+    return reutilizar
+
+
+def guardar_resultados(carpeta: str, entrada: dict, claves: dict, salidas: dict) -> None:
+    """Guarda {nombre: df_out o None} calculados en esta corrida."""
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, df_out in salidas.items():
+        resultado = None
+        if df_out is not None:
+            clave = f"{entrada['contenido']}|{claves[nombre]}"
+            resultado = hashlib.sha256(clave.encode()).hexdigest()[:24] + ".pkl"
+            destino = os.path.join(carpeta, resultado)
+            df_out.to_pickle(f"{destino}.tmp")
+            os.replace(f"{destino}.tmp", destino)
+        entrada["modulos"][nombre] = {"clave": claves[nombre], "resultado": resultado}
+
+
+def podar_resultados(carpeta: str, manifiesto: dict) -> None:
+    """Borra los .pkl que ya no referencia ninguna entrada del manifiesto."""
+    usados = {
+        guardado["resultado"]
+        for entrada in manifiesto.get("archivos", {}).values()
+        for guardado in entrada.get("modulos", {}).values()
+        if guardado.get("resultado")
+    }
+    if not os.path.isdir(carpeta):
+        return
+    for nombre in os.listdir(carpeta):
+        if nombre.endswith(".pkl") and nombre not in usados:
+            os.remove(os.path.join(carpeta, nombre))
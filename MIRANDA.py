@@ -1,6 +1,8 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
 
 # ============================================================
 #  Regex y funciones de normalización para LA MIRANDA / ACACIAS
@@ -177,6 +179,13 @@ def normalizar_direccion(direccion: str):
 #      FUNCIÓN ESTÁNDAR PARA USAR DESDE EL SCRIPT MAESTRO
 # ============================================================
 
+# Vocabulario del filtro MIRANDA / ACACIAS (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["MIRANDA", "ACACIAS"]
+
+# Filas que reclama este módulo: el mismo vocabulario (regex sobre DIRECCION, sin distinguir mayúsculas)
+FILTRO = "|".join(VOCABULARIO_FILTRO)
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -187,70 +196,27 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     con columnas:
       NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
     """
-
-    df = df_in.copy()
-
-    # Normalizar nombres de columnas a un mapa mayúscula
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar columna NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar columna DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar normalización
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_direccion(x))
-    )
-
-    # Filtros por barrio (igual idea que el script original)
-    filtro_miranda = df["DIRECCION"].str.contains("MIRANDA", case=False, na=False)
-    filtro_acacias = df["DIRECCION"].str.contains("ACACIAS", case=False, na=False)
-
-    df_filtrado = df[filtro_miranda | filtro_acacias].copy()
-
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
-
-    return df_filtrado[columnas_salida]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 
 # ============================================================
 #      BLOQUE OPCIONAL PARA EJECUTAR ESTE SCRIPT SOLO
 # ============================================================
 
-if __name__ == "__main__":
-    # Rutas de prueba (como en tu script actual)
-    ruta_entrada = "CICLO 49_PDIRECCION.xlsx"
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
+# Rutas de prueba (como en tu script actual)
+RUTA_ENTRADA = "CICLO 49_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+
 
-    df_local = pd.read_excel(ruta_entrada, usecols=["CLIENTE_ID", "DIRECCION"])
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
+    df_local = pd.read_excel(RUTA_ENTRADA, usecols=["CLIENTE_ID", "DIRECCION"])
     df_resultado = procesar(df_local)
 
     # Separar en hojas LA_MIRANDA y ACACIAS como antes
     filtro_miranda = df_resultado["DIRECCION"].str.contains("MIRANDA", case=False, na=False)
     filtro_acacias = df_resultado["DIRECCION"].str.contains("ACACIAS", case=False, na=False)
 
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado[filtro_miranda].to_excel(writer, sheet_name="LA_MIRANDA", index=False)
-        df_resultado[filtro_acacias].to_excel(writer, sheet_name="ACACIAS", index=False)
-
     # Estadísticas simples
     total_acacias = df_resultado[filtro_acacias].shape[0]
     normalizadas_acacias = df_resultado[filtro_acacias][
@@ -262,3 +228,11 @@ if __name__ == "__main__":
     print(f"Total ACACIAS procesadas: {total_acacias}")
     print(f"Normalizadas: {normalizadas_acacias}")
     print(f"Efectividad: {efectividad_acacias:.2f}%")
+    return {
+        "LA_MIRANDA": df_resultado[filtro_miranda],
+        "ACACIAS": df_resultado[filtro_acacias],
+    }
+
+
+if __name__ == "__main__":
+    guardar_hojas(RUTA_SALIDA, hojas_script())
@@ -1,44 +1,143 @@
 import os
+import io
+import argparse
+import zipfile
+import contextlib
 import importlib.util
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import pandas as pd
 
+from CACHE_ENTRADAS import CARPETA_CACHE_ENTRADAS, leer_con_cache
+from CACHE_NORMALIZACION import ARCHIVO_CACHE, abrir_cache, cache_de_modulo
+from ESCRITURA import FORMATOS_SALIDA, abrir_escritor, cerrar_escritor, escribir_lote, leer_salida
+from MANIFIESTO import (
+    CARPETA_RESULTADOS, cargar_manifiesto, claves_modulos, entrada_manifiesto, firma_archivo,
+    guardar_manifiesto, guardar_resultados, hash_fuentes, podar_resultados, resultados_guardados,
+)
+from COMUN import (
+    COLUMNAS_SALIDA, MEDICION_CASCADAS, TEXTO_ARROW, a_filas, armar_bloque, bloques_de, compactar,
+    factorizar_direcciones, guardar_orden_cascadas, leer_excel, leer_csv, leer_csv_por_bloques,
+    mascara_filtro, normalizar_bloque, preparar_entrada, procesar_unicas,
+    sumar_estadisticas_cascadas, tomar_estadisticas_cascadas, unir_bloques,
+)
+from ENRUTADOR import construir_enrutador, enrutar
+
 # ================== CONFIGURACIÓN ==================
 
-CARPETA_ENTRADA = "entradas"   # carpeta donde pondrás todos los Excel/CSV
+CARPETA_ENTRADA = "entradas"   # carpeta (o .zip) donde pondrás todos los Excel/CSV
 ARCHIVO_SALIDA = "CICLOS_PROCESADOS_UNIFICADO.xlsx"
 HOJA_SALIDA = "NORMALIZADAS"
+FORMATO_SALIDA = "xlsx"        # xlsx / csv / parquet (ver ESCRITURA.py)
 
 EXT_PERMITIDAS = {".xlsx", ".xls", ".csv"}
 
+# Caché persistente (SQLite) de normalizaciones entre ciclos; ver CACHE_NORMALIZACION.py
+USAR_CACHE = True
+
+# Caché columnar de los Excel de entrada (ya proyectados a NIU/DIRECCION) por
+# tamaño, mtime y hash del contenido; ver CACHE_ENTRADAS.py
+USAR_CACHE_ENTRADAS = True
+
+# Corridas incrementales: los resultados de cada (archivo, módulo) se guardan
+# con el hash del archivo y del código; si no cambiaron se reutilizan y solo
+# se vuelve a armar el libro unificado. Ver MANIFIESTO.py
+USAR_MANIFIESTO = True
+
+# Resultados en memoria con texto en arrays de Arrow (requiere pyarrow) y
+# VALIDACION categórica; ver compactar() en COMUN.py
+COMPACTAR_RESULTADOS = False
+
+# Orden aprendido de las cascadas de regex (--aprender-orden): al final de la
+# corrida se acumulan en ORDEN_CASCADAS.json los aciertos/tiempo por patrón y
+# se reordenan los grupos conmutables para la siguiente; ver despacho_cascada()
+# en COMUN.py. Apagado por defecto: medir cuesta tiempo en cada regex.
+APRENDER_ORDEN_CASCADAS = False
+
+# Código compartido que entra en la clave de todos los resultados guardados:
+# lectura de entradas (CACHE_ENTRADAS), enrutado, arbitraje y escritura
+FUENTES_COMPARTIDAS = ["COMUN.py", "ENRUTADOR.py", "ORQUESTADOR.py", "CACHE_ENTRADAS.py", "ESCRITURA.py"]
+
+# Arbitraje de propiedad: los módulos se evalúan en este orden de prioridad y
+# una dirección que un módulo ya normalizó (VALIDACION='1') no la reclaman los
+# siguientes. Los alias que no aparezcan van al final, en el orden de SCRIPTS.
+# La salida conserva el orden de SCRIPTS. None = sin arbitraje.
+PRIORIDAD_MODULOS = [
+    # barrios / urbanizaciones específicas
+    "CECILIA", "25MAYO", "ARCOIRIS", "CDORADA", "CIBELES",
+    "COLINAS", "MIRANDA", "QMARINA", "RECREO",
+    "MAIN_MERCAR_ARMENIA",
+    # cascadas genéricas CLL/CR y CRA/CL
+    "CHAMBRANA", "CENTROCLL", "RPINILLA", "ISABELLA",
+]
+
 # nombre_amigable, archivo_py
 SCRIPTS = [
-    ("MAIN_MERCAR_ARMENIA", "main.py"),      # <--- este
-    ("25MAYO",              "25mayo.py"),
-    ("CECILIA",             "CecMain.py"),
-    ("ARCOIRIS",            "Arcoiris.py"),
-    ("CDORADA",             "CDorada.py"),
-    ("CENTROCLL",           "centro29cll.py"),
-    ("CHAMBRANA",           "chambranas.py"),
-    ("CIBELES",             "cibeles.py"),
-    ("COLINAS",             "colinas.py"),
-    ("ISABELLA",            "Isabella.py"),
-    ("MIRANDA",             "miranda.py"),
-    ("QMARINA",             "Qmarina.py"),
-    ("RECREO",              "recreo.py"),
-    ("RPINILLA",            "Rpinilla.py"),
+    ("MAIN_MERCAR_ARMENIA", "MAIN.py"),      # <--- este
+    ("25MAYO",              "25MAYO.py"),
+    ("CECILIA",             "CECMAIN.py"),
+    ("ARCOIRIS",            "ARCOIRIS.py"),
+    ("CDORADA",             "CDORADA.py"),
+    ("CENTROCLL",           "CENTROCLL.py"),
+    ("CHAMBRANA",           "CHAMBRANA.py"),
+    ("CIBELES",             "CIBELES.py"),
+    ("COLINAS",             "COLINAS.py"),
+    ("ISABELLA",            "ISABELLA.py"),
+    ("MIRANDA",             "MIRANDA.py"),
+    ("QMARINA",             "QMARINA.py"),
+    ("RECREO",              "RECREO.py"),
+    ("RPINILLA",            "RPINILLA.py"),
 ]
 
 # ================== HELPERS ==================
 
+def separar_ruta_zip(path: str):
+    """
+    Los miembros de un .zip se nombran como '<archivo.zip>/<miembro>'.
+    Devuelve (ruta_zip, miembro) o None si path no está dentro de un .zip.
+    """
+    marca = ".zip" + os.sep
+    inicio = 0
+    while True:
+        i = path.lower().find(marca, inicio)
+        if i < 0:
+            return None
+        ruta_zip = path[:i + 4]
+        if os.path.isfile(ruta_zip):
+            return ruta_zip, path[i + len(marca):].replace(os.sep, "/")
+        inicio = i + 1
+
+def listar_zip(ruta_zip: str):
+    """Rutas '<archivo.zip>/<miembro>' de los miembros del .zip (sin carpetas)."""
+    with zipfile.ZipFile(ruta_zip) as zf:
+        miembros = [m for m in zf.namelist() if not m.endswith("/")]
+    return [ruta_zip + os.sep + m.replace("/", os.sep) for m in miembros]
+
 def leer_entrada_flexible(path: str) -> pd.DataFrame:
+    """
+    Lee solo las columnas NIU/CLIENTE_ID y DIRECCION (es_columna_entrada);
+    las demás columnas del ciclo no se convierten a texto. Los CSV se leen
+    una sola vez con el dialecto detectado (ver COMUN.leer_csv); los Excel
+    pasan por la caché de entradas si USAR_CACHE_ENTRADAS. Los miembros de
+    un .zip se descomprimen en memoria, sin escribir nada a disco.
+    """
     ext = os.path.splitext(path)[1].lower()
+    en_zip = separar_ruta_zip(path)
+    if en_zip is not None and ext in EXT_PERMITIDAS:
+        ruta_zip, miembro = en_zip
+        with zipfile.ZipFile(ruta_zip) as zf:
+            datos = zf.read(miembro)
+        if ext == ".csv":
+            return leer_csv(datos)
+        return leer_excel(datos)
+
     if ext in [".xlsx", ".xls"]:
-        return pd.read_excel(path, dtype=str)
+        if USAR_CACHE_ENTRADAS:
+            carpeta = os.path.join(os.path.dirname(os.path.abspath(__file__)), CARPETA_CACHE_ENTRADAS)
+            return leer_con_cache(path, leer_excel, carpeta)
+        return leer_excel(path)
     elif ext == ".csv":
-        df = pd.read_csv(path, dtype=str, sep=";")
-        if df.shape[1] == 1:
-            df = pd.read_csv(path, dtype=str, sep=",")
-        return df
+        return leer_csv(path)
     else:
         raise ValueError(f"Extensión no soportada: {ext}")
 
@@ -69,91 +168,1104 @@ def cargar_scripts_normalizacion(base_dir: str):
         print(f"✅ Script cargado: {archivo} (alias: {nombre})")
     return modulos
 
-def procesar_archivo_con_modulos(ruta_archivo: str, modulos):
-    print(f"\n📂 Procesando archivo: {os.path.basename(ruta_archivo)}")
+def preparar_archivo(ruta_archivo: str, enrutador=None, delta=None, compacto=False):
+    """
+    Lee un archivo, resuelve NIU/DIRECCION, factoriza DIRECCION y enruta
+    sus direcciones únicas. Los módulos reciben solo el DataFrame angosto
+    NIU/DIRECCION (archivo["df"]). Devuelve (archivo, mensajes); archivo es None
+    si no se pudo leer. Con delta (modo --delta), archivo["df"] trae solo las
+    filas que se normalizan de nuevo, archivo["arrastradas"] las filas de la
+    salida anterior que se conservan y archivo["sin_reclamar"] las claves que
+    ningún módulo reclamó antes y se saltan. Con compacto, el texto del archivo
+    y de los resultados se guarda con compactar().
+    """
     try:
         df_in = leer_entrada_flexible(ruta_archivo)
     except Exception as e:
-        print(f"❌ Error leyendo {ruta_archivo}: {e}")
-        return pd.DataFrame(columns=["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"])
+        return None, [f"❌ Error leyendo {ruta_archivo}: {e}"]
 
-    resultados = []
-    for nombre, modulo in modulos:
-        try:
-            df_out = modulo.procesar(df_in)
-        except Exception as e:
-            print(f"   ⚠️ Error en procesar() de {nombre}: {e}")
-            continue
+    try:
+        df = preparar_entrada(df_in)
+    except ValueError as e:
+        return None, [f"❌ {os.path.basename(ruta_archivo)}: {e}"]
 
-        if df_out is None or df_out.empty:
-            print(f"   ➖ {nombre}: 0 filas")
-            continue
+    mensajes = []
+    arrastradas = sin_reclamar = None
+    if delta is not None:
+        df, arrastradas, sin_reclamar = separar_delta(df, delta, enrutador)
+        mensajes.append(
+            f"   🔺 Delta: {len(df)} filas a normalizar, {len(arrastradas)} filas de la salida anterior, "
+            f"{len(sin_reclamar)} sin módulo en la corrida anterior"
+        )
 
-        columnas_esperadas = {"NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"}
-        if not columnas_esperadas.issubset(df_out.columns):
-            print(f"   ⚠️ {nombre}: faltan columnas estándar, se omite.")
-            continue
+    if compacto:
+        df = compactar(df)
+
+    # DIRECCION se factoriza una sola vez: filtros y normalizadores corren
+    # por dirección única y el resultado se reparte a las filas por código
+    codigos, unicas = factorizar_direcciones(df)
+
+    # Una sola pasada de palabras clave (sobre las únicas): cada módulo
+    # recibe solo sus direcciones candidatas
+    mascaras = enrutar(unicas.to_frame("DIRECCION"), enrutador)
+
+    archivo = {"df": df, "codigos": codigos, "unicas": unicas, "mascaras": mascaras, "compacto": compacto}
+    if arrastradas is not None:
+        archivo["arrastradas"] = arrastradas
+        archivo["sin_reclamar"] = sin_reclamar
+    return archivo, [f"   🔁 {len(df)} filas, {len(unicas)} direcciones únicas"] + mensajes
+
+def candidatas_modulo(archivo: dict, nombre: str, propias=None):
+    """
+    Máscara de direcciones únicas que evalúa el módulo: las del enrutador
+    menos las propias de módulos de mayor prioridad (None = todas).
+    """
+    candidatas = None
+    if nombre in archivo["mascaras"]:
+        candidatas = archivo["mascaras"][nombre].to_numpy()
+    if propias is not None and propias.any():
+        candidatas = ~propias if candidatas is None else candidatas & ~propias
+    return candidatas
+
+def ejecutar_modulo(nombre: str, modulo, archivo: dict, cache=None, propias=None):
+    """
+    Corre un módulo sobre un archivo preparado. Devuelve (df_out, mensaje);
+    df_out es None si el módulo no aporta filas. propias (opcional) marca
+    las direcciones únicas que ya tomó un módulo de mayor prioridad.
+    """
+    candidatas = candidatas_modulo(archivo, nombre, propias)
+    if candidatas is not None and not candidatas.any():
+        return None, f"   ➖ {nombre}: 0 filas"
+
+    bloques = bloques_de(modulo)
+    try:
+        if bloques is not None:
+            df_out = procesar_unicas(
+                archivo["df"], archivo["codigos"], archivo["unicas"], bloques, candidatas, cache
+            )
+        elif candidatas is not None:
+            df_out = modulo.procesar(archivo["df"][a_filas(candidatas, archivo["codigos"])])
+        else:
+            df_out = modulo.procesar(archivo["df"])
+    except Exception as e:
+        return None, f"   ⚠️ Error en procesar() de {nombre}: {e}"
+
+    return revisar_salida(nombre, df_out, archivo.get("compacto", False))
+
+def revisar_salida(nombre: str, df_out, compacto=False):
+    if df_out is None or df_out.empty:
+        return None, f"   ➖ {nombre}: 0 filas"
+
+    columnas_esperadas = {"NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"}
+    if not columnas_esperadas.issubset(df_out.columns):
+        return None, f"   ⚠️ {nombre}: faltan columnas estándar, se omite."
+
+    if compacto:
+        df_out = compactar(df_out)
+    return df_out, f"   ✅ {nombre}: {len(df_out)} filas"
+
+def ordenar_por_prioridad(modulos, prioridad):
+    """Módulos en el orden de prioridad (los no listados al final, en orden de SCRIPTS)."""
+    if prioridad is None:
+        return list(modulos)
+    rango = {nombre: k for k, nombre in enumerate(prioridad)}
+    return sorted(modulos, key=lambda item: rango.get(item[0], len(rango)))
 
-        resultados.append(df_out)
-        print(f"   ✅ {nombre}: {len(df_out)} filas")
+def marcar_propias(propias, unicas, df_out: pd.DataFrame):
+    """Agrega a propias las direcciones que df_out dejó con VALIDACION='1'."""
+    validadas = df_out.loc[df_out["VALIDACION"].astype(str) == "1", "DIRECCION"]
+    return propias | unicas.isin(validadas).to_numpy()
 
+def es_error(mensaje: str) -> bool:
+    return mensaje.lstrip().startswith("⚠️")
+
+def mensaje_reutilizado(nombre: str, df_out) -> str:
+    filas = 0 if df_out is None else len(df_out)
+    return f"   ♻️ {nombre}: {filas} filas (sin cambios)"
+
+def unir_resultados(resultados) -> pd.DataFrame:
     if resultados:
         return pd.concat(resultados, ignore_index=True)
     else:
         return pd.DataFrame(columns=["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"])
 
+def procesar_archivo_con_modulos(
+    ruta_archivo: str, modulos, enrutador=None, caches=None, prioridad=None, reutilizar=None, calculadas=None,
+    delta=None, compacto=False, sin_reclamar=None,
+):
+    """
+    reutilizar (opcional): {nombre: df_out o None} guardados de una corrida
+    anterior; esos módulos no se vuelven a correr y, si son todos, el archivo
+    ni se lee. calculadas (opcional) se llena con {nombre: df_out o None} de
+    los módulos que sí corrieron sin error. delta (opcional, ver
+    cargar_delta): solo se normalizan las filas nuevas o cambiadas.
+    sin_reclamar (opcional, lista): se le agregan las claves NIU/DIRECCION
+    del archivo que se intentaron y ningún módulo reclamó (ver --delta).
+    """
+    print(f"\n📂 Procesando archivo: {os.path.basename(ruta_archivo)}")
+    reutilizar = reutilizar or {}
+    archivo = None
+    if len(reutilizar) < len(modulos):
+        archivo, mensajes = preparar_archivo(ruta_archivo, enrutador, delta, compacto)
+        for mensaje in mensajes:
+            print(mensaje)
+        if archivo is None:
+            return unir_resultados([])
+        if sin_reclamar is not None and "sin_reclamar" in archivo:
+            sin_reclamar.append(archivo["sin_reclamar"])
+        if archivo["df"].empty and "arrastradas" in archivo:
+            return archivo["arrastradas"]
+    else:
+        print("   ♻️ Sin cambios: se reutilizan los resultados guardados")
+
+    # Con prioridad, cada módulo salta las direcciones ya validadas por otro
+    propias = None
+    if prioridad is not None and archivo is not None:
+        propias = np.zeros(len(archivo["unicas"]), dtype=bool)
+    salidas = {}
+    for nombre, modulo in ordenar_por_prioridad(modulos, prioridad):
+        if nombre in reutilizar:
+            salidas[nombre] = (reutilizar[nombre], mensaje_reutilizado(nombre, reutilizar[nombre]))
+        else:
+            cache = caches.get(nombre) if caches else None
+            salidas[nombre] = ejecutar_modulo(nombre, modulo, archivo, cache, propias)
+            if calculadas is not None and not es_error(salidas[nombre][1]):
+                calculadas[nombre] = salidas[nombre][0]
+        df_out = salidas[nombre][0]
+        if propias is not None and df_out is not None:
+            propias = marcar_propias(propias, archivo["unicas"], df_out)
+
+    resultados = []
+    if archivo is not None and "arrastradas" in archivo:
+        resultados.append(archivo["arrastradas"])
+    for nombre, _ in modulos:
+        df_out, mensaje = salidas[nombre]
+        print(mensaje)
+        if df_out is not None:
+            resultados.append(df_out)
+
+    # Solo cuenta como intentado sin reclamar si todos los módulos corrieron sin error
+    if sin_reclamar is not None and archivo is not None and not any(es_error(m) for _, m in salidas.values()):
+        claves = claves_delta(archivo["df"])
+        reclamadas = [claves_delta(df_out) for df_out, _ in salidas.values() if df_out is not None]
+        if reclamadas:
+            claves = claves[~claves.isin(pd.concat(reclamadas))]
+        sin_reclamar.append(claves)
+
+    return unir_resultados(resultados)
+
+# ================== EJECUCIÓN EN PARALELO (--workers N) ==================
+
+# Estado de cada proceso worker (lo llena _inicializar_worker)
+_WORKER = {}
+
+def _inicializar_worker(base_dir: str, usar_cache: bool, compacto: bool = False, medir: bool = False):
+    """Cada worker carga los módulos, el enrutador y su conexión a la caché una sola vez."""
+    MEDICION_CASCADAS["activa"] = medir
+    with contextlib.redirect_stdout(io.StringIO()):
+        modulos = cargar_scripts_normalizacion(base_dir)
+    _WORKER["modulos"] = dict(modulos)
+    _WORKER["enrutador"] = construir_enrutador(modulos)
+    _WORKER["caches"] = {}
+    _WORKER["compacto"] = compacto
+    if usar_cache:
+        conexion = abrir_cache(os.path.join(base_dir, ARCHIVO_CACHE))
+        _WORKER["caches"] = {
+            nombre: cache_de_modulo(conexion, nombre, modulo, purgar=False)
+            for nombre, modulo in modulos
+        }
+
+def _tarea_preparar(ruta_archivo: str):
+    return preparar_archivo(ruta_archivo, _WORKER["enrutador"], compacto=_WORKER["compacto"])
+
+def _tarea_modulo(nombre: str, archivo: dict):
+    cache = _WORKER["caches"].get(nombre)
+    antes = (cache["aciertos"], cache["nuevas"]) if cache else (0, 0)
+    df_out, mensaje = ejecutar_modulo(nombre, _WORKER["modulos"][nombre], archivo, cache)
+    despues = (cache["aciertos"], cache["nuevas"]) if cache else (0, 0)
+    return df_out, mensaje, despues[0] - antes[0], despues[1] - antes[1], tomar_estadisticas_cascadas()
+
+def _tarea_bloques(nombre: str, unicas):
+    """
+    Fase por dirección de los bloques de un módulo del contrato sobre un
+    fragmento de sus direcciones candidatas (todas se evalúan). Devuelve por
+    bloque (reclamadas, normalizadas, validaciones) del largo del fragmento,
+    más los contadores de caché y las estadísticas de las cascadas de regex
+    (se suman en el proceso principal).
+    """
+    cache = _WORKER["caches"].get(nombre)
+    antes = (cache["aciertos"], cache["nuevas"]) if cache else (0, 0)
+    salida = [normalizar_bloque(unicas, bq, None, cache) for bq in bloques_de(_WORKER["modulos"][nombre])]
+    despues = (cache["aciertos"], cache["nuevas"]) if cache else (0, 0)
+    return salida, despues[0] - antes[0], despues[1] - antes[1], tomar_estadisticas_cascadas()
+
+def fragmentar_candidatas(archivo: dict, nombre: str, propias, fragmentos: int):
+    """
+    Posiciones de las direcciones únicas que evalúa el módulo (las del
+    enrutador que no tomó un módulo de mayor prioridad), partidas en
+    fragmentos contiguos no vacíos.
+    """
+    candidatas = candidatas_modulo(archivo, nombre, propias)
+    if candidatas is None:
+        posiciones = np.arange(len(archivo["unicas"]))
+    else:
+        posiciones = np.flatnonzero(candidatas)
+    return [p for p in np.array_split(posiciones, fragmentos) if len(p)]
+
+def reducir_fragmentos(archivo: dict, nombre: str, modulo, cortes, resultados_fragmentos):
+    """
+    Paso de reducción: devuelve cada fragmento a sus posiciones en las
+    direcciones únicas del archivo y corre la fase de archivo completo
+    (reparto a filas, FILTRO_SALIDA y finalizar(), p.ej. la regla de
+    duplicados de CENTROCLL/CHAMBRANA).
+    """
+    if not cortes:
+        return revisar_salida(nombre, None)
+
+    posiciones = np.concatenate(cortes)
+    total = len(archivo["unicas"])
+    bloques = bloques_de(modulo)
+    partes = []
+    for k, bq in enumerate(bloques):
+        reclamadas = np.zeros(total, dtype=bool)
+        normalizadas = np.empty(total, dtype=object)
+        validaciones = np.empty(total, dtype=object)
+        trozos = [r[k] for r in resultados_fragmentos]
+        for destino, col in zip((reclamadas, normalizadas, validaciones), zip(*trozos)):
+            destino[posiciones] = np.concatenate(col)
+        try:
+            partes.append(armar_bloque(
+                archivo["df"], bq, archivo["codigos"], reclamadas, normalizadas, validaciones
+            ))
+        except Exception as e:
+            return None, f"   ⚠️ Error en procesar() de {nombre}: {e}"
+    return revisar_salida(nombre, unir_bloques(partes, len(bloques)), archivo.get("compacto", False))
+
+def recortar_archivo(archivo: dict, nombre: str) -> dict:
+    """
+    Copia del archivo preparado con solo las filas candidatas del módulo,
+    para no enviar el archivo completo a cada worker.
+    """
+    if nombre not in archivo["mascaras"]:
+        return archivo
+    filas = a_filas(archivo["mascaras"][nombre].to_numpy(), archivo["codigos"])
+    df = archivo["df"][filas]
+    codigos, unicas = factorizar_direcciones(df)
+    return {
+        "df": df, "codigos": codigos, "unicas": unicas, "mascaras": {},
+        "compacto": archivo.get("compacto", False),
+    }
+
+def procesar_en_paralelo(
+    rutas,
+    modulos,
+    base_dir: str,
+    workers: int,
+    usar_cache: bool,
+    fragmentos: int = 1,
+    prioridad=None,
+    emitir=None,
+    reutilizar=None,
+    guardar=None,
+    compacto=False,
+):
+    """
+    Corre la lectura de cada archivo y luego sus módulos en un
+    ProcessPoolExecutor. Cada módulo del contrato envía a los workers solo
+    sus direcciones candidatas, partidas en fragmentos contiguos (uno por
+    trabajo con fragmentos=1), y el paso de archivo completo se hace al
+    reducir; los módulos sin contrato corren como trabajos (archivo, módulo).
+    Con arbitraje de propiedad (prioridad), los módulos de cada archivo van
+    de a uno en el orden de prioridad: cada uno se envía cuando volvió el
+    anterior y sin las direcciones que este ya tomó, igual que en serie (los
+    sin contrato corren en este proceso). Los archivos avanzan a la vez.
+    Los resultados y mensajes se unen en el mismo orden que la ejecución en
+    serie, así que el Excel final es idéntico. Con emitir, el resultado de
+    cada archivo se le pasa apenas está listo (p.ej. al escritor de salida)
+    en vez de acumularse. reutilizar es como en procesar_archivo_con_modulos,
+    indexado por posición del archivo en rutas; con guardar, se llama
+    guardar(i, {nombre: df_out o None}) con lo que se calculó sin error.
+    Devuelve (resultados por archivo, aciertos de caché, nuevas en caché).
+    """
+    nombres = [nombre for nombre, _ in modulos]
+    con_contrato = {nombre for nombre, modulo in modulos if bloques_de(modulo) is not None}
+    if prioridad is None:
+        tramos = [list(modulos)]
+    else:
+        tramos = [[item] for item in ordenar_por_prioridad(modulos, prioridad)]
+    reutilizar = reutilizar or {}
+    sin_cambios = {i for i, guardados in reutilizar.items() if len(guardados) == len(modulos)}
+    mensajes_archivo = {}
+    # Por archivo: tramo en curso, propias, salidas, calculadas y trabajos pendientes
+    estados = {}
+    listos = set()
+    contadores = {"aciertos": 0, "nuevas": 0}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_inicializar_worker,
+        initargs=(base_dir, usar_cache, compacto, MEDICION_CASCADAS["activa"]),
+    ) as pool:
+        pendientes = {}
+
+        def lanzar_tramo(i):
+            """Envía los módulos del tramo en curso del archivo i (o los resuelve aquí)."""
+            estado = estados[i]
+            archivo = estado["archivo"]
+            guardados = reutilizar.get(i, {})
+            for nombre, modulo in tramos[estado["tramo"]]:
+                if nombre in guardados:
+                    guardado = guardados[nombre]
+                    estado["salidas"][nombre] = (guardado, mensaje_reutilizado(nombre, guardado))
+                elif nombre not in con_contrato:
+                    if prioridad is not None:
+                        # Depende de las direcciones ya tomadas: corre en este proceso
+                        estado["salidas"][nombre] = ejecutar_modulo(
+                            nombre, modulo, archivo, None, estado["propias"]
+                        )
+                    else:
+                        futuro = pool.submit(_tarea_modulo, nombre, recortar_archivo(archivo, nombre))
+                        pendientes[futuro] = (i, nombre)
+                        estado["esperando"][nombre] = [futuro]
+                else:
+                    cortes = fragmentar_candidatas(archivo, nombre, estado["propias"], fragmentos)
+                    estado["cortes"][nombre] = cortes
+                    estado["esperando"][nombre] = []
+                    for posiciones in cortes:
+                        futuro = pool.submit(_tarea_bloques, nombre, archivo["unicas"].iloc[posiciones])
+                        pendientes[futuro] = (i, nombre)
+                        estado["esperando"][nombre].append(futuro)
+                    if not cortes:
+                        del estado["esperando"][nombre]
+                        estado["salidas"][nombre] = reducir_fragmentos(archivo, nombre, modulo, cortes, [])
+
+        def cerrar_tramos(i):
+            """Mientras el tramo en curso del archivo i no espere trabajos, lo cierra y lanza el siguiente."""
+            estado = estados[i]
+            while not estado["esperando"]:
+                for nombre, _ in tramos[estado["tramo"]]:
+                    df_out, mensaje = estado["salidas"][nombre]
+                    if nombre not in reutilizar.get(i, {}) and not es_error(mensaje):
+                        estado["calculadas"][nombre] = df_out
+                    if estado["propias"] is not None and df_out is not None:
+                        unicas = estado["archivo"]["unicas"]
+                        estado["propias"] = marcar_propias(estado["propias"], unicas, df_out)
+                estado["tramo"] += 1
+                if estado["tramo"] == len(tramos):
+                    listos.add(i)
+                    return
+                lanzar_tramo(i)
+
+        def recibir(futuro):
+            """Guarda el resultado de un trabajo de módulo; si era el último de su módulo, lo reduce."""
+            i, nombre = pendientes.pop(futuro)
+            estado = estados.get(i)
+            if estado is None or futuro not in estado["esperando"].get(nombre, ()):
+                # Fragmento de un módulo que ya se descartó por error
+                return
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # Un fragmento fallido descarta el módulo entero del archivo
+                for otro in estado["esperando"].pop(nombre):
+                    otro.cancel()
+                estado["salidas"][nombre] = (None, f"   ⚠️ Error en el worker de {nombre}: {e}")
+                return
+            *salida, a, n, estadisticas = resultado
+            sumar_estadisticas_cascadas(estadisticas)
+            contadores["aciertos"] += a
+            contadores["nuevas"] += n
+            estado["resultados"].setdefault(nombre, {})[futuro] = salida
+            if len(estado["resultados"][nombre]) < len(estado["esperando"][nombre]):
+                return
+            futuros = estado["esperando"].pop(nombre)
+            if nombre not in con_contrato:
+                estado["salidas"][nombre] = tuple(estado["resultados"][nombre][futuros[0]])
+            else:
+                estado["salidas"][nombre] = reducir_fragmentos(
+                    estado["archivo"], nombre, dict(modulos)[nombre], estado["cortes"][nombre],
+                    [estado["resultados"][nombre][f][0] for f in futuros],
+                )
+
+        def iniciar(i, archivo):
+            """Arranca el primer tramo de módulos del archivo i (archivo None si no cambió)."""
+            propias = None
+            if prioridad is not None and archivo is not None:
+                propias = np.zeros(len(archivo["unicas"]), dtype=bool)
+            estados[i] = {
+                "archivo": archivo, "tramo": 0, "propias": propias, "salidas": {}, "calculadas": {},
+                "esperando": {}, "resultados": {}, "cortes": {},
+            }
+            lanzar_tramo(i)
+            cerrar_tramos(i)
+
+        for i, ruta in enumerate(rutas):
+            if i in sin_cambios:
+                mensajes_archivo[i] = ["   ♻️ Sin cambios: se reutilizan los resultados guardados"]
+            else:
+                pendientes[pool.submit(_tarea_preparar, ruta)] = (i, None)
+
+        for i in sorted(sin_cambios):
+            iniciar(i, None)
+
+        todos = []
+        siguiente = 0
+        while siguiente < len(rutas):
+            # Los archivos se informan y emiten en el orden de rutas
+            while siguiente in listos:
+                i = siguiente
+                siguiente += 1
+                print(f"\n📂 Procesando archivo: {os.path.basename(rutas[i])}")
+                for mensaje in mensajes_archivo[i]:
+                    print(mensaje)
+                if i not in estados:
+                    continue
+                estado = estados.pop(i)
+                if guardar is not None and estado["calculadas"]:
+                    guardar(i, estado["calculadas"])
+
+                resultados = []
+                for nombre in nombres:
+                    df_out, mensaje = estado["salidas"][nombre]
+                    print(mensaje)
+                    if df_out is not None:
+                        resultados.append(df_out)
+
+                df_archivo = unir_resultados(resultados)
+                if df_archivo.empty:
+                    continue
+                if emitir is not None:
+                    emitir(df_archivo)
+                else:
+                    todos.append(df_archivo)
+            if siguiente == len(rutas):
+                break
+
+            hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                i, nombre = pendientes[futuro]
+                if nombre is not None:
+                    recibir(futuro)
+                    if i in estados and i not in listos:
+                        cerrar_tramos(i)
+                    continue
+                del pendientes[futuro]
+                archivo, mensajes_archivo[i] = futuro.result()
+                if archivo is None:
+                    listos.add(i)
+                else:
+                    iniciar(i, archivo)
+
+    return todos, contadores["aciertos"], contadores["nuevas"]
+
+# ================== CORRIDAS INCREMENTALES ==================
+
+def iniciar_incremental(base_dir: str, modulos, prioridad=None) -> dict:
+    """Carga el manifiesto y calcula la clave de cada módulo para esta corrida."""
+    carpeta = os.path.join(base_dir, CARPETA_RESULTADOS)
+    firma_compartida = hash_fuentes(os.path.join(base_dir, f) for f in FUENTES_COMPARTIDAS)
+    orden = ordenar_por_prioridad(modulos, prioridad)
+    return {
+        "carpeta": carpeta,
+        "manifiesto": cargar_manifiesto(carpeta),
+        "claves": claves_modulos(modulos, orden, prioridad, firma_compartida),
+        "reutilizados": 0,
+        "calculados": 0,
+    }
+
+def firma_entrada(ruta: str, previa=None) -> dict:
+    """Firma de un archivo de la carpeta o de un miembro de .zip (tamaño/mtime del .zip)."""
+    en_zip = separar_ruta_zip(ruta)
+    ruta_disco = ruta if en_zip is None else en_zip[0]
+    return firma_archivo(ruta_disco, abrir_entrada(ruta), previa)
+
+def resultados_previos(incremental: dict, ruta: str):
+    """
+    Devuelve (entrada del manifiesto, {nombre: df_out o None}) con los
+    resultados guardados que siguen vigentes para el archivo.
+    """
+    ruta = os.path.abspath(ruta)
+    previa = incremental["manifiesto"]["archivos"].get(ruta)
+    try:
+        firma = firma_entrada(ruta, previa)
+    except Exception as e:
+        print(f"   ⚠️ No se pudo calcular el hash de {os.path.basename(ruta)}: {e}")
+        return None, {}
+    entrada = entrada_manifiesto(incremental["manifiesto"], ruta, firma)
+    guardados = resultados_guardados(incremental["carpeta"], entrada, incremental["claves"])
+    incremental["reutilizados"] += len(guardados)
+    return entrada, guardados
+
+def guardar_calculadas(incremental: dict, entrada, calculadas: dict) -> None:
+    if entrada is None or not calculadas:
+        return
+    incremental["calculados"] += len(calculadas)
+    try:
+        guardar_resultados(incremental["carpeta"], entrada, incremental["claves"], calculadas)
+        guardar_manifiesto(incremental["carpeta"], incremental["manifiesto"])
+    except Exception as e:
+        print(f"   ⚠️ No se pudieron guardar los resultados para la próxima corrida: {e}")
+
+def cerrar_incremental(incremental: dict) -> None:
+    try:
+        guardar_manifiesto(incremental["carpeta"], incremental["manifiesto"])
+        podar_resultados(incremental["carpeta"], incremental["manifiesto"])
+    except Exception as e:
+        print(f"   ⚠️ No se pudo actualizar el manifiesto: {e}")
+
+# ================== MODO DELTA (--delta) ==================
+# Entre dos corridas del mismo ciclo casi todos los pares NIU -> DIRECCION
+# son iguales. Con --delta se toma la salida anterior (xlsx/csv/parquet) y
+# las filas cuyo par (NIU, DIRECCION) ya aparece en ella conservan sus filas
+# de salida (DIRECCION_NORMALIZADA/VALIDACION de todos los módulos); los
+# pares que la corrida anterior intentó y ningún módulo reclamó (guardados
+# junto a la salida, ver ruta_sin_reclamar) se saltan. Solo las filas nuevas
+# y las que cambiaron de dirección se pasan por los módulos, más las que
+# finalizar() podría cambiar: esas reglas ven todas las filas del módulo en
+# el archivo y la salida anterior no guarda lo que revirtieron. Se recalculan
+# las filas que un módulo con finalizar() podría reclamar y que en la salida
+# anterior quedaron con VALIDACION "0" y la DIRECCION original (posible
+# reversión) o con una DIRECCION_NORMALIZADA que su retener() marca (p.ej.
+# las bases genéricas de CENTROCLL/CHAMBRANA); sin retener(), todas las que
+# podría reclamar.
+# Supone que los módulos no cambiaron desde la corrida anterior.
+
+SUFIJO_SIN_RECLAMAR = ".sin_reclamar.pkl"
+
+def claves_delta(df: pd.DataFrame) -> pd.Series:
+    return df["NIU"].astype(str) + "\x1f" + df["DIRECCION"].astype(str)
+
+def ruta_sin_reclamar(ruta_salida: str) -> str:
+    """Archivo con las claves intentadas sin reclamar de la corrida que escribió ruta_salida."""
+    return ruta_salida + SUFIJO_SIN_RECLAMAR
+
+def firma_salida(ruta_salida: str) -> list:
+    estado = os.stat(ruta_salida)
+    return [estado.st_size, estado.st_mtime_ns]
+
+def guardar_sin_reclamar(ruta_salida: str, claves) -> None:
+    """
+    Guarda junto a la salida las claves que se intentaron y ningún módulo
+    reclamó, con la firma de la salida para no usarlas con otra.
+    """
+    claves = pd.concat(claves, ignore_index=True).drop_duplicates() if claves else pd.Series(dtype=str)
+    pd.to_pickle({"salida": firma_salida(ruta_salida), "claves": claves}, ruta_sin_reclamar(ruta_salida))
+
+def cargar_sin_reclamar(ruta_salida: str) -> pd.Series:
+    """Claves intentadas sin reclamar de la salida (vacío si no hay o son de otra salida)."""
+    ruta = ruta_sin_reclamar(ruta_salida)
+    if os.path.exists(ruta):
+        try:
+            guardadas = pd.read_pickle(ruta)
+            if guardadas["salida"] == firma_salida(ruta_salida):
+                return guardadas["claves"]
+        except Exception as e:
+            nombre = os.path.basename(ruta_salida)
+            print(f"   ⚠️ No se pudieron leer las claves sin reclamar de {nombre}: {e}")
+    return pd.Series(dtype=str)
+
+def cargar_delta(ruta_previa: str, modulos, compacto=False) -> dict:
+    previa = leer_salida(ruta_previa, HOJA_SALIDA)
+    faltan = [c for c in COLUMNAS_SALIDA if c not in previa.columns]
+    if faltan:
+        raise ValueError(f"La salida anterior no tiene las columnas {', '.join(faltan)}")
+    previa = previa[COLUMNAS_SALIDA]
+    if compacto:
+        previa = compactar(previa)
+    claves = claves_delta(previa)
+    # finalizar() revierte a la DIRECCION original con VALIDACION "0"
+    revertidas = (
+        (previa["VALIDACION"].astype(str) == "0")
+        & (previa["DIRECCION_NORMALIZADA"].astype(str) == previa["DIRECCION"].astype(str))
+    ).to_numpy()
+    # Bloques con finalizar() y las claves de la salida anterior que podría
+    # cambiar (None = todas; también para un módulo sin contrato, cuyo
+    # procesar() puede ver todo el archivo)
+    finalizan = []
+    for nombre, modulo in modulos:
+        bloques = bloques_de(modulo)
+        if bloques is None:
+            finalizan.append((nombre, None, None))
+        for bq in bloques or []:
+            if bq["finalizar"] is None:
+                continue
+            dudosas = None
+            if bq["retener"] is not None:
+                dudosas = claves[revertidas | np.asarray(bq["retener"](previa), dtype=bool)]
+            finalizan.append((nombre, bq, dudosas))
+    return {
+        "previa": previa,
+        "claves": claves,
+        "sin_reclamar": cargar_sin_reclamar(ruta_previa),
+        "finalizan": finalizan,
+        "usadas": np.zeros(len(previa), dtype=bool),
+        "reutilizadas": 0,
+        "recalculadas": 0,
+    }
+
+def filas_de_finalizar(df: pd.DataFrame, claves: pd.Series, conocidas, delta: dict, enrutador=None):
+    """
+    Máscara de las filas conocidas que finalizar() podría cambiar: las que
+    un bloque con finalizar() (o un módulo sin contrato) podría reclamar y
+    cuya clave está entre las dudosas de ese bloque.
+    """
+    forzadas = np.zeros(len(df), dtype=bool)
+    dudosas = conocidas.copy()
+    if all(d is not None for _, _, d in delta["finalizan"]):
+        dudosas &= claves.isin(pd.concat([d for _, _, d in delta["finalizan"]])).to_numpy()
+    if not dudosas.any():
+        return forzadas
+
+    # El enrutado y los filtros corren solo sobre las direcciones dudosas
+    filas = np.flatnonzero(dudosas)
+    codigos, unicas = factorizar_direcciones(df.iloc[filas])
+    mascaras = enrutar(unicas.to_frame("DIRECCION"), enrutador)
+    for nombre, bq, claves_bloque in delta["finalizan"]:
+        en_bloque = np.ones(len(filas), dtype=bool)
+        if claves_bloque is not None:
+            en_bloque = claves.iloc[filas].isin(claves_bloque).to_numpy()
+        revisar = np.zeros(len(unicas), dtype=bool)
+        revisar[codigos[en_bloque & (codigos >= 0)]] = True
+        if nombre in mascaras:
+            revisar &= mascaras[nombre].to_numpy()
+        posiciones = np.flatnonzero(revisar)
+        if bq is not None and len(posiciones):
+            revisar[posiciones] = mascara_filtro(unicas.iloc[posiciones], bq)
+        forzadas[filas] |= en_bloque & a_filas(revisar, codigos)
+    return forzadas
+
+def separar_delta(df: pd.DataFrame, delta: dict, enrutador=None):
+    """
+    Devuelve (filas a normalizar, filas de la salida anterior que se
+    conservan, claves que se saltan porque ningún módulo las reclamó).
+    Cada fila de la salida anterior se arrastra una sola vez, aunque su par
+    aparezca en varios archivos.
+    """
+    claves = claves_delta(df)
+    conocidas = claves.isin(delta["claves"]).to_numpy()
+    if delta["finalizan"]:
+        conocidas = conocidas & ~filas_de_finalizar(df, claves, conocidas, delta, enrutador)
+    saltadas = claves.isin(delta["sin_reclamar"]).to_numpy() & ~claves.isin(delta["claves"]).to_numpy()
+    tomar = delta["claves"].isin(claves[conocidas]).to_numpy() & ~delta["usadas"]
+    delta["usadas"] |= tomar
+    reutilizadas = conocidas | saltadas
+    delta["reutilizadas"] += int(reutilizadas.sum())
+    delta["recalculadas"] += int((~reutilizadas).sum())
+    return df[~reutilizadas], delta["previa"][tomar], claves[saltadas]
+
+# ================== MODO STREAMING (CSV POR BLOQUES) ==================
+
+def abrir_entrada(path: str):
+    """Devuelve una función que abre path (o su miembro de .zip) en binario."""
+    en_zip = separar_ruta_zip(path)
+    if en_zip is None:
+        return lambda: open(path, "rb")
+    ruta_zip, miembro = en_zip
+
+    @contextlib.contextmanager
+    def abrir():
+        with zipfile.ZipFile(ruta_zip) as zf, zf.open(miembro) as fh:
+            yield fh
+    return abrir
+
+def normalizar_bloque_filas(archivo: dict, orden, caches=None, prioridad=None):
+    """
+    Corre los módulos (en orden de prioridad) sobre un bloque de filas sin
+    aplicar finalizar(). Devuelve (salidas, retenidas):
+      - salidas[nombre]: filas que ya son definitivas.
+      - retenidas[(nombre, k)]: filas del bloque k del módulo que esperan al
+        final del archivo, porque finalizar() podría cambiarlas (retener) o
+        porque la dirección la retuvo un módulo de mayor prioridad y su
+        dueño se conoce solo después de finalizar().
+    """
+    df, codigos, unicas = archivo["df"], archivo["codigos"], archivo["unicas"]
+    propias = np.zeros(len(unicas), dtype=bool) if prioridad is not None else None
+    en_espera = set()
+    salidas = {}
+    retenidas = {}
+
+    for nombre, modulo in orden:
+        cache = caches.get(nombre) if caches else None
+        bloques = bloques_de(modulo)
+        if bloques is None:
+            # Módulos sin contrato: sus reglas de archivo completo se aplican por bloque
+            df_out, _ = ejecutar_modulo(nombre, modulo, archivo, cache, propias)
+            partes = [(0, None, df_out[COLUMNAS_SALIDA])] if df_out is not None else []
+        else:
+            candidatas = candidatas_modulo(archivo, nombre, propias)
+            partes = []
+            if candidatas is None or candidatas.any():
+                for k, bq in enumerate(bloques):
+                    try:
+                        df_bq = armar_bloque(
+                            df, bq, codigos, *normalizar_bloque(unicas, bq, candidatas, cache), finalizar=False
+                        )
+                    except Exception as e:
+                        print(f"   ⚠️ Error en procesar() de {nombre}: {e}")
+                        continue
+                    partes.append((k, bq, df_bq))
+
+        definitivas = []
+        nuevas_en_espera = set()
+        for k, bq, df_bq in partes:
+            if df_bq.empty:
+                continue
+            espera = np.zeros(len(df_bq), dtype=bool)
+            if en_espera:
+                espera |= df_bq["DIRECCION"].isin(en_espera).to_numpy()
+            if bq is not None and bq["finalizar"] is not None:
+                if bq["retener"] is None:
+                    espera[:] = True
+                else:
+                    espera |= bq["retener"](df_bq).to_numpy(dtype=bool)
+            if espera.any():
+                retenidas.setdefault((nombre, k), []).append(df_bq[espera])
+                nuevas_en_espera.update(df_bq.loc[espera, "DIRECCION"])
+                df_bq = df_bq[~espera]
+            definitivas.append(df_bq)
+
+        salidas[nombre] = definitivas
+        if prioridad is not None:
+            en_espera |= nuevas_en_espera
+            for df_bq in definitivas:
+                propias = marcar_propias(propias, unicas, df_bq)
+
+    return salidas, retenidas
+
+def finalizar_retenidas(retenidas: dict, orden, prioridad=None):
+    """
+    Final del archivo: corre finalizar() sobre las filas retenidas de cada
+    bloque y, en orden de prioridad, descarta las que quedaron en manos de
+    un módulo de mayor prioridad (igual que el arbitraje del modo normal).
+    """
+    propias = set()
+    salidas = {}
+    for nombre, modulo in orden:
+        bloques = bloques_de(modulo) or [None]
+        partes = []
+        for k, bq in enumerate(bloques):
+            trozos = retenidas.get((nombre, k))
+            if not trozos:
+                continue
+            df_r = pd.concat(trozos)
+            if propias:
+                df_r = df_r[~df_r["DIRECCION"].isin(propias)]
+            if bq is not None and bq["finalizar"] is not None and not df_r.empty:
+                try:
+                    df_r = bq["finalizar"](df_r)[COLUMNAS_SALIDA]
+                except Exception as e:
+                    print(f"   ⚠️ Error en finalizar() de {nombre}: {e}")
+                    continue
+            partes.append(df_r)
+        salidas[nombre] = partes
+        if prioridad is not None:
+            for df_r in partes:
+                propias.update(df_r.loc[df_r["VALIDACION"].astype(str) == "1", "DIRECCION"])
+    return salidas
+
+def procesar_csv_por_bloques(
+    ruta_archivo: str, modulos, enrutador=None, caches=None, prioridad=None, filas: int = 100_000
+):
+    """
+    Modo streaming para CSV grandes: el archivo se lee de a `filas` filas,
+    cada bloque pasa por la cadena de módulos y sus resultados se entregan
+    enseguida (generador de DataFrames), así que la memoria depende del
+    tamaño del bloque. Solo las filas que dependen del archivo completo
+    (finalizar()/retener de CENTROCLL y CHAMBRANA) esperan al final. Las
+    filas de salida son las mismas que en modo normal; cambia su orden.
+    """
+    print(f"\n📂 Procesando archivo por bloques de {filas} filas: {os.path.basename(ruta_archivo)}")
+    nombres = [nombre for nombre, _ in modulos]
+    orden = ordenar_por_prioridad(modulos, prioridad)
+    retenidas = {}
+    conteo = dict.fromkeys(nombres, 0)
+
+    def unir(salidas):
+        resultados = []
+        for nombre in nombres:
+            for df_out in salidas.get(nombre, []):
+                if not df_out.empty:
+                    conteo[nombre] += len(df_out)
+                    resultados.append(df_out)
+        return unir_resultados(resultados)
+
+    try:
+        for n_bloque, df_in in enumerate(leer_csv_por_bloques(abrir_entrada(ruta_archivo), filas), start=1):
+            try:
+                df = preparar_entrada(df_in)
+            except ValueError as e:
+                print(f"❌ {os.path.basename(ruta_archivo)}: {e}")
+                return
+            codigos, unicas = factorizar_direcciones(df)
+            mascaras = enrutar(unicas.to_frame("DIRECCION"), enrutador)
+            archivo = {"df": df, "codigos": codigos, "unicas": unicas, "mascaras": mascaras}
+
+            salidas, retenidas_bloque = normalizar_bloque_filas(archivo, orden, caches, prioridad)
+            for clave, trozos in retenidas_bloque.items():
+                retenidas.setdefault(clave, []).extend(trozos)
+
+            df_bloque = unir(salidas)
+            print(f"   🧱 Bloque {n_bloque}: {len(df)} filas, {len(df_bloque)} resultados")
+            if not df_bloque.empty:
+                yield df_bloque
+    except Exception as e:
+        print(f"❌ Error leyendo {ruta_archivo}: {e}")
+        return
+
+    df_final = unir(finalizar_retenidas(retenidas, orden, prioridad))
+    if not df_final.empty:
+        yield df_final
+    for nombre in nombres:
+        print(f"   {'✅' if conteo[nombre] else '➖'} {nombre}: {conteo[nombre]} filas")
+
 # ================== MAIN ==================
 
-def main():
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description=f"Normaliza los Excel/CSV de la carpeta '{CARPETA_ENTRADA}' con los módulos de SCRIPTS."
+    )
+    parser.add_argument(
+        "entrada", nargs="?", default=CARPETA_ENTRADA,
+        help="Carpeta o archivo .zip con los Excel/CSV de los ciclos (relativa a la carpeta "
+             f"del script; por defecto '{CARPETA_ENTRADA}'). Los .zip se leen sin extraerlos.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Procesos en paralelo para los trabajos (archivo, módulo). 1 = en serie.",
+    )
+    parser.add_argument(
+        "--sin-arbitraje", action="store_true",
+        help="Desactiva el arbitraje de propiedad (PRIORIDAD_MODULOS): cada módulo "
+             "procesa todas sus filas aunque otro ya las haya normalizado.",
+    )
+    parser.add_argument(
+        "--bloque-filas", type=int, default=0,
+        help="Modo streaming: lee los CSV de a N filas y procesa cada bloque por separado "
+             "(memoria acotada para extractos muy grandes). 0 = archivo completo.",
+    )
+    parser.add_argument(
+        "--formato", choices=FORMATOS_SALIDA, default=FORMATO_SALIDA,
+        help="Formato del archivo de salida; los resultados se escriben por lotes a medida "
+             "que termina cada archivo (o bloque con --bloque-filas).",
+    )
+    parser.add_argument(
+        "--fragmentos", type=int, default=1,
+        help="Con --workers > 1, parte las direcciones candidatas de cada módulo en N fragmentos "
+             "contiguos que se normalizan en paralelo (para ciclos muy grandes).",
+    )
+    parser.add_argument(
+        "--delta", nargs="?", const=ARCHIVO_SALIDA, default=None, metavar="SALIDA_ANTERIOR",
+        help="Solo normaliza las filas cuyo par (NIU, DIRECCION) no está en la salida anterior "
+             f"(por defecto {ARCHIVO_SALIDA}); las demás conservan su resultado, salvo las que podría "
+             "reclamar un módulo con finalizar(), que se recalculan. Se ejecuta en serie.",
+    )
+    parser.add_argument(
+        "--compacto", action="store_true", default=COMPACTAR_RESULTADOS,
+        help="Guarda NIU/DIRECCION/DIRECCION_NORMALIZADA en arrays de Arrow (requiere pyarrow) "
+             "y VALIDACION como categórica para bajar la memoria; la salida no cambia.",
+    )
+    parser.add_argument(
+        "--sin-incremental", action="store_true",
+        help="Recalcula todo aunque los archivos y los módulos no hayan cambiado "
+             f"(no usa los resultados guardados en {CARPETA_RESULTADOS}/).",
+    )
+    parser.add_argument(
+        "--aprender-orden", action="store_true", default=APRENDER_ORDEN_CASCADAS,
+        help="Mide aciertos y tiempo de los patrones de las cascadas y guarda en ORDEN_CASCADAS.json "
+             "el orden más rápido de los grupos intercambiables, que se usa desde la corrida siguiente.",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    carpeta_entrada = os.path.join(base_dir, CARPETA_ENTRADA)
+    carpeta_entrada = os.path.join(base_dir, args.entrada)
 
     if not os.path.exists(carpeta_entrada):
         print(f"❌ La carpeta de entrada no existe: {carpeta_entrada}")
         print("   Crea la carpeta y copia allí los Excel/CSV.")
         return
 
+    es_zip = os.path.isfile(carpeta_entrada) and zipfile.is_zipfile(carpeta_entrada)
+    if os.path.isfile(carpeta_entrada) and not es_zip:
+        print(f"❌ La entrada no es una carpeta ni un .zip: {carpeta_entrada}")
+        return
+
     modulos = cargar_scripts_normalizacion(base_dir)
     if not modulos:
         print("❌ No se cargó ningún script de normalización.")
         return
 
-    archivos = sorted(os.listdir(carpeta_entrada))
+    # Solo se mide el tiempo de las cascadas si se va a aprender su orden
+    MEDICION_CASCADAS["activa"] = args.aprender_orden
+
+    enrutador = construir_enrutador(modulos)
+    if enrutador is not None:
+        print(f"🔀 Enrutador por palabras clave: {len(enrutador['modulos'])} módulos enrutados")
+
+    caches = None
+    if USAR_CACHE:
+        conexion = abrir_cache(os.path.join(base_dir, ARCHIVO_CACHE))
+        caches = {nombre: cache_de_modulo(conexion, nombre, modulo) for nombre, modulo in modulos}
+        print(f"💾 Caché de normalización: {ARCHIVO_CACHE}")
+
+    if es_zip:
+        # Mismo orden que si se extrajera: por nombre de archivo
+        archivos = sorted(listar_zip(carpeta_entrada), key=os.path.basename)
+        print(f"🗜️ Leyendo los ciclos directamente de {os.path.basename(carpeta_entrada)}")
+    else:
+        archivos = [os.path.join(carpeta_entrada, a) for a in sorted(os.listdir(carpeta_entrada))]
     if not archivos:
-        print(f"❌ La carpeta {CARPETA_ENTRADA} está vacía.")
+        print(f"❌ La carpeta {args.entrada} está vacía.")
         return
 
-    todos = []
-    for nombre_archivo in archivos:
+    rutas = []
+    for ruta_archivo in archivos:
+        nombre_archivo = os.path.basename(ruta_archivo)
         ext = os.path.splitext(nombre_archivo)[1].lower()
         if ext not in EXT_PERMITIDAS:
             print(f"   (Se omite {nombre_archivo}, extensión no soportada)")
             continue
-        ruta_archivo = os.path.join(carpeta_entrada, nombre_archivo)
-        df_archivo = procesar_archivo_con_modulos(ruta_archivo, modulos)
-        if not df_archivo.empty:
-            todos.append(df_archivo)
+        rutas.append(ruta_archivo)
 
-    if not todos:
-        print("❌ No se generó ninguna fila normalizada.")
+    prioridad = None if args.sin_arbitraje else PRIORIDAD_MODULOS
+    if prioridad is not None:
+        orden = [n for n, _ in ordenar_por_prioridad(modulos, prioridad)]
+        print("🏷️ Arbitraje de propiedad: " + " > ".join(orden))
+
+    if args.fragmentos > 1 and args.workers <= 1:
+        print("   (--fragmentos solo aplica con --workers > 1; se ejecuta en serie)")
+
+    if args.bloque_filas > 0 and args.workers > 1:
+        print("   (--bloque-filas procesa en serie; se ignora --workers)")
+        args.workers = 1
+
+    if args.compacto:
+        if TEXTO_ARROW is None:
+            print(
+                "🗜️ Resultados compactos: sin pyarrow el texto queda como objetos; "
+                "solo VALIDACION se compacta"
+            )
+        else:
+            print("🗜️ Resultados compactos: texto en arrays de Arrow, VALIDACION categórica")
+
+    delta = None
+    if args.delta:
+        ruta_previa = os.path.join(base_dir, args.delta)
+        try:
+            delta = cargar_delta(ruta_previa, modulos, args.compacto)
+        except Exception as e:
+            print(f"❌ No se pudo leer la salida anterior {ruta_previa}: {e}")
+            return
+        print(f"🔺 Modo delta: {len(delta['previa'])} filas de {os.path.basename(ruta_previa)}")
+        if args.workers > 1:
+            print("   (--delta procesa en serie; se ignora --workers)")
+            args.workers = 1
+        if args.bloque_filas > 0:
+            print("   (--delta no aplica a los CSV leídos por bloques: esos se recalculan completos)")
+
+    # Los resultados de una corrida delta son parciales: no se guardan
+    incremental = None
+    if USAR_MANIFIESTO and not args.sin_incremental and delta is None:
+        incremental = iniciar_incremental(base_dir, modulos, prioridad)
+        print(f"♻️ Corrida incremental: resultados guardados en {CARPETA_RESULTADOS}/")
+
+    # Los resultados se escriben a medida que salen (sin armar df_final)
+    ruta_salida = os.path.join(base_dir, os.path.splitext(ARCHIVO_SALIDA)[0] + "." + args.formato)
+    try:
+        escritor = abrir_escritor(ruta_salida, args.formato, HOJA_SALIDA)
+    except ValueError as e:
+        print(f"❌ {e}")
         return
 
-    df_final = pd.concat(todos, ignore_index=True)
+    # Claves intentadas que ningún módulo reclamó (las usa un --delta posterior)
+    sin_reclamar = None if args.workers > 1 else []
+    try:
+        if args.workers > 1:
+            print(f"⚙️ Ejecución en paralelo con {args.workers} workers")
+            if args.fragmentos > 1:
+                print(f"🧩 Cada módulo parte sus direcciones en {args.fragmentos} fragmentos")
+            entradas, reutilizar = {}, {}
+            if incremental is not None:
+                for i, ruta_archivo in enumerate(rutas):
+                    entradas[i], reutilizar[i] = resultados_previos(incremental, ruta_archivo)
+            _, aciertos, nuevas = procesar_en_paralelo(
+                rutas, modulos, base_dir, args.workers, USAR_CACHE, args.fragmentos, prioridad,
+                emitir=lambda df_archivo: escribir_lote(escritor, df_archivo),
+                reutilizar=reutilizar,
+                guardar=(
+                    None if incremental is None
+                    else lambda i, calculadas: guardar_calculadas(incremental, entradas[i], calculadas)
+                ),
+                compacto=args.compacto,
+            )
+        else:
+            for ruta_archivo in rutas:
+                if args.bloque_filas > 0 and ruta_archivo.lower().endswith(".csv"):
+                    # El modo streaming no guarda resultados: siempre se recalcula
+                    for df_bloque in procesar_csv_por_bloques(
+                        ruta_archivo, modulos, enrutador, caches, prioridad, args.bloque_filas
+                    ):
+                        escribir_lote(escritor, df_bloque)
+                    continue
+                entrada, reutilizar, calculadas = None, None, None
+                if incremental is not None:
+                    entrada, reutilizar = resultados_previos(incremental, ruta_archivo)
+                    calculadas = {}
+                df_archivo = procesar_archivo_con_modulos(
+                    ruta_archivo, modulos, enrutador, caches, prioridad, reutilizar, calculadas, delta,
+                    args.compacto, sin_reclamar,
+                )
+                if incremental is not None:
+                    guardar_calculadas(incremental, entrada, calculadas)
+                escribir_lote(escritor, df_archivo)
+            aciertos = sum(c["aciertos"] for c in caches.values()) if caches else 0
+            nuevas = sum(c["nuevas"] for c in caches.values()) if caches else 0
+    except BaseException:
+        cerrar_escritor(escritor, descartar=True)
+        raise
 
-    ruta_salida = os.path.join(base_dir, ARCHIVO_SALIDA)
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode="w") as writer:
-        df_final.to_excel(writer, sheet_name=HOJA_SALIDA, index=False)
+    if escritor["filas"] == 0:
+        cerrar_escritor(escritor, descartar=True)
+        print("❌ No se generó ninguna fila normalizada.")
+        return
+    cerrar_escritor(escritor)
+    if incremental is not None:
+        cerrar_incremental(incremental)
+    if sin_reclamar is not None:
+        try:
+            guardar_sin_reclamar(ruta_salida, sin_reclamar)
+        except Exception as e:
+            print(f"   ⚠️ No se pudieron guardar las claves sin reclamar: {e}")
+    if args.aprender_orden:
+        try:
+            guardar_orden_cascadas()
+        except Exception as e:
+            print(f"   ⚠️ No se pudo guardar el orden aprendido de las cascadas: {e}")
 
-    total = df_final.shape[0]
-    normalizadas = (df_final["VALIDACION"] == "1").sum()
+    total = escritor["filas"]
+    normalizadas = escritor["normalizadas"]
     efectividad = (normalizadas * 100 / total) if total > 0 else 0
 
     print("\n✅ PROCESO COMPLETO")
     print(f"📁 Archivo de salida: {ruta_salida}")
-    print(f"📄 Hoja: {HOJA_SALIDA}")
+    if args.formato == "xlsx":
+        print(f"📄 Hoja: {HOJA_SALIDA}")
     print(f"🔢 Total filas: {total}")
     print(f"✔️ Normalizadas (VALIDACION='1'): {normalizadas}")
     print(f"📈 Efectividad global: {efectividad:.2f}%")
+    if USAR_CACHE:
+        print(f"💾 Caché: {aciertos} direcciones reutilizadas, {nuevas} normalizadas y guardadas")
+    if delta is not None:
+        print(
+            f"🔺 Delta: {delta['reutilizadas']} filas de entrada reutilizadas de la salida anterior, "
+            f"{delta['recalculadas']} normalizadas de nuevo"
+        )
+    if incremental is not None:
+        print(
+            f"♻️ Incremental: {incremental['reutilizados']} resultados (archivo, módulo) reutilizados, "
+            f"{incremental['calculados']} recalculados"
+        )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,208 @@
+import re
+
+from COMUN import patron_rotulos_finales, quitar_rotulos_finales
+
+# ================== PATRONES COMPARTIDOS ENTRE MÓDULOS ==================
+# Regex, tablas y limpiezas que varios scripts de normalización usaban como
+# copias idénticas (CENTROCLL y CHAMBRANA comparten la familia CRA/CL y la
+# cola LC; RPINILLA, los rótulos y ORIENT_MAP; ARCOIRIS, COLINAS, QMARINA y
+# CECMAIN, los romanos de la etapa). Este módulo se importa una vez por
+# proceso, así que cada patrón se compila una sola vez aunque el orquestador
+# cargue todos los scripts. Un cambio aquí cambia la salida de todos los
+# módulos que lo importan (y sus cachés, ver version_modulo()).
+
+# ================== TABLAS ==================
+ORIENT_MAP = {
+    "NORTE":"N","SUR":"S","ESTE":"E","OESTE":"O","ORIENTE":"E","OCCIDENTE":"O",
+    "NTE":"N","STE":"S","OTE":"E","OCC":"O","N":"N","S":"S","E":"E","O":"O"
+}
+
+# Etapas en números romanos (I..X) -> número como texto
+ROMANOS = {
+    "I": "1", "II": "2", "III": "3", "IV": "4", "V": "5",
+    "VI": "6", "VII": "7", "VIII": "8", "IX": "9", "X": "10"
+}
+
+# ================== REGEX (CRA/CL, CLL/CR GENERAL, MONTEAZUL) ==================
+# Nota: aceptamos guiones -, – (en dash) y — (em dash)
+
+# ---------- CRA / CL ----------
+regex_cra_cl_ap_then_to = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\s*
+        (?:APTO?|APARTAMENTO|AP)\s*(?P<ap>\d+)\s+
+        (?:(?:\bTO\b|\bTORRE\b|\bBQ\b|\bBLQ\b|\bBL\b|\bBLOQUE\b))\s*(?P<to>[A-Z0-9]+)
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+regex_cra_cl_ap_textnum = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\s*
+        (?:APTO?|APARTAMENTO|AP)\s*(?:[A-ZÁÉÍÓÚÜÑ]+(?:\s+[A-ZÁÉÍÓÚÜÑ]+)*)\s*(?P<ap>\d+)
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+# TO alfanumérico y AP opcional
+regex_cra_cl_bq_to_ap = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\s*
+        (?:ET(?:APA)?\s*(?P<et>\d+))?\s*
+        .*?(?P<tipo>(?:\bTO\b|\bTORRE\b|\bT\b|\bBL\b|\bBQ\b|\bBLQ\b|\bBLOQUE\b))\s*
+        (?P<numtipo>(?:[A-Z0-9]+))
+        (?:\s*(?:APTO?|APARTAMENTO|AP)\s*(?P<ap>\d+))?
+        (?:\s*(?:PI|PISO)\s*(?P<piso>\d+))?
+        (?:\s*LC\s+(?P<lc_raw>(?:\d+[A-Z]?|[A-Z]{1,3}\s*\d{1,4}|[A-Z]{1,3}\d{1,4}|\d+\s*-\s*\d+)))?
+        (?:\s*(?P<tail>(?:PU\s+VIGILANCIA|MOTOBOMBA|(?:OFI(?:CINA)?|OF(?:ICINA)?)\s*\d+(?:\s*-\s*\d+)?|MACROMEDIDOR\s*\d+|ECR\s+[A-ZÁÉÍÓÚÜÑ\s]+)))?
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+regex_cra_cl_cs_lc = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)?(?P<guion>0*\d+)? 
+        (?:\s*N\s*\d+)?\s*
+        (?P<tipo2>CS|LC)\s*
+        (?P<num2>(?:\d+[A-Z]?|[A-Z]{1,3}\s*\d{1,4}|[A-Z]{1,3}\d{1,4}|\d+\s*-\s*\d+))?
+        (?:\s*(?:PI|PISO)\s*(?P<piso>\d+))?
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+regex_cra_cl_basico = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\b
+        (?:\s*(?P<tail>(?:PU\s+VIGILANCIA|MOTOBOMBA|MACROMEDIDOR\s*\d+|(?:OFI(?:CINA)?|OF(?:ICINA)?)\s*\d+(?:\s*-\s*\d+)?)))?
+        (?:\s*(?:PI|PISO)\s*(?P<piso>\d+))?
+        (?:\s+(?:8000|NIU\s*\#?\s*\d+))*
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+regex_cra_cl_ap = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\s*
+        (?:APTO?|APARTAMENTO|AP)\s*(?P<ap>\d+)
+        (?:\s*(?:PI|PISO)\s*(?P<piso>\d+))?
+        (?:\s+(?:8000|NIU\s*\#?\s*\d+))*
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+regex_cra_cl_ap_sin_num = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\s*
+        (?:APTO?|APARTAMENTO|AP)\b(?!\s*\d)
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+regex_cra_cl_macro = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)\s*
+        MACRO\s*(?P<macro>\d+)
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+# Permite texto suelto entre guion y MZ/CS (p.ej. "AMANECER")
+regex_cra_cl_mz_cs = re.compile(
+    r"""CRA\s*(?P<cra>\d+)\s*
+        CL\s*(?P<cl>\d+[A-Z]?)\s*
+        (?:(?:-|–|—)\s*|\s+)(?P<guion>0*\d+)
+        (?:\s+[A-ZÁÉÍÓÚÜÑ0-9]+){0,6}?\s*
+        MZ\s*(?P<mz>[A-Z0-9]+)\s*
+        CS\s*(?P<cs>[A-Z0-9]+)
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+# ---------- CLL / CR ----------
+# General CLL/CR (+ AC opcional, LC/CS, PI/AP/OF)
+regex_cll_cr_general = re.compile(
+    r"""CLL\s*(?P<cll>\d+(?:[A-Z]{1,2})?(?:\s*BIS(?:\s*[A-Z])?)?)
+        (?:\s*(?:NORTE|SUR|ESTE|OESTE|ORIENTE|OCCIDENTE|N|S|E|O|NTE|STE|OTE|OCC))?
+        \s*(?:CR|CRA|KR|KRA|K|CL)\s*(?P<cr>\d+(?:[A-Z]{1,2})?(?:\s*BIS(?:\s*[A-Z])?)?)
+        (?:\s*(?:NORTE|SUR|ESTE|OESTE|ORIENTE|OCCIDENTE|N|S|E|O|NTE|STE|OTE|OCC))?
+        (?:(?:(?:-|–|—)\s*|\#\s*|\s+)(?P<guion>0*\d+))?
+        (?:\s*(?:APTO?|APARTAMENTO|AP)\s*(?P<ap>\d+))?
+        (?:\s*(?:PI|PISO)\s*(?P<piso>\d+))?
+        (?:\s*(?:OFI(?:CINA)?|OF(?:ICINA)?)\s*(?P<of>\d+(?:\s*-\s*\d+)?))?
+        (?:\s*LC\s+(?P<lc>(?:\d+[A-Z]?|[A-Z]{1,3}\s*\d{1,4}|[A-Z]{1,3}\d{1,4}|\d+\s*-\s*\d+)))?
+        (?:\s*CS\s+(?P<cs>[A-Z0-9]+))?
+        (?:\s*AC\b)?
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+# ---------- MONTEAZUL ----------
+regex_monteazul = re.compile(
+    r"""URB\s+MONTEAZUL
+        (?:
+            .*?(?:APTO?|APARTAMENTO|AP)\s*(?P<ap>\d+).*?(?:BQ|BL|BLQ|BLOQUE|TO|TORRE|T)\s*(?P<to>\d+)
+            |
+            .*?(?:TO|TORRE|T|BQ|BL|BLQ|BLOQUE)\s*(?P<to2>\d+).*?(?:APTO?|APARTAMENTO|AP)\s*(?P<ap2>\d+)
+        )
+        (?:\s+(?:8000|NIU\s*\#?\s*\d+))*
+    """, re.IGNORECASE | re.VERBOSE
+)
+
+# ================== COLA LC / RÓTULOS ==================
+ROTULOS_A_REMOVER = [
+    "CLUB HOUSE", "CLUBHOUSE",
+    "CENTENARIO MALL", "MALL CENTENARIO", "FLORIDA BAJA",
+    "BALEARES", "AV BOLIVAR", "ED EL PILAR", "AMANECER",
+    "MALL ZN ORO", "LUXOR",
+]
+
+ROTULOS_FINALES = patron_rotulos_finales(ROTULOS_A_REMOVER)
+
+def limpiar_rotulos_finales(texto: str) -> str:
+    return quitar_rotulos_finales(texto, ROTULOS_FINALES)
+
+_RE_SOTANO = re.compile(r"\bSOTANO\s*(\d+)\b", re.IGNORECASE)
+_RE_PLLIBRE = re.compile(r"\bPL\s+LIBRE\b", re.IGNORECASE)
+_RE_CAJERO  = re.compile(r"\bCAJERO\s*(\d+)\b", re.IGNORECASE)
+_RE_GRUPO   = re.compile(r"\bGRUPO\s+[A-ZÁÉÍÓÚÜÑ0-9 ]+\b", re.IGNORECASE)
+
+def normalizar_cola_lc(seg: str) -> str:
+    s = seg.strip()
+    s = limpiar_rotulos_finales(s)
+    s = re.sub(r'\s+AV(?:ENIDA)?\s+[A-ZÁÉÍÓÚÜÑ0-9\s]+$', '', s, flags=re.IGNORECASE)
+    s = re.sub(r'\s+ED(?:IFICIO)?\s+[A-ZÁÉÍÓÚÜÑ0-9\s]+$', '', s, flags=re.IGNORECASE)
+
+    m = re.search(r'\bLC\b\s*(\S+)?', s, flags=re.IGNORECASE)
+    if not m:
+        return s
+
+    base = "LC"
+    lc_id = m.group(1)
+    if lc_id:
+        lc_id = re.match(r'[A-Z0-9\-]+', lc_id, flags=re.IGNORECASE)
+        lc_id = lc_id.group(0) if lc_id else None
+    if lc_id:
+        base += f" {lc_id}"
+
+    tail = s[m.end():].strip()
+    tail = _RE_SOTANO.sub(lambda x: f"SOT {int(x.group(1))}", tail)
+    tail = _RE_PLLIBRE.sub("", tail)
+    tail = _RE_CAJERO.sub(lambda x: f"CAJ {int(x.group(1))}", tail)
+    tail = _RE_GRUPO.sub("", tail)
+
+    mpi = re.search(r'\b(?:PI|PISO)\s*(\d+)\b', tail, flags=re.IGNORECASE)
+    pi_txt = f" PI {int(mpi.group(1))}" if mpi else ""
+
+    out = (base + pi_txt).strip()
+    return out
+
+LC_PERMITIDO_COMPLETO = re.compile(
+    r'^LC\s+(?:\d+[A-Z]?|[A-Z]{1,3}\s*\d{1,4}|[A-Z]{1,3}\d{1,4}|\d+\s*-\s*\d+)(?:\s+PI\s*\d+)?$',
+    re.IGNORECASE
+)
+
+def lc_es_complejo(texto: str) -> bool:
+    m = re.search(r'\bLC\b.*$', texto, flags=re.IGNORECASE)
+    if not m:
+        return False
+    seg = m.group(0)
+    seg_norm = normalizar_cola_lc(seg)
+    return LC_PERMITIDO_COMPLETO.match(seg_norm) is None
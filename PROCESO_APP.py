@@ -0,0 +1,122 @@
+import importlib.util
+
+import pandas as pd
+
+from COMUN import (
+    COLUMNAS_SALIDA, a_filas, bloques_de, factorizar_direcciones, leer_excel, preparar_entrada,
+    procesar_unicas,
+)
+from ENRUTADOR import construir_enrutador, enrutar
+
+# ================== PROCESAMIENTO DE ARCHIVOS DE LA APP ==================
+# Lo que la APP corre en sus procesos worker vive aquí y no en APP.py:
+# Streamlit ejecuta APP.py como __main__, y con el arranque "spawn" (el de
+# Windows y macOS) un worker solo puede usar funciones de un módulo que
+# pueda importar.
+
+
+def cargar_modulo_desde_archivo(ruta_py: str, nombre_modulo: str):
+    """
+    Carga dinámicamente un archivo .py (aunque empiece con número, ej. 25mayo.py)
+    y devuelve el módulo importado.
+    """
+    spec = importlib.util.spec_from_file_location(nombre_modulo, ruta_py)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)  # type: ignore[attr-defined]
+    return modulo
+
+
+def procesar_df_con_modulos(df_in: pd.DataFrame, modulos, enrutador=None, avance=None, avisar=print):
+    """
+    Aplica TODOS los módulos de normalización a un DataFrame de entrada.
+    DIRECCION se factoriza una vez y cada módulo normaliza solo direcciones
+    únicas; si se pasa un enrutador, solo evalúa sus direcciones candidatas.
+    Si se pasa avance, se llama avance(nombre) al empezar cada módulo; los
+    avisos van a avisar (en la APP, st.warning o la lista de avisos del worker).
+    Devuelve un DataFrame con columnas estándar:
+    NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
+    """
+    resultados = []
+    try:
+        df = preparar_entrada(df_in)
+    except ValueError as e:
+        avisar(str(e))
+        return pd.DataFrame(columns=COLUMNAS_SALIDA)
+
+    codigos, unicas = factorizar_direcciones(df)
+    mascaras = enrutar(unicas.to_frame("DIRECCION"), enrutador)
+
+    for nombre, modulo in modulos:
+        if avance is not None:
+            avance(nombre)
+        candidatas = None
+        if nombre in mascaras:
+            candidatas = mascaras[nombre].to_numpy()
+            if not candidatas.any():
+                continue
+
+        bloques = bloques_de(modulo)
+        try:
+            if bloques is not None:
+                df_out = procesar_unicas(df, codigos, unicas, bloques, candidatas)
+            elif candidatas is not None:
+                df_out = modulo.procesar(df[a_filas(candidatas, codigos)])
+            else:
+                df_out = modulo.procesar(df)
+        except Exception as e:
+            avisar(f"Error en `procesar()` de **{nombre}**: {e}")
+            continue
+
+        if df_out is None or df_out.empty:
+            continue
+
+        # Verificar columnas
+        if not set(COLUMNAS_SALIDA).issubset(df_out.columns):
+            avisar(
+                f"El módulo **{nombre}** no devuelve todas las columnas estándar "
+                f"{COLUMNAS_SALIDA}. Se omitirá su resultado."
+            )
+            continue
+
+        resultados.append(df_out[COLUMNAS_SALIDA])
+
+    if resultados:
+        return pd.concat(resultados, ignore_index=True)
+    else:
+        return pd.DataFrame(columns=COLUMNAS_SALIDA)
+
+
+# ================== WORKERS ==================
+# Cada worker carga los módulos una vez, lee y normaliza un archivo por
+# tarea y avisa por una cola el archivo y el módulo en que va (la barra de
+# progreso se actualiza en la sesión de Streamlit).
+
+# Estado de cada proceso worker (lo llena inicializar_worker)
+_WORKER = {}
+
+
+def inicializar_worker(scripts, cola):
+    """Cada worker carga los módulos (ya resueltos en la sesión) una sola vez."""
+    modulos = [(nombre, cargar_modulo_desde_archivo(ruta, nombre)) for nombre, ruta in scripts]
+    _WORKER["modulos"] = modulos
+    _WORKER["enrutador"] = construir_enrutador(modulos)
+    _WORKER["cola"] = cola
+
+
+def tarea_archivo(i: int, datos: bytes):
+    """
+    Lee y normaliza el archivo i. Devuelve (df_proc, avisos, error_lectura):
+    si el archivo no se pudo leer como Excel, df_proc es None y error_lectura
+    el motivo. Cualquier otro error sale como excepción de la tarea.
+    """
+    cola = _WORKER["cola"]
+    try:
+        df_in = leer_excel(datos)
+    except Exception as e:
+        return None, [], str(e)
+    cola.put((i, None))
+    avisos = []
+    df_proc = procesar_df_con_modulos(
+        df_in, _WORKER["modulos"], _WORKER["enrutador"], lambda nombre: cola.put((i, nombre)), avisos.append
+    )
+    return df_proc, avisos, None
@@ -1,25 +1,14 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
+from PATRONES import ROMANOS
 
 # ============================================================
 # Conversión de romanos → número para la etapa
 # ============================================================
 
-romanos = {
-    "I": "1",
-    "II": "2",
-    "III": "3",
-    "IV": "4",
-    "V": "5",
-    "VI": "6",
-    "VII": "7",
-    "VIII": "8",
-    "IX": "9",
-    "X": "10",
-}
-
-
 def etapa_a_numero(etapa):
     if not etapa:
         return ""
@@ -30,7 +19,7 @@ def etapa_a_numero(etapa):
         .replace("ET", "")
         .strip()
     )
-    return romanos.get(etapa, etapa)
+    return ROMANOS.get(etapa, etapa)
 
 
 # ============================================================
@@ -166,6 +155,13 @@ def normalizar_direccion(direccion):
 #   FUNCIÓN ESTÁNDAR PARA USAR DESDE EL SCRIPT MAESTRO
 # ============================================================
 
+# Vocabulario del filtro de barrios (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["JULIANA", "VILLA ITALIA", "VILLA DEL CAFE", "MARINA", "MARIN", "M ARINA"]
+
+# Filas que reclama este módulo: el mismo vocabulario (regex sobre DIRECCION, sin distinguir mayúsculas)
+FILTRO = "|".join(VOCABULARIO_FILTRO)
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -181,76 +177,39 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     con columnas:
       NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
     """
-    df = df_in.copy()
-
-    # Normalizar nombres de columnas a un mapa en mayúsculas
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar columna NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar columna DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar normalización
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_direccion(x))
-    )
-
-    # Filtrar direcciones de interés (igual que el script original)
-    filtro = df["DIRECCION"].str.contains(
-        "JULIANA|VILLA ITALIA|VILLA DEL CAFE|MARINA|MARIN|M ARINA",
-        case=False,
-        na=False,
-    )
-    df_filtrado = df[filtro].copy()
-
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
-
-    return df_filtrado[columnas_salida]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 
 # ============================================================
 #   BLOQUE OPCIONAL PARA EJECUTAR ESTE SCRIPT SOLO
 # ============================================================
 
-if __name__ == "__main__":
-    # Configuración de rutas para ejecución individual
-    ruta_entrada = "CICLO 49_PDIRECCION.xlsx"
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
+# Configuración de rutas para ejecución individual
+RUTA_ENTRADA = "CICLO 49_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+HOJA_SALIDA = "UNIFICADO_VILLAS_MARINA"
+
 
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Leer datos como en el script original
-    df_local = pd.read_excel(ruta_entrada, usecols=["CLIENTE_ID", "DIRECCION"])
+    df_local = pd.read_excel(RUTA_ENTRADA, usecols=["CLIENTE_ID", "DIRECCION"])
 
     # Procesar usando la función estándar
     df_resultado = procesar(df_local)
 
-    # Guardar resultado
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado.to_excel(writer, sheet_name="UNIFICADO_VILLAS_MARINA", index=False)
-
     # Estadísticas
     total = df_resultado.shape[0]
     normalizadas = df_resultado[df_resultado["VALIDACION"] == "1"].shape[0]
     efectividad = (normalizadas / total) * 100 if total > 0 else 0
 
-    print(f"✅ Archivo procesado y guardado como {ruta_salida}")
     print(f"🔍 Total direcciones filtradas: {total}")
     print(f"📊 Direcciones normalizadas: {normalizadas}")
     print(f"📈 Efectividad: {round(efectividad, 2)}%")
+    return {HOJA_SALIDA: df_resultado}
+
+
+if __name__ == "__main__":
+    # Guardar resultado
+    guardar_hojas(RUTA_SALIDA, hojas_script())
+    print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
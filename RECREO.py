@@ -1,6 +1,8 @@
 import pandas as pd
 import re
-import os
+
+from COMUN import procesar_por_contrato
+from ESCRITURA import guardar_hojas
 
 # ============================================================
 #  RECREO / PALMARES DEL RECREO - NORMALIZACIÓN
@@ -166,6 +168,13 @@ def normalizar_direccion(direccion: str) -> tuple[str, str]:
 #      FUNCIÓN ESTÁNDAR PARA USAR DESDE EL SCRIPT MAESTRO
 # ============================================================
 
+# Vocabulario del filtro RECREO / PALMARES (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["RECREO", "PALMARES"]
+
+# Filas que reclama este módulo: el mismo vocabulario (regex sobre DIRECCION, sin distinguir mayúsculas)
+FILTRO = "|".join(VOCABULARIO_FILTRO)
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """
     Recibe un DataFrame con al menos:
@@ -179,77 +188,41 @@ def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     con columnas:
       NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION
     """
-    df = df_in.copy()
-
-    # Normalizar nombres de columnas a un mapa mayúscula
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar columna NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar columna DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar normalización
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_direccion(x))
-    )
-
-    # Filtrar SOLO las direcciones que contengan RECREO / PALMARES DEL RECREO
-    filtro = df["DIRECCION"].str.contains(
-        r"RECREO|PALMARES",
-        case=False,
-        na=False,
-    )
-    df_filtrado = df[filtro].copy()
-
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
-
-    return df_filtrado[columnas_salida]
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
 
 # ============================================================
 #      BLOQUE OPCIONAL PARA EJECUTAR ESTE SCRIPT SOLO
 # ============================================================
 
-if __name__ == "__main__":
-    # Rutas como en tu script original
-    ruta_entrada = "CICLO 47_PDIRECCION.xlsx"
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
+# Rutas como en tu script original
+RUTA_ENTRADA = "CICLO 47_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+HOJA_SALIDA = "RECREO"
+
 
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
     # Leer datos
-    df_local = pd.read_excel(ruta_entrada, usecols=["CLIENTE_ID", "DIRECCION"])
+    df_local = pd.read_excel(RUTA_ENTRADA, usecols=["CLIENTE_ID", "DIRECCION"])
 
     # Procesar usando la función estándar
     df_resultado = procesar(df_local)
 
-    # Guardar resultados en la hoja "RECREO"
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado.to_excel(writer, sheet_name="RECREO", index=False)
-
     # Estadísticas
     total = df_resultado.shape[0]
     normalizadas = df_resultado[df_resultado["VALIDACION"] == "1"].shape[0]
     efectividad = (normalizadas / total) * 100 if total > 0 else 0
 
-    print(f"✅ Archivo procesado y guardado como {ruta_salida}")
-    print(f"📄 Hoja: RECREO")
     print(f"🔍 Total direcciones procesadas (RECREO / PALMARES): {total}")
     print(f"📊 Direcciones normalizadas correctamente: {normalizadas}")
     print(f"📈 Efectividad: {efectividad:.2f}%")
+    return {HOJA_SALIDA: df_resultado}
+
+
+if __name__ == "__main__":
+    # Guardar resultados en la hoja "RECREO"
+    guardar_hojas(RUTA_SALIDA, hojas_script())
+
+    print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
+    print(f"📄 Hoja: {HOJA_SALIDA}")
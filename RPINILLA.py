@@ -1,23 +1,26 @@
 import pandas as pd
 import re
-import os
 
-# ================== REGEX / NORMALIZACIÓN ==================
-ORIENT_MAP = {
-    "NORTE": "N", "SUR": "S", "ESTE": "E", "OESTE": "O", "ORIENTE": "E", "OCCIDENTE": "O",
-    "NTE": "N", "STE": "S", "OTE": "E", "OCC": "O", "N": "N", "S": "S", "E": "E", "O": "O"
-}
+from COMUN import (
+    aplicar_cascada, alternativa_trie, conmutables, despacho_cascada, procesar_por_contrato, ruta_cascada,
+)
+from ESCRITURA import guardar_hojas
+from PATRONES import ORIENT_MAP, ROTULOS_A_REMOVER
 
-ROTULOS_A_REMOVER = [
-    "CLUB HOUSE", "CLUBHOUSE", "CENTENARIO MALL", "MALL CENTENARIO", "FLORIDA BAJA",
-    "BALEARES", "AV BOLIVAR", "ED EL PILAR", "AMANECER", "MALL ZN ORO", "LUXOR"
-]
+# ================== REGEX / NORMALIZACIÓN ==================
+# ORIENT_MAP y ROTULOS_A_REMOVER vienen de PATRONES.py; aquí los rótulos se
+# quitan en cualquier posición, no solo al final como en CENTROCLL/CHAMBRANA.
+_RE_ROTULOS = re.compile(rf"(?:{alternativa_trie(ROTULOS_A_REMOVER)})\b", re.IGNORECASE)
+# Un patrón por rótulo, en el orden de la lista (el bucle de borrado)
+_RE_POR_ROTULO = [re.compile(rf"{re.escape(r)}\b", re.IGNORECASE) for r in ROTULOS_A_REMOVER]
 
 
 def limpiar_rotulos_finales(t: str) -> str:
     s = t
-    for r in ROTULOS_A_REMOVER:
-        s = re.sub(rf"{re.escape(r)}\b", "", s, flags=re.IGNORECASE)
+    # Una sola búsqueda combinada descarta las direcciones sin rótulos; solo
+    # las que tienen alguno pasan por el bucle, que fija el orden de borrado.
+    for patron in (_RE_POR_ROTULO if _RE_ROTULOS.search(s) else ()):
+        s = patron.sub("", s)
     s = re.sub(r"\s+", " ", s).strip()
     return s
 
@@ -195,185 +198,173 @@ def normalizar_direccion(direccion: str):
         d = limpiar_rotulos_finales(d)
         return d, "1"
 
-    # --- CLL/CR directos ---
-    m = regex_cll_cr.search(d)
-    if not m:
-        m = regex_cll_cr_intermedio.search(d)
-    if m:
-        cll = m.group("cll")
-        cr = m.group("cr")
-        guion = m.group("guion")
-        ap = m.group("ap")
-        piso = m.group("piso")
-        lc_raw = m.group("lc_raw")
-
-        out = f"CLL {cll} CR {cr}"
-        if guion:
-            out += f" - {int(guion)}"
-        if ap:
-            out += f" AP {ap}"
-        if piso:
-            out += f" PI {int(piso)}"
-        if lc_raw:
-            out += f" {normalizar_cola_lc('LC ' + lc_raw.strip())}"
-
-        out = limpiar_rotulos_finales(out)
-        return out, "1"
-
-    # --- CRA/CL directos ---
-    m = regex_cra_cl.search(d)
-    if not m:
-        m = regex_cra_cl_intermedio.search(d)
-    if m:
-        cra = m.group("cra")
-        cl = m.group("cl")
-        guion = m.group("guion")
-        ap = m.group("ap")
-        piso = m.group("piso")
-        lc_raw = m.group("lc_raw")
-
-        out = f"CRA {cra} CL {cl}"
-        if guion:
-            out += f" - {int(guion)}"
-        if ap:
-            out += f" AP {ap}"
-        if piso:
-            out += f" PI {int(piso)}"
-        if lc_raw:
-            out += f" {normalizar_cola_lc('LC ' + lc_raw.strip())}"
-
-        out = limpiar_rotulos_finales(out)
-        return out, "1"
-
-    # --- CLL/CR general ---
-    m = regex_cll_cr_general.search(d)
-    if m:
-        cll = m.group("cll")
-        cr = m.group("cr")
-        guion = m.group("guion")
-        ap = m.group("ap")
-        piso = m.group("piso")
-        of = m.group("of")
-        lc_raw = m.group("lc_raw")
-
-        out = f"CLL {cll} CR {cr}"
-        if guion:
-            out += f" - {int(guion)}"
-        if ap:
-            out += f" AP {ap}"
-        if piso:
-            out += f" PI {int(piso)}"
-        if of:
-            out += f" OF {of}"
-        if lc_raw:
-            out += f" {normalizar_cola_lc('LC ' + lc_raw.strip())}"
-
-        out = limpiar_rotulos_finales(out)
-        return out, "1"
-
-    # --- CRA/CL general ---
-    m = regex_cra_cl_general.search(d)
-    if m:
-        cra = m.group("cra")
-        cl = m.group("cl")
-        guion = m.group("guion")
-        ap = m.group("ap") or m.group("ap2")
-        piso = m.group("piso") or m.group("piso2")
-        of = m.group("of")
-        lc = m.group("lc")
-        tipo = m.group("tipo")
-        numtipo = m.group("numtipo")
-
-        out = f"CRA {cra} CL {cl}"
-        if guion:
-            out += f" - {int(guion)}"
-        if ap:
-            out += f" AP {ap}"
-        if piso:
-            out += f" PI {int(piso)}"
-        if of:
-            out += f" OF {of}"
-        if tipo and numtipo:
-            out += f" {normalize_tipo_num(tipo, numtipo)}"
-        if lc:
-            out += f" {normalizar_cola_lc('LC ' + lc.strip())}"
-
-        out = limpiar_rotulos_finales(out)
-        return out, "1"
-
+    resultado = aplicar_cascada(CASCADA, ruta_cascada(CASCADA, d), d)
+    if resultado is not None:
+        return resultado
     return d, "0"
 
 
+# --- CLL/CR directos ---
+def armar_cll_cr(m, d):
+    cll = m.group("cll")
+    cr = m.group("cr")
+    guion = m.group("guion")
+    ap = m.group("ap")
+    piso = m.group("piso")
+    lc_raw = m.group("lc_raw")
+
+    out = f"CLL {cll} CR {cr}"
+    if guion:
+        out += f" - {int(guion)}"
+    if ap:
+        out += f" AP {ap}"
+    if piso:
+        out += f" PI {int(piso)}"
+    if lc_raw:
+        out += f" {normalizar_cola_lc('LC ' + lc_raw.strip())}"
+
+    out = limpiar_rotulos_finales(out)
+    return out, "1"
+
+
+# --- CRA/CL directos ---
+def armar_cra_cl(m, d):
+    cra = m.group("cra")
+    cl = m.group("cl")
+    guion = m.group("guion")
+    ap = m.group("ap")
+    piso = m.group("piso")
+    lc_raw = m.group("lc_raw")
+
+    out = f"CRA {cra} CL {cl}"
+    if guion:
+        out += f" - {int(guion)}"
+    if ap:
+        out += f" AP {ap}"
+    if piso:
+        out += f" PI {int(piso)}"
+    if lc_raw:
+        out += f" {normalizar_cola_lc('LC ' + lc_raw.strip())}"
+
+    out = limpiar_rotulos_finales(out)
+    return out, "1"
+
+
+# --- CLL/CR general ---
+def armar_cll_cr_general(m, d):
+    cll = m.group("cll")
+    cr = m.group("cr")
+    guion = m.group("guion")
+    ap = m.group("ap")
+    piso = m.group("piso")
+    of = m.group("of")
+    lc_raw = m.group("lc_raw")
+
+    out = f"CLL {cll} CR {cr}"
+    if guion:
+        out += f" - {int(guion)}"
+    if ap:
+        out += f" AP {ap}"
+    if piso:
+        out += f" PI {int(piso)}"
+    if of:
+        out += f" OF {of}"
+    if lc_raw:
+        out += f" {normalizar_cola_lc('LC ' + lc_raw.strip())}"
+
+    out = limpiar_rotulos_finales(out)
+    return out, "1"
+
+
+# --- CRA/CL general ---
+def armar_cra_cl_general(m, d):
+    cra = m.group("cra")
+    cl = m.group("cl")
+    guion = m.group("guion")
+    ap = m.group("ap") or m.group("ap2")
+    piso = m.group("piso") or m.group("piso2")
+    of = m.group("of")
+    lc = m.group("lc")
+    tipo = m.group("tipo")
+    numtipo = m.group("numtipo")
+
+    out = f"CRA {cra} CL {cl}"
+    if guion:
+        out += f" - {int(guion)}"
+    if ap:
+        out += f" AP {ap}"
+    if piso:
+        out += f" PI {int(piso)}"
+    if of:
+        out += f" OF {of}"
+    if tipo and numtipo:
+        out += f" {normalize_tipo_num(tipo, numtipo)}"
+    if lc:
+        out += f" {normalizar_cola_lc('LC ' + lc.strip())}"
+
+    out = limpiar_rotulos_finales(out)
+    return out, "1"
+
+
+# Las cadenas CLL y CRA están ancladas a ^CLL y ^CRA: nunca calzan las dos en
+# la misma dirección, así que su orden se aprende (COMUN.conmutables). Los
+# patrones generales usan .search() sin anclar y quedan al final, en orden.
+CASCADA = despacho_cascada([
+    conmutables(
+        CLL=[
+            ("cll_cr", regex_cll_cr, armar_cll_cr, [("CLL",)]),
+            ("cll_cr_intermedio", regex_cll_cr_intermedio, armar_cll_cr, [("CLL",)]),
+        ],
+        CRA=[
+            ("cra_cl", regex_cra_cl, armar_cra_cl, [("CRA", "CL")]),
+            ("cra_cl_intermedio", regex_cra_cl_intermedio, armar_cra_cl, [("CRA", "CL")]),
+        ],
+    ),
+    ("cll_cr_general", regex_cll_cr_general, armar_cll_cr_general, [("CLL",)]),
+    ("cra_cl_general", regex_cra_cl_general, armar_cra_cl_general, [("CRA", "CL")]),
+], nombre="RPINILLA")
+
+
+# Vocabulario del filtro ROJAS PINILLA / CLL / CRA / CR (lo usa el enrutador del orquestador)
+VOCABULARIO_FILTRO = ["ROJAS", "CLL", "CRA", "CR"]
+
+# Mismo filtro que en el script original
+FILTRO = r"ROJAS\s+PINILLA|^\s*CLL\b|^\s*CRA\b|^\s*CR\b"
+
+
 def procesar(df_in: pd.DataFrame) -> pd.DataFrame:
     """Procesa un DataFrame con columnas NIU/CLIENTE_ID y DIRECCION.
 
     Devuelve solo las filas filtradas (Rojas Pinilla / CLL/CR / CRA/CL)
     con las columnas: NIU, DIRECCION, DIRECCION_NORMALIZADA, VALIDACION.
     """
-    df = df_in.copy()
-
-    # Normalizar nombre de columnas a mayúsculas temporales
-    cols_upper = {c: c.upper().strip() for c in df.columns}
-
-    # Asegurar columna NIU
-    if "NIU" not in df.columns:
-        for c, up in cols_upper.items():
-            if up == "CLIENTE_ID":
-                df.rename(columns={c: "NIU"}, inplace=True)
-                break
-        if "NIU" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna NIU ni CLIENTE_ID.")
-
-    # Asegurar columna DIRECCION
-    if "DIRECCION" not in df.columns:
-        for c, up in cols_upper.items():
-            if up.replace(" ", "") == "DIRECCION":
-                df.rename(columns={c: "DIRECCION"}, inplace=True)
-                break
-        if "DIRECCION" not in df.columns:
-            raise ValueError("El DataFrame no tiene columna DIRECCION.")
-
-    # Aplicar la función de normalización original
-    df[["DIRECCION_NORMALIZADA", "VALIDACION"]] = df["DIRECCION"].apply(
-        lambda x: pd.Series(normalizar_direccion(x))
-    )
-
-    # Mismo filtro que en el script original
-    filtro = df["DIRECCION"].str.contains(
-        r"ROJAS\s+PINILLA|^\s*CLL\b|^\s*CRA\b|^\s*CR\b",
-        case=False,
-        na=False,
-    )
-    df_filtrado = df[filtro].copy()
+    return procesar_por_contrato(df_in, FILTRO, normalizar_direccion)
 
-    columnas_salida = ["NIU", "DIRECCION", "DIRECCION_NORMALIZADA", "VALIDACION"]
-    for col in columnas_salida:
-        if col not in df_filtrado.columns:
-            df_filtrado[col] = None
 
-    return df_filtrado[columnas_salida]
+# Comportamiento opcional para probar este módulo de forma independiente.
+RUTA_ENTRADA = "CICLO 47_PDIRECCION.xlsx"
+RUTA_SALIDA = "CICLOS_PROCESADOS.xlsx"
+HOJA_SALIDA = "C47_ROJAS_PINILLA"
 
 
-if __name__ == "__main__":
-    # Comportamiento opcional para probar este módulo de forma independiente.
-    ruta_entrada = "CICLO 47_PDIRECCION.xlsx"
-    df_local = pd.read_excel(ruta_entrada)
+def hojas_script() -> dict:
+    """Ejecución individual: procesa RUTA_ENTRADA y devuelve {hoja: DataFrame}."""
+    df_local = pd.read_excel(RUTA_ENTRADA)
 
     df_resultado = procesar(df_local)
 
-    ruta_salida = "CICLOS_PROCESADOS.xlsx"
-    hoja_salida = "C47_ROJAS_PINILLA"
-
-    modo = "a" if os.path.exists(ruta_salida) else "w"
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl", mode=modo) as writer:
-        df_resultado.to_excel(writer, sheet_name=hoja_salida, index=False)
-
     total = df_resultado.shape[0]
     normalizadas = (df_resultado["VALIDACION"] == "1").sum()
     efectividad = (normalizadas / total * 100) if total > 0 else 0
 
-    print(f"✅ Archivo procesado y guardado como {ruta_salida}")
-    print(f"📄 Hoja: {hoja_salida}")
     print(f"🔍 Total direcciones filtradas: {total}")
     print(f"📊 Direcciones normalizadas: {normalizadas}")
-    print(f"📈 Efectividad: {round(efectividad, 2)}%")
\ No newline at end of file
+    print(f"📈 Efectividad: {round(efectividad, 2)}%")
+    return {HOJA_SALIDA: df_resultado}
+
+
+if __name__ == "__main__":
+    guardar_hojas(RUTA_SALIDA, hojas_script())
+
+    print(f"✅ Archivo procesado y guardado como {RUTA_SALIDA}")
+    print(f"📄 Hoja: {HOJA_SALIDA}")
\ No newline at end of file
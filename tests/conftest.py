@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Los scripts viven en la raíz del repositorio (sin paquete)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+CARPETA_CICLOS = os.path.join(BASE_DIR, "EXCEL DE ENTRADA")
+
+
+@pytest.fixture(scope="session")
+def direcciones_ciclos() -> list:
+    """Direcciones únicas (sin vacías) de los ciclos de EXCEL DE ENTRADA."""
+    if not os.path.isdir(CARPETA_CICLOS):
+        pytest.skip("sin la carpeta EXCEL DE ENTRADA")
+    from COMUN import preparar_entrada
+    from ORQUESTADOR import EXT_PERMITIDAS, leer_entrada_flexible
+
+    unicas = set()
+    for archivo in sorted(os.listdir(CARPETA_CICLOS)):
+        if os.path.splitext(archivo)[1].lower() not in EXT_PERMITIDAS:
+            continue
+        df = preparar_entrada(leer_entrada_flexible(os.path.join(CARPETA_CICLOS, archivo)))
+        unicas.update(df["DIRECCION"].dropna().astype(str))
+    return sorted(unicas)
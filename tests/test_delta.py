@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ESCRITURA import escribir_dataframe
+from ORQUESTADOR import (
+    PRIORIDAD_MODULOS, cargar_delta, cargar_scripts_normalizacion, construir_enrutador, guardar_sin_reclamar,
+    procesar_archivo_con_modulos,
+)
+
+# ================== MODO DELTA (--delta) ==================
+# Dos corridas sobre un ciclo chico: la segunda usa la salida de la primera
+# y debe dar las mismas filas que una corrida completa, reutilizando todo lo
+# que finalizar() no puede cambiar.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Validadas sin base genérica: se arrastran de la salida anterior
+VALIDADAS = [
+    "CRA 17 CL 59 -95 TO 3 AP 1001",
+    "CRA 9 CL 51 -245 TO 29 AP 304",
+    "CRA 12 CL 0 -75 PI 5 CN 523",
+    "BRR LA ADIELA ETA 3 MNZ 31 19 - ARMENIA",
+    "BRR EL RECREO MNZ A 27 - ARMENIA",
+    "URB PALM. DE RECREO MNZ E 8 - ARMENIA",
+    "CRA 14 CL 14N -80 AP 1203",
+    "URB LA GRECIA MNZ 32 11 - ARMENIA",
+    "CRA 40B 44 61 QTAS DE V.LILIANA 05",
+    "CRA 14 CL 18N -47 AP 102",
+]
+# Bases genéricas (retener() de CENTROCLL): se recalculan
+GENERICAS = ["CLL 1 CR 13 -07 AC", "CLL 1N CR 12 -37 AC"]
+# Tres filas con la misma base genérica: finalizar() de CENTROCLL/CHAMBRANA las revierte; se recalculan
+REVERTIDAS = ["CLL 25N CR 13 -41 BODEGA 1", "CLL 25N CR 13 -41 BODEGA 2", "CLL 25N CR 13 -41 BODEGA 3"]
+# Ningún módulo las reclama: se saltan con las claves guardadas junto a la salida
+SIN_MODULO = ["BRR LOS KIOSKOS MNZ I 03 - ARMENIA", "URB TERRAZA JARDIN MZ C CS 16", "BRR ZULDEMAYDA MNZ 29 14"]
+
+
+@pytest.fixture(scope="module")
+def modulos():
+    modulos = cargar_scripts_normalizacion(BASE_DIR)
+    return modulos, construir_enrutador(modulos)
+
+
+def correr(ruta, modulos, delta=None, sin_reclamar=None):
+    modulos, enrutador = modulos
+    return procesar_archivo_con_modulos(
+        ruta, modulos, enrutador, None, PRIORIDAD_MODULOS, delta=delta, sin_reclamar=sin_reclamar
+    )
+
+
+def filas(df: pd.DataFrame) -> pd.Series:
+    return df.astype(str).value_counts().sort_index()
+
+
+def test_delta_reutiliza_lo_que_finalizar_no_cambia(tmp_path, modulos):
+    direcciones = VALIDADAS + GENERICAS + REVERTIDAS + SIN_MODULO
+    primera = pd.DataFrame({"NIU": [str(1000 + i) for i in range(len(direcciones))], "DIRECCION": direcciones})
+    ruta_primera = str(tmp_path / "CICLO_1.csv")
+    primera.to_csv(ruta_primera, index=False)
+
+    sin_reclamar = []
+    salida = correr(ruta_primera, modulos, sin_reclamar=sin_reclamar)
+    revertidas = salida[salida["DIRECCION"].isin(REVERTIDAS)]
+    revertidas = revertidas[revertidas["DIRECCION_NORMALIZADA"] == revertidas["DIRECCION"]]
+    assert (revertidas["VALIDACION"].astype(str) == "0").sum() >= 3
+    ruta_salida = str(tmp_path / "SALIDA.csv")
+    escribir_dataframe(ruta_salida, salida, "csv")
+    guardar_sin_reclamar(ruta_salida, sin_reclamar)
+
+    # Segunda corrida: dos clientes cambian de dirección y llega uno nuevo
+    segunda = primera.copy()
+    segunda.loc[[0, 1], "DIRECCION"] = ["CRA 17 CL 59 -95 TO 3 AP 1002", "CRA 9 CL 51 -245 TO 29 AP 305"]
+    segunda.loc[len(segunda)] = ["2000", "CRA 14 CL 18N -47 AP 103"]
+    ruta_segunda = str(tmp_path / "CICLO_2.csv")
+    segunda.to_csv(ruta_segunda, index=False)
+
+    delta = cargar_delta(ruta_salida, modulos[0])
+    con_delta = correr(ruta_segunda, modulos, delta=delta)
+
+    # 8 validadas sin cambio se arrastran y las 3 sin módulo se saltan; se
+    # normalizan las 2 cambiadas, la nueva, las 2 genéricas y las 3 revertidas
+    assert delta["reutilizadas"] == 11
+    assert delta["recalculadas"] == 8
+    assert filas(con_delta).equals(filas(correr(ruta_segunda, modulos)))
@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import pytest
+
+from COMUN import bloques_de, mascara_filtro
+from ENRUTADOR import construir_enrutador, enrutar
+from ORQUESTADOR import cargar_scripts_normalizacion
+
+# ================== ENRUTADOR / FILTROS ==================
+# El enrutador solo le pasa a cada módulo las direcciones con alguna palabra
+# de su VOCABULARIO_FILTRO. Si un FILTRO (o un bloque de BLOQUES) reclama una
+# dirección que el vocabulario no cubre, esa dirección deja de normalizarse
+# sin ningún error: estas pruebas fallan en ese caso.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def modulos():
+    return cargar_scripts_normalizacion(BASE_DIR)
+
+
+def perdidas_por_modulo(modulos, direcciones) -> dict:
+    """Por módulo enrutado, las direcciones que su filtro reclama y el enrutador no le pasa."""
+    unicas = pd.Series(direcciones, dtype=object)
+    mascaras = enrutar(unicas.to_frame("DIRECCION"), construir_enrutador(modulos))
+    perdidas = {}
+    for nombre, modulo in modulos:
+        bloques = bloques_de(modulo)
+        if bloques is None or nombre not in mascaras:
+            continue
+        enrutadas = mascaras[nombre].to_numpy()
+        for bq in bloques:
+            fuera = unicas[mascara_filtro(unicas, bq) & ~enrutadas]
+            if len(fuera):
+                perdidas.setdefault(nombre, []).extend(fuera.head(5).tolist())
+    return perdidas
+
+
+def test_modulos_enrutados(modulos):
+    # Los filtros de regex (no una lista de palabras) son los que pueden desalinearse
+    enrutados = {nombre for nombre, modulo in modulos if getattr(modulo, "VOCABULARIO_FILTRO", None)}
+    assert {"CENTROCLL", "CHAMBRANA", "RPINILLA", "ISABELLA", "MAIN_MERCAR_ARMENIA"} <= enrutados
+
+
+def test_enrutador_cubre_filtros_en_ciclos(modulos, direcciones_ciclos):
+    assert perdidas_por_modulo(modulos, direcciones_ciclos) == {}
@@ -0,0 +1,58 @@
+import CENTROCLL
+
+# ================== PARIDAD TOKENIZADOR / CASCADA (CENTROCLL) ==================
+# CENTROCLL resuelve las formas frecuentes con el tokenizador
+# (normalizar_por_tokens) y deja el resto a la cascada de regex
+# (normalizar_por_cascada). Estas pruebas pasan las direcciones por ambos
+# caminos y fallan en cada dirección en la que el tokenizador da una salida
+# distinta de la que daría la cascada: cubren cualquier cambio en
+# limpiar_direccion, FORMAS_TOKENS o en los patrones de la cascada.
+
+# Valores de ejemplo por clase de token para escribir cada forma de FORMAS_TOKENS
+VALORES_CLASE = {
+    "N": ["7", "120"], "NA": ["7A", "120B"], "NAA": ["7AB", "12BC"], "L": ["B", "C"],
+    "TIPO": ["TO", "TORRE", "T", "BL", "BQ", "BLQ", "BLOQUE"],
+}
+
+
+def comparar(direcciones) -> dict:
+    """Cuenta las resueltas por tokens y lista las que difieren de la cascada."""
+    por_tokens = 0
+    diferencias = []
+    for direccion in direcciones:
+        d = CENTROCLL.limpiar_direccion(direccion)
+        out = CENTROCLL.normalizar_por_tokens(d)
+        if out is None:
+            continue
+        por_tokens += 1
+        esperado = CENTROCLL.normalizar_por_cascada(d)
+        if (out, "1") != esperado:
+            diferencias.append((direccion, out, esperado[0], esperado[1]))
+    return {"total": len(direcciones), "por_tokens": por_tokens, "diferencias": diferencias}
+
+
+def direcciones_formas() -> list:
+    """Dos direcciones por forma de FORMAS_TOKENS, con valores distintos en cada token."""
+    direcciones = []
+    for forma in CENTROCLL.FORMAS_TOKENS:
+        for k in range(2):
+            direcciones.append(" ".join(
+                VALORES_CLASE[c][(k + i) % len(VALORES_CLASE[c])] if c in VALORES_CLASE else c
+                for i, c in enumerate(forma)
+            ))
+    return direcciones
+
+
+def test_paridad_formas():
+    direcciones = direcciones_formas()
+    resultado = comparar(direcciones)
+    # Cada forma escrita tal cual debe resolverla el tokenizador...
+    assert resultado["por_tokens"] == len(direcciones)
+    # ...y con la misma salida que la cascada
+    assert resultado["diferencias"] == []
+
+
+def test_paridad_ciclos(direcciones_ciclos):
+    resultado = comparar(direcciones_ciclos)
+    assert resultado["por_tokens"] > 0
+    assert resultado["diferencias"][:20] == []